@@ -4,16 +4,44 @@
 # TODO: consider switching to storing single JPEG images if performance is insufficient!
 import PySpin
 #import copy
-from collections import deque
-import configparser
-from acquisition_ini import AcquisitionINI
-from data_structures import ImageFormat, StreamProperties, CameraProperties, DisplayProperties, CaptureProperties, TriggerProperties
+from acquisition_ini import getAcquisitionINI
+from data_structures import ImageFormat, StreamProperties
+from frame_buffer import FrameRingBuffer
+from frame_spool import FrameSpool
+import telemetry
+from telemetry import Verbosity, Stage
+from drop_detection import DropDetector, LossType
+from frame_metadata import FrameMetadataWriter, FRAME_METADATA_DTYPE, METADATA_FILE_EXTENSION
+from raw_recorder import RawRecorder, RAW_FILE_EXTENSION
+from recording_segments import RecordingSegment, SegmentManifest, MANIFEST_EXTENSION as SEGMENT_MANIFEST_EXTENSION
+from node_cache import NodeCache
+from live_settings import LiveSettingsQueue, SettingConfirmation
+from frame_conversion import FrameConverter
+from motion_gate import MotionDetector, MotionGate, MotionIndex, MOTION_INDEX_EXTENSION
+import numpy
 import datetime
+import concurrent.futures
+import glob
+import math
+import os
+import time
 import socket
-import shutil
+import threading
+from collections import namedtuple
 #from SpinnakerControl import SpinnakerControl 
 
 
+# maximal number of frames taken from the driver buffers by one acquireFrames call
+MAX_ACQUISITION_BATCH = 64
+# maximal time (in s) startCapture waits for the frames of the previous recording to be written
+RECORDING_FINISH_TIMEOUT = 60.0
+
+## statistics of one acquireFrames call: frames taken from the driver (grabbed), incomplete ones,
+#  frames captured for recording and stored in the frame buffer (the others were dropped by overrun), 
+#  frames reported waiting after the first one (-1 if not reported), whether a frame was returned 
+#  for display and the time (in s) spent in GetNextImage, including waiting for the first frame
+AcquisitionBatch = namedtuple('AcquisitionBatch', 'grabbed incomplete captured stored waiting displayed grabTime')
+
 class SpinnakerCamera:
     # Use the following enum and global constant to select the type
     # of AVI video file to be created and saved.       
@@ -22,6 +50,7 @@ class SpinnakerCamera:
         UNCOMPRESSED = 0 
         MJPG = 1  #!< intraframe-only compression, low processing and memory requirements, compressing ratio~ 1/20
         H264 = 2  #!< interframe compression, high computational load, compressing ratio~ 1/50
+        RAW = 3   #!< frames stored as sent by the camera (raw_recorder), no processing, encoded later by transcode
 
     class TriggerType:
         SOFTWARE = 1
@@ -29,18 +58,56 @@ class SpinnakerCamera:
     
     aviType_ = AviType.MJPG  
     
-    def __init__(self, camPtr): 
+    ## input: Spinnaker::CameraPtr camPtr, bool headless - frames are never displayed
+    def __init__(self, camPtr, headless = False): 
         #Spinnaker::CameraPtr camPtr
         self.camera_ = camPtr; 
+        self.headless_ = headless
         self.printDeviceInfo()
-        self.camera_.Init(); # Initialize camera
+        # nodes used by the getters and setters, looked up once after Init()
+        self.nodeCache_ = NodeCache(self.camera_)
+        self.initCamera()
+        # counters and events of this camera, reported by telemetry.TelemetryReporter
+        self.telemetry_ = telemetry.channel.registerCamera(self.getName())
         
-        self.aviRecorder_ = None #Spinnaker::AVIRecorder 
-        self.frameQueue_ = None # circular buffer for frames storing
+        self.aviRecorder_ = None #Spinnaker::AVIRecorder or RawRecorder (aviType RAW)
+        self.frameQueue_ = None # circular buffer for frames storing (FrameRingBuffer)
         self.receivedFramesCnt_ = 0
+        self.streamProperties_ = None # properties of the stream sent by the camera
+        self.captureImageFormat_ = None # ImageFormat of the frames written to the file
+        self.captureConverter_ = None # FrameConverter of the raw frames into the capture pixel format
+        self.displayConverter_ = None # FrameConverter of the raw frames into the display pixel format
+        self.dropDetector_ = None # detects lost frames from frame ids and timestamps
+        self.recordingDrops_ = None # DropStatistics of the last finished recording
+        self.metadataWriter_ = None # writes per-frame metadata next to the video file
+        self.metadataBatch_ = numpy.zeros(0, dtype = FRAME_METADATA_DTYPE) # records of one batch of written frames
+        self.chunkDataEnabled_ = False # whether images carry exposure, gain and line status
+        self.settingsQueue_ = LiveSettingsQueue() # setting changes applied by the acquisition thread
+        self.settingsSequence_ = 0 # sequence number of the last applied change, stored with every frame
+        self.appliedSettings_ = [] # (command, result, applied value) waiting for the next frame to be confirmed
+        # setter and getter of every setting which can be changed while streaming
+        self.liveSettings_ = {'fps': (self.setFrameRate, self.getFrameRate),
+                              'exposure': (self.setExposureTime, self.getExposureTime),
+                              'gain': (self.setGain, self.getGain),
+                              'xFlip': (self.setHorizontalFlip, self.getHorizontalFlip),
+                              'yFlip': (self.setVerticalFlip, self.getVerticalFlip)}
+        self.recordingBaseName_ = None # file name of the current recording without extension
+        self.recordingHeader_ = None # description of the current recording stored in its files
+        self.segment_ = None # RecordingSegment frames are written to
+        self.nextSegment_ = None # future of the RecordingSegment opened in advance (None - no segmentation)
+        self.segmentExecutor_ = None # helper thread opening and finalising segments
+        self.segmentManifest_ = None # SegmentManifest of the current recording
     
         self.captureOn_ = False  # whether frames are captured into a file
         self.stopCaptureFlag_ = False # flag for stopping the capture
+        # guards the switch between recordings: startCapture, stopCapture and the end of a recording
+        # in processFrames; notified when a stopped recording is finished
+        self.recordingLock_ = threading.Condition()
+        self.preRollFrames_ = 0 # newest frames kept in the frame buffer while not recording (pre-roll)
+        self.startSequence_ = 0 # sequence number (see FrameRingBuffer) of the first frame grabbed after startCapture
+        self.stopSequence_ = 0 # sequence number of the first frame grabbed after stopCapture
+        self.motionDetector_ = None # MotionDetector measuring the activity of the queued frames (motion-gated recording)
+        self.motionGate_ = None # MotionGate of the current recording
         self.requested_pixelformat = None   #pixel format as configured in the ini file
         self.PySpin_CameraPixelFormat = None      # PySpins enumeration value for the configured pixelformat
 
@@ -60,11 +127,18 @@ class SpinnakerCamera:
         self.triggerProperties = None
 
     def __del__(self):
+        self.nodeCache_.invalidate()
         self.camera_.DeInit()
         del self.camera_
         print("Spinnaker camera deleted!")
         
         
+    ## initialises the camera (again) and rebuilds the node cache
+    def initCamera(self):
+        self.nodeCache_.invalidate()
+        self.camera_.Init(); # Initialize camera
+        self.nodeCache_.build()
+
     ## This function prints the camera information from the transport layer
     # returns: 0 if successful, -1 otherwise. rtype: int
     def printDeviceInfo(self): 
@@ -86,76 +160,69 @@ class SpinnakerCamera:
             result = -1    
         return result
 
+    ## passes an event to the telemetry channel instead of printing it from the frame path
+    def telemetryEvent(self, key, message, level = Verbosity.WARNINGS):
+        telemetry.channel.pushEvent(self.telemetry_.name_, key, message, level)
+
     def getName(self):
-       # nodeMapTLDevice = self.camera_.GetTLDeviceNodeMap()
-       # ptrDeviceID = nodeMapTLDevice.GetNode('DeviceID')
-       # if PySpin.IsAvailable(ptrDeviceID) and PySpin.IsReadable(ptrDeviceID):
-       #     name = ptrDeviceID.GetValue()
-       #     return name;
-        if self.camera_.TLDevice.DeviceID.GetAccessMode() == PySpin.RO:
-            name = self.camera_.TLDevice.DeviceID.GetValue()
+        if self.nodeCache_.get('DeviceID').readable_:
             # we actually want to usde the serial number as unambiguous identifier here
-            serial = self.camera_.TLDevice.DeviceSerialNumber.GetValue()
+            serial = self.nodeCache_.get('DeviceSerialNumber').node_.GetValue()
             return serial;       
         else:
             return None;
 
     def getSerial(self):
-        if self.camera_.TLDevice.DeviceID.GetAccessMode() == PySpin.RO:
-            serial = self.camera_.TLDevice.DeviceSerialNumber.GetValue()
+        if self.nodeCache_.get('DeviceID').readable_:
+            serial = self.nodeCache_.get('DeviceSerialNumber').node_.GetValue()
             return serial;       
         else:
             return None;
 
     def getModel(self):        
-        if self.camera_.TLDevice.DeviceModelName.GetAccessMode() == PySpin.RO:
-            model = self.camera_.TLDevice.DeviceModelName.GetValue()
+        modelName = self.nodeCache_.get('DeviceModelName')
+        if modelName.readable_:
+            model = modelName.node_.GetValue()
             return model
         else:
             return None
         
     def setBufferMode(self):
-        sNodeMap = self.camera_.GetTLStreamNodeMap() 
-        
         # Set  Buffer Handling Mode to OldestFirst
-        handlingMode = PySpin.CEnumerationPtr(sNodeMap.GetNode('StreamBufferHandlingMode'))
-        if not PySpin.IsAvailable(handlingMode) or not PySpin.IsWritable(handlingMode):
+        handlingMode = self.nodeCache_.get('StreamBufferHandlingMode')
+        if not handlingMode.canWrite():
             print('Unable to set Buffer Handling mode (node retrieval). Aborting...\n')
             return False
 
-        handlingModeEntry = PySpin.CEnumEntryPtr(handlingMode.GetCurrentEntry())
+        handlingModeEntry = PySpin.CEnumEntryPtr(handlingMode.node_.GetCurrentEntry())
         if not PySpin.IsAvailable(handlingModeEntry) or not PySpin.IsReadable(handlingModeEntry):
             print('Unable to set Buffer Handling mode (Entry retrieval). Aborting...\n')
             return False
+        defaultHandlingMode = handlingModeEntry.GetDisplayName()
         
-        handlingModeOldestFirst = PySpin.CEnumEntryPtr(handlingMode.GetEntryByName('OldestFirst'))
-        if not PySpin.IsAvailable(handlingModeOldestFirst) or not PySpin.IsReadable(handlingModeOldestFirst):
+        if not handlingMode.setEntry('OldestFirst'):
             print('Unable to set Buffer Handling mode (Value retrieval). Aborting...\n')
             return False        
-
-        handlingMode.SetIntValue(handlingModeOldestFirst.GetValue())
         print('Buffer Handling Mode set to OldestFirst...')
 
 
         # Set stream buffer Count Mode to manual
-        streamBufferCountMode = PySpin.CEnumerationPtr(sNodeMap.GetNode('StreamBufferCountMode'))
-        if not PySpin.IsAvailable(streamBufferCountMode) or not PySpin.IsWritable(streamBufferCountMode):
+        streamBufferCountMode = self.nodeCache_.get('StreamBufferCountMode')
+        if not streamBufferCountMode.canWrite():
             print('Unable to set Buffer Count Mode (node retrieval). Aborting...\n')
             return False
 
-        streamBufferCountModeManual = PySpin.CEnumEntryPtr(streamBufferCountMode.GetEntryByName('Manual'))
-        if not PySpin.IsAvailable(streamBufferCountModeManual) or not PySpin.IsReadable(streamBufferCountModeManual):
+        if not streamBufferCountMode.setEntry('Manual'):
             print('Unable to set Buffer Count Mode entry (Entry retrieval). Aborting...\n')
             return False
-
-        streamBufferCountMode.SetIntValue(streamBufferCountModeManual.GetValue())
         print('Stream Buffer Count Mode set to manual...')
 
         # Retrieve and modify Stream Buffer Count
-        bufferCountPtr = PySpin.CIntegerPtr(sNodeMap.GetNode('StreamBufferCountManual'))
-        if not PySpin.IsAvailable(bufferCountPtr) or not PySpin.IsWritable(bufferCountPtr):
+        bufferCountHandle = self.nodeCache_.get('StreamBufferCountManual')
+        if not bufferCountHandle.canWrite():
             print('Unable to set Buffer Count (Integer node retrieval). Aborting...\n')
             return False    
+        bufferCountPtr = bufferCountHandle.node_
     
         bufferCount = bufferCountPtr.GetMax()           
         NUM_OF_BUFFERS = 50 #
@@ -165,17 +232,63 @@ class SpinnakerCamera:
         #self.camera_.TLStream.StreamDefaultBufferCount.SetValue(bufferCount)
             
         # Display Buffer Info
-        print('\nDefault Buffer Handling Mode: %s' % handlingModeEntry.GetDisplayName())
+        print('\nDefault Buffer Handling Mode: %s' % defaultHandlingMode)
         print('Default Buffer Count: %d' % bufferCountPtr.GetValue())
         print('Maximum Buffer Count: %d' % bufferCountPtr.GetMax())    
 
 
+    ## sets an integer node to the closest value the camera accepts (within its limits, on its increment)
+    #  input: string name - node of NodeCache, int value
+    #  output: value of the node afterwards or None if the camera has no such node
+    def setIntegerNode(self, name, value):
+        handle = self.nodeCache_.get(name)
+        handle.refresh() # limits and access change with binning, decimation and the image size
+        if not handle.readable_:
+            return None
+        node = handle.node_
+        if node.GetValue() == value:
+            return value
+        if not handle.writable_:
+            print('%s of the camera %s cannot be changed, it remains %d' % (name, self.getName(), node.GetValue()))
+            return node.GetValue()
+        minimum = node.GetMin()
+        increment = max(1, node.GetInc())
+        setValue = minimum + (min(max(value, minimum), node.GetMax()) - minimum)//increment*increment
+        node.SetValue(setValue)
+        if setValue != value:
+            print('%s of the camera %s set to %d instead of %d (limits: %d - %d, increment %d)' 
+                  % (name, self.getName(), setValue, value, minimum, node.GetMax(), increment))
+        return setValue
+
+    ## sets binning, decimation and the region of interest through the node map; must be
+    #  done before acquisition starts, the frames sent by the camera get the new size
+    #  input: CameraProperties (offsetX, offsetY, width, height, binning, decimation)
+    def setImageGeometry(self, cameraProperties):
+        geometry = {} # values set (1 or 0 for nodes the camera does not have)
+        # binning and decimation first: they change the largest possible region
+        for name in ('BinningVertical', 'BinningHorizontal'):
+            geometry[name] = self.setIntegerNode(name, cameraProperties.binning) or 1
+        for name in ('DecimationVertical', 'DecimationHorizontal'):
+            geometry[name] = self.setIntegerNode(name, cameraProperties.decimation) or 1
+        # the offsets are cleared, so the whole width and height are allowed, then moved to the region
+        for sizeName, offsetName, size, offset in (('Width', 'OffsetX', cameraProperties.width, cameraProperties.offsetX), 
+                                                   ('Height', 'OffsetY', cameraProperties.height, cameraProperties.offsetY)):
+            self.setIntegerNode(offsetName, 0)
+            sizeHandle = self.nodeCache_.get(sizeName)
+            sizeHandle.refresh()
+            if sizeHandle.readable_:
+                self.setIntegerNode(sizeName, size if size > 0 else sizeHandle.node_.GetMax())
+            geometry[offsetName] = self.setIntegerNode(offsetName, offset) or 0
+        print('Image of the camera %s: %dx%d pixels at (%d, %d), binning %d, decimation %d' 
+              % (self.getName(), self.nodeCache_.get('Width').node_.GetValue(), self.nodeCache_.get('Height').node_.GetValue(),
+                 geometry['OffsetX'], geometry['OffsetY'], geometry['BinningVertical'], geometry['DecimationVertical']))
+
+
     ## Set acquisition mode to continuous
     # output: StreamProperties streamProperties)
     def initStream(self): 
         try:      
             result = 0
-            nodemap = self.camera_.GetNodeMap()
             # Enable frame rate control
             # ptrFrameRateControl = PySpin.CCategoryPtr(nodemap.GetNode('AcquisitionFrameRateControlEnable'));
             # if (!Spinnaker::GenApi::IsAvailable(ptrFrameRateControl)) {
@@ -183,12 +296,13 @@ class SpinnakerCamera:
             #  return -1;
             #}
             # ptrFrameRateControl->SetValue("true");
-            ptrFrameRate = PySpin.CFloatPtr(nodemap.GetNode('AcquisitionFrameRate'))
-            if (not PySpin.IsAvailable(ptrFrameRate)) or (not PySpin.IsReadable(ptrFrameRate)):
+            frameRate = self.nodeCache_.get('AcquisitionFrameRate')
+            if not frameRate.canRead():
                 print('Unable to retrieve frame rate. Aborting...')
                 return -1, None
     
-            streamProperties = StreamProperties(self.camera_.Width.GetValue(), self.camera_.Height.GetValue(), ptrFrameRate.GetValue())
+            streamProperties = StreamProperties(self.nodeCache_.get('Width').node_.GetValue(), self.nodeCache_.get('Height').node_.GetValue(), 
+                                                frameRate.node_.GetValue())
     
             #get Camera Model to choose pixel format
             deviceModel = self.getModel()
@@ -197,47 +311,50 @@ class SpinnakerCamera:
             print('%s' % deviceModel)
             #cameraType = deviceModel[-1]
                   
-            nodePixelFormat = PySpin.CEnumerationPtr(nodemap.GetNode('PixelFormat'))
+            pixelFormatHandle = self.nodeCache_.get('PixelFormat')
+            nodePixelFormat = pixelFormatHandle.node_
 
-            if PySpin.IsAvailable(nodePixelFormat) and PySpin.IsWritable(nodePixelFormat):
+            if pixelFormatHandle.canWrite():
                 # the goal is simply to extract the current camera's/display's/capture's configured pixelformat from acquisition.ini
                 self.cameraProperties, self.displayProperties, self.captureProperties, self.triggerProperties = self.getSubsectionsFromIniFileForCurrentCamera()
+
  
                 #this is now generic for all pixelformats
-                nodePixelFormatValue = PySpin.CEnumEntryPtr(nodePixelFormat.GetEntryByName(self.cameraProperties.pixelFormat))              
-                #print('nodePixelFormatValue: %s' % nodePixelFormatValue)
+                pixelFormat = pixelFormatHandle.getEntryValue(self.cameraProperties.pixelFormat)
                 #print('PySpin.PixelFormat_Mono8: %s' % PySpin.PixelFormat_Mono8)
                 
-                #DISPLAY
-                self.PySpin_DisplayPixelFormatString = self.displayProperties.pixelFormat                
-                self.PySpin_DisplayPixelFormat, streamProperties_format = self.getPySpinPixelTypeEnumValueFromString(self.displayProperties.pixelFormat)
-                #print('PySpin_DisplayPixelFormat: %s' % str(self.PySpin_DisplayPixelFormat))
-                if self.displayProperties.pixelFormat != self.cameraProperties.pixelFormat:
-                    print('Camera and display pixelformat differ, requiring costly conversion, consider setting display pixelformat to camera pixelformat if possible.')
-                    print('self.cameraProperties.pixelFormat: %s' % self.cameraProperties.pixelFormat)
-                    print('self.displayProperties.pixelFormat: %s' % self.displayProperties.pixelFormat)
+                #DISPLAY (not needed without windows)
+                if not self.headless_:
+                    self.PySpin_DisplayPixelFormatString = self.displayProperties.pixelFormat                
+                    self.PySpin_DisplayPixelFormat, streamProperties_format = self.getPySpinPixelTypeEnumValueFromString(self.displayProperties.pixelFormat)
+                    #print('PySpin_DisplayPixelFormat: %s' % str(self.PySpin_DisplayPixelFormat))
+                    if self.displayProperties.pixelFormat != self.cameraProperties.pixelFormat:
+                        print('Camera and display pixelformat differ, requiring costly conversion, consider setting display pixelformat to camera pixelformat if possible.')
+                        print('self.cameraProperties.pixelFormat: %s' % self.cameraProperties.pixelFormat)
+                        print('self.displayProperties.pixelFormat: %s' % self.displayProperties.pixelFormat)
 
-                if (self.displayProperties.pixelFormat == 'RGB8') or (self.displayProperties.pixelFormat == 'Mono8'):
-                    print('Requested display pixelformat supported: %s' % self.displayProperties.pixelFormat)
-                else:
-                    print('display pixel format %s' % self.displayProperties.pixelFormat, 'not supported (only RGB8 and Mono8) Aborting...')
-                    return -1, None
+                    if (self.displayProperties.pixelFormat == 'RGB8') or (self.displayProperties.pixelFormat == 'Mono8'):
+                        print('Requested display pixelformat supported: %s' % self.displayProperties.pixelFormat)
+                    else:
+                        print('display pixel format %s' % self.displayProperties.pixelFormat, 'not supported (only RGB8 and Mono8) Aborting...')
+                        return -1, None
                     
                 #CAPTURE
                 self.PySpin_CapturePixelFormatString = self.captureProperties.pixelFormat
-                self.PySpin_CapturePixelFormat, streamProperties_format = self.getPySpinPixelTypeEnumValueFromString(self.captureProperties.pixelFormat)
+                if self.captureProperties.aviType == 'RAW':
+                    # raw recordings keep the sensor data as they are, conversion is done when transcoding
+                    self.PySpin_CapturePixelFormatString = self.cameraProperties.pixelFormat
+                self.PySpin_CapturePixelFormat, self.captureImageFormat_ = self.getPySpinPixelTypeEnumValueFromString(self.PySpin_CapturePixelFormatString)
                 #print('PySpin_CapturePixelFormat: %s' % self.PySpin_CapturePixelFormat)
                 
-                if self.captureProperties.pixelFormat != self.cameraProperties.pixelFormat:
+                if self.PySpin_CapturePixelFormatString != self.cameraProperties.pixelFormat:
                     print('Camera and capture pixelformat differ, requiring costly conversion, consider setting capture pixelformat to camera pixelformat if possible.')
                     print('self.cameraProperties.pixelFormat: %s' % self.cameraProperties.pixelFormat)
                     print('self.captureProperties.pixelFormat: %s' % self.captureProperties.pixelFormat)
 
 
-                # Retrieve the desired entry node from the enumeration node
-                if PySpin.IsAvailable(nodePixelFormatValue) and PySpin.IsReadable(nodePixelFormatValue):
-                    # Retrieve the integer value from the entry node
-                    pixelFormat = nodePixelFormatValue.GetValue()
+                # the integer value of the desired entry of the enumeration node
+                if pixelFormat != None:
                     # Set integer as new value for enumeration node
                     nodePixelFormat.SetIntValue(pixelFormat)
                     print('Pixel format set to %s...' % nodePixelFormat.GetCurrentEntry().GetSymbolic())
@@ -245,8 +362,7 @@ class SpinnakerCamera:
                     print('Pixel format not available...')
                     result = -1
                     # try to be helpful
-                    tmp_nodePixelFormat = PySpin.CEnumerationPtr(nodemap.GetNode('PixelFormat'))
-                    node_list = tmp_nodePixelFormat.GetEntries()
+                    node_list = nodePixelFormat.GetEntries()
                     supported_pixelformat_string = ''
                     print('PixelFormats supported by this camera:')
                     for i_node in node_list:
@@ -261,11 +377,30 @@ class SpinnakerCamera:
                 self.PySpin_CameraPixelFormat, streamProperties.format = self.getPySpinPixelTypeEnumValueFromString(self.cameraProperties.pixelFormat)
 #                print('PySpin_CameraPixelFormat: %s' % self.PySpin_CameraPixelFormat)
                     
-                if self.PySpin_DisplayPixelFormatString != self.cameraProperties.pixelFormat:
+                if (not self.headless_) and (self.PySpin_DisplayPixelFormatString != self.cameraProperties.pixelFormat):
                     print('Display pixelformat differs from camera pixelformat, requiring costly conversions.')
+
+                # the region of interest, binning and decimation reduce the size of the frames
+                # sent by the camera; the frame buffer, the display and the recordings follow it
+                self.setImageGeometry(self.cameraProperties)
+                streamProperties.width = self.nodeCache_.get('Width').node_.GetValue()
+                streamProperties.height = self.nodeCache_.get('Height').node_.GetValue()
                     
             self.setBufferMode()                
             self.enableFrameRateSetting()
+            self.chunkDataEnabled_ = self.enableChunkData()
+            self.streamProperties_ = streamProperties
+            # the frame buffer holds raw frames, they are converted by the conversion workers
+            if self.PySpin_CameraPixelFormat != None:
+                if self.requested_pixelformat == self.PySpin_CapturePixelFormatString:
+                    colorProcessing = PySpin.NO_COLOR_PROCESSING
+                else:
+                    colorProcessing = PySpin.HQ_LINEAR
+                self.captureConverter_ = FrameConverter(streamProperties.width, streamProperties.height, 
+                                                        self.PySpin_CameraPixelFormat, self.PySpin_CapturePixelFormat, colorProcessing)
+                if not self.headless_:
+                    self.displayConverter_ = FrameConverter(streamProperties.width, streamProperties.height, 
+                                                            self.PySpin_CameraPixelFormat, self.PySpin_DisplayPixelFormat)
 
         except PySpin.SpinnakerException as ex:
             print('Error: %s for the camera %s' % (ex, self.getName()) )
@@ -273,28 +408,50 @@ class SpinnakerCamera:
         return result, streamProperties
 
 
-    ## Set acquisition mode to continuous
+    ## output: size in bytes of a frame stored in the frame buffer (raw, in the camera pixel format)
+    def getBufferFrameSize(self):
+        return self.streamProperties_.getFrameSize()
+
+    ## output: size in bytes of a frame written to the file (in the capture pixel format)
+    def getCaptureFrameSize(self):
+        captureFormat = self.captureImageFormat_ if self.captureImageFormat_ != None else self.streamProperties_.format
+        return StreamProperties(self.streamProperties_.width, self.streamProperties_.height, 
+                                self.streamProperties_.fps, captureFormat).getFrameSize()
+
+
+    ## Set acquisition mode to continuous and allocates the frame buffer
+    # input: unsigned long int bufferCapacity - number of frames assigned to the camera
     def start(self, bufferCapacity):       
         try:
-            nodemap = self.camera_.GetNodeMap()
-            ptrAcquisitionMode = PySpin.CEnumerationPtr(nodemap.GetNode('AcquisitionMode'))
-            if not PySpin.IsAvailable(ptrAcquisitionMode) or not PySpin.IsWritable(ptrAcquisitionMode):
+            acquisitionMode = self.nodeCache_.get('AcquisitionMode')
+            if not acquisitionMode.canWrite():
                 print('Unable to set acquisition mode to continuous (node retrieval). Aborting... \n')
                 return -1
 
-            ptrAcquisitionModeContinuous = ptrAcquisitionMode.GetEntryByName('Continuous')
-            if not PySpin.IsAvailable(ptrAcquisitionModeContinuous) or not PySpin.IsReadable(ptrAcquisitionModeContinuous):
+            if not acquisitionMode.setEntry('Continuous'):
                 print('Unable to set acquisition mode to continuous (entry \'continuous\' retrieval). \Aborting... \n')
                 return -1
-            
-            acquisitionModeContinuous = ptrAcquisitionModeContinuous.GetValue();
-            ptrAcquisitionMode.SetIntValue(acquisitionModeContinuous);
             print('Acquisition mode set to continuous...');
             
-            if (self.frameQueue_ != None):
-                del self.frameQueue_;
-            self.frameQueue_ = deque(maxlen = 1000)
+            # all slots are allocated once here, so no memory is allocated per frame;
+            # the capacity is planned by SpinnakerControl within the memory budget
+            frameSize = self.getBufferFrameSize()
+            capacity = max(1, int(bufferCapacity))
+            if (self.frameQueue_ == None) or (self.frameQueue_.frameSize_ != frameSize) or (self.frameQueue_.getCapacity() != capacity):
+                self.frameQueue_ = None # release the old buffer before allocating the new one
+                self.frameQueue_ = FrameRingBuffer(frameSize, capacity)
+            else:
+                self.frameQueue_.clear()
+            self.dropDetector_ = DropDetector(self.streamProperties_.fps)
+            print('Frame buffer of %d frames (%.1f MB, %.1f s) allocated for the camera %s' 
+                  % (capacity, self.frameQueue_.getMemorySize()/1024.0**2, capacity/self.streamProperties_.fps, self.getName()))
+            self.preRollFrames_ = self.planPreRoll(capacity)
+            self.motionDetector_ = None
+            if (self.captureProperties != None) and (self.captureProperties.motionThreshold > 0):
+                self.motionDetector_ = MotionDetector(self.streamProperties_, self.captureProperties.motionDecimation)
+            self.frameQueue_.setSpool(self.createSpool(frameSize))
             self.camera_.BeginAcquisition()# Begin acquiring images
+            self.nodeCache_.refreshAccess() # e.g. the image format is read-only while streaming
 
         except PySpin.SpinnakerException as ex:
             print('Error: %s for the camera %s' % (ex, self.getName()) )
@@ -302,87 +459,412 @@ class SpinnakerCamera:
         return 0
 
 
-    
-    def acquireFrames(self, needGetImage):
-        #!! TODO: acquire all frames in the buffer
+    ## the pre-roll is kept in the frame buffer and takes at most half of it,
+    #  the rest remains for buffering the recording
+    #  input: int capacity - number of frames of the frame buffer
+    #  output: number of frames of the pre-roll (CaptureProperties.preRollSeconds)
+    def planPreRoll(self, capacity):
+        if (self.captureProperties == None) or (self.captureProperties.preRollSeconds <= 0):
+            return 0
+        fps = self.streamProperties_.fps
+        frames = int(math.ceil(self.captureProperties.preRollSeconds*fps))
+        if frames > capacity//2:
+            print('Pre-roll of %.1f s does not fit into the frame buffer of the camera %s, reduced to %.1f s' 
+                  % (self.captureProperties.preRollSeconds, self.getName(), (capacity//2)/fps))
+            frames = capacity//2
+        print('Pre-roll of %d frames (%.1f MB, %.1f s) kept for the camera %s' 
+              % (frames, frames*self.getBufferFrameSize()/1024.0**2, frames/fps, self.getName()))
+        return frames
+
+    ## output: number of frames the processing thread leaves in the frame buffer: the pre-roll while 
+    #  not recording, the pre-padding of the motion gate while recording
+    def getKeptFrameCount(self):
+        if self.stopCaptureFlag_:
+            return 0
+        if self.captureOn_:
+            motionGate = self.motionGate_
+            return motionGate.preFrames_ if motionGate != None else 0
+        return self.preRollFrames_
+
+    ## creates the motion gate of a recording, if motionThreshold is set in the Capture section
+    #  input: string baseName - file name of the recording without extension
+    #  output: MotionGate or None
+    def createMotionGate(self, baseName):
+        if self.motionDetector_ == None:
+            return None
+        fps = self.streamProperties_.fps
+        # the frames of the pre-padding are kept in the frame buffer until the gate decides
+        preFrames = min(int(math.ceil(self.captureProperties.motionPreSeconds*fps)), self.frameQueue_.getCapacity()//2)
+        postFrames = int(math.ceil(self.captureProperties.motionPostSeconds*fps))
+        header = dict(self.recordingHeader_)
+        header.update({'motionThreshold': self.captureProperties.motionThreshold, 
+                       'motionDecimation': self.captureProperties.motionDecimation,
+                       'preFrames': preFrames, 'postFrames': postFrames})
+        return MotionGate(self.captureProperties.motionThreshold, preFrames, postFrames, 
+                          MotionIndex(baseName + MOTION_INDEX_EXTENSION, header))
+
+    ## creates the disk spool for frames which do not fit into the frame buffer
+    #  input: int frameSize - size of a frame slot in bytes
+    #  output: FrameSpool or None if no spool is configured or it cannot be created
+    def createSpool(self, frameSize):
+        if (self.captureProperties == None) or (self.captureProperties.spoolPath == ''):
+            return None
+        spoolPath = self.captureProperties.spoolPath
+        capacity = FrameSpool.capacityFor(spoolPath, frameSize, self.captureProperties.spoolSeconds, self.streamProperties_.fps)
+        if capacity <= 0:
+            return None
+        try:
+            spool = FrameSpool(spoolPath, frameSize, capacity)
+        except (OSError, ValueError) as ex:
+            print('Unable to create the frame spool in %s for the camera %s: %s' % (spoolPath, self.getName(), ex))
+            return None
+        print('Frame spool of %d frames (%.1f MB, %.1f s) created in %s for the camera %s' 
+              % (capacity, spool.getDiskSize()/1024.0**2, capacity/self.streamProperties_.fps, spool.filename_, self.getName()))
+        return spool
+
+    ## waits for the next frame and takes it together with the frames already waiting in the
+    #  driver buffers (at most maxFrames), which are put to the queue as one batch
+    #  (while recording or if a pre-roll is kept);
+    #  the raw frames are only copied, conversions are done by the conversion workers
+    #  input: bool needGetImage - whether the newest frame should be returned for display (ignored if headless),
+    #         int grabTimeout - how long to wait for the next frame (in ms),
+    #         int maxFrames - maximal number of frames taken at once
+    #  output: result (0 if at least one frame was acquired), frame buffer for display (newest complete frame, raw),
+    #          AcquisitionBatch - statistics of the batch
+    def acquireFrames(self, needGetImage, grabTimeout = PySpin.EVENT_TIMEOUT_INFINITE, maxFrames = MAX_ACQUISITION_BATCH):
         result = -1
         frameBuf = None
+        latency = self.telemetry_.latency_
+        needGetImage = needGetImage and not self.headless_ # no display: frames are never converted for it
+        frames = [] # (image, host receive time) in the order of arrival
+        waiting = 0
+        incomplete = 0
+        captureData = []
+        captureMetadata = []
+        stored = 0
+        batchStart = time.perf_counter()
         try:  
-            frame = self.camera_.GetNextImage(2);            
-            # Ensure image completion
-            if frame.IsIncomplete():
-                print('Image incomplete with image status %d ... \n' % frame.GetImageStatus())
-            else:
-                i = 0
-                while (not frame.IsIncomplete()):
-                    if needGetImage: # if we need to copy image to frameBuf
-                        frameBuf = frame.GetData()  
-                    result = 0                          
+            if self.settingsQueue_.hasPending():
+                self.applySettingCommands()
+            grabStart = time.perf_counter()
+            frames.append((self.camera_.GetNextImage(grabTimeout), time.time()))
+            latency[Stage.GRAB].record(time.perf_counter() - grabStart)
+            # frames which arrived meanwhile are taken without waiting; the driver reports
+            # their number, so normally no grab ends with the timeout exception
+            waiting = self.getWaitingFrameCount()
+            for i in range(min(maxFrames - 1, waiting if waiting != None else maxFrames)):
+                grabStart = time.perf_counter()
+                frames.append((self.camera_.GetNextImage(PySpin.EVENT_TIMEOUT_NONE), time.time()))
+                latency[Stage.GRAB].record(time.perf_counter() - grabStart)
+        except PySpin.SpinnakerException as ex:
+            # without the buffer count the waiting frames are taken until the timeout
+            if ex.errorcode != PySpin.SPINNAKER_ERR_TIMEOUT:
+                self.telemetryEvent('acquisitionError', 'Error: %s' % ex)
+        grabTime = time.perf_counter() - batchStart
+
+        try:
+            newest = None # the newest complete frame is the only one displayed
+            for i in range(len(frames) - 1, -1, -1):
+                if not frames[i][0].IsIncomplete():
+                    newest = i
+                    break
+            for i, (frame, hostTime) in enumerate(frames):
+                if frame.IsIncomplete():
+                    self.onIncompleteFrame(frame)
+                    incomplete += 1
+                    continue
+                self.telemetry_.received_ += 1
+                frameId = frame.GetFrameID()
+                deviceTime = frame.GetTimeStamp()
+                missing = self.dropDetector_.onFrame(frameId, deviceTime)
+                if missing > 0:
+                    self.telemetryEvent('transportLoss', '%d frames lost before frame %d' % (missing, frameId))
+                if len(self.appliedSettings_) > 0:
+                    self.confirmSettings(frameId)
+                result = 0                          
+                if self.captureOn_ or (self.preRollFrames_ > 0):
                     if self.captureOn_:
-                        #std::cout << receivedFramesCnt_ <<"\n";
                         self.receivedFramesCnt_ += 1
-                        #frameQueue_.push(frame); # Deep copy image into image vector
-                        #frameQueue_.push_back(frame);
-                        
-                        # self.PySpin_CameraPixelFormat is configured in init stream above  
-                        # this should affect writing to file only...
-                        if self.requested_pixelformat == self.PySpin_CapturePixelFormatString:
-                            self.frameQueue_.append(frame.Convert(self.PySpin_CapturePixelFormat, PySpin.NO_COLOR_PROCESSING))
-                            #print('PySpin.NO_COLOR_PROCESSING: %s' % PySpin.NO_COLOR_PROCESSING)
-                        else:
-                            self.frameQueue_.append(frame.Convert(self.PySpin_CapturePixelFormat, PySpin.HQ_LINEAR))
-                            #print('PySpin.HQ_LINEAR: %s' % PySpin.HQ_LINEAR)
-                    
-                    # convert image for display purposes?
-                    #print('self.PySpin_DisplayPixelFormatString: %s' % self.PySpin_DisplayPixelFormatString)
-                    #print('self.cameraProperties.pixelFormat: %s' % self.cameraProperties.pixelFormat)
-                    if self.displayProperties.pixelFormat != self.cameraProperties.pixelFormat:
-                        #print('Displaying as different format from capture')
-                        tmpframeBuf = frame.Convert(self.PySpin_DisplayPixelFormat, PySpin.HQ_LINEAR)
-                        frameBuf = tmpframeBuf.GetData()
-                          
-                    frame.Release();
-                    i += 1;
-                    #if (i >= 2)
-                    #  break;
-                    frame = self.camera_.GetNextImage(PySpin.EVENT_TIMEOUT_NONE);
-
-                frame.Release();
+                    # the raw frame is copied, the processing thread converts it to the capture pixel format
+                    data = frame.GetData()
+                    motion = 0.0
+                    if self.motionDetector_ != None:
+                        detectStart = time.perf_counter()
+                        motion = self.motionDetector_.measure(data)
+                        latency[Stage.DETECT].record(time.perf_counter() - detectStart)
+                    captureData.append(data)
+                    captureMetadata.append((frameId, deviceTime, hostTime) + self.getFrameSettings(frame) + (self.settingsSequence_, motion))
+                
+                if needGetImage and (i == newest): # if we need to copy image to frameBuf
+                    # converted for display by a conversion worker (see VideoAcquisitionThread)
+                    frameBuf = frame.GetData()
+
+            if len(captureData) > 0:
+                enqueueStart = time.perf_counter()
+                stored = self.frameQueue_.pushBatch(captureData, captureMetadata)
+                latency[Stage.ENQUEUE].record(time.perf_counter() - enqueueStart)
+                if self.frameQueue_.isSpooling():
+                    self.telemetryEvent('spool', 'Frame buffer full: frames are spooled to disk (%d in total)' % self.frameQueue_.getSpooledCount())
+                if stored < len(captureData):
+                    for i in range(len(captureData) - stored):
+                        self.dropDetector_.onOverflow()
+                    self.telemetry_.overruns_ += len(captureData) - stored
+                    self.telemetryEvent('overrun', 'Frame buffer overrun: frames are dropped (%d in total)' % self.frameQueue_.getOverrunCount())
 
         except PySpin.SpinnakerException as ex:
-            if ex.errorcode != PySpin.SPINNAKER_ERR_TIMEOUT:
-                print('Error: %s' % ex)
-                result = -1
-                
-        return result, frameBuf
+            self.telemetryEvent('acquisitionError', 'Error: %s' % ex)
+            result = -1
+        finally:
+            # every image goes back to the driver exactly once, after its data were copied
+            for frame, hostTime in frames:
+                frame.Release()
+
+        batch = AcquisitionBatch(len(frames), incomplete, len(captureData), stored, 
+                                 waiting if waiting != None else -1, frameBuf is not None, grabTime)
+        return result, frameBuf, batch
+
+    ## output: number of images waiting in the driver buffers (None if the driver does not report it)
+    def getWaitingFrameCount(self):
+        outputBufferCount = self.nodeCache_.get('StreamOutputBufferCount')
+        if not outputBufferCount.readable_:
+            return None
+        return outputBufferCount.node_.GetValue()
+
+    ## queues a change of a setting of the streaming camera, applied by the acquisition thread 
+    #  between two frames (see live_settings)
+    #  input: string name - one of live_settings.LIVE_SETTINGS, value - new value
+    #  output: int sequence number of the change
+    def submitSetting(self, name, value):
+        return self.settingsQueue_.submit(name, value)
+
+    ## applies the queued setting changes and reads the values back; called by the acquisition 
+    #  thread (or by the caller when the camera is not streaming)
+    def applySettingCommands(self):
+        for command in self.settingsQueue_.takePending():
+            setter, getter = self.liveSettings_[command.name]
+            try:
+                result = setter(command.value)
+                applied = getter()
+            except PySpin.SpinnakerException as ex:
+                self.telemetryEvent('settingError', 'Unable to set %s to %s: %s' % (command.name, command.value, ex))
+                result, applied = -1, None
+            self.settingsSequence_ = command.sequence
+            self.appliedSettings_.append((command, result, applied))
+            if (result == 0) and (self.cameraProperties != None) and (command.name in ('fps', 'exposure', 'gain')):
+                # the configured values are stored with the frames when there is no chunk data
+                self.cameraProperties = self.cameraProperties._replace(**{command.name: applied})
+            self.telemetryEvent('setting', 'Setting %s changed to %s (#%d)' % (command.name, applied, command.sequence), Verbosity.DEBUG)
+
+    ## confirms the applied setting changes
+    #  input: int frameId - first frame grabbed after the changes (None - the camera is not streaming)
+    def confirmSettings(self, frameId):
+        for command, result, applied in self.appliedSettings_:
+            self.settingsQueue_.confirm(SettingConfirmation(command.sequence, command.name, command.value, applied, frameId, result))
+        self.appliedSettings_ = []
+
+    ## output: tuple (exposure time, gain, line status) the frame was taken with
+    def getFrameSettings(self, frame):
+        if self.chunkDataEnabled_:
+            try:
+                chunkData = frame.GetChunkData()
+                return (chunkData.GetExposureTime(), chunkData.GetGain(), chunkData.GetExposureEndLineStatusAll())
+            except PySpin.SpinnakerException:
+                self.chunkDataEnabled_ = False # not supported by the camera, do not try again
+        # fall back on the configured values
+        if self.cameraProperties != None:
+            return (self.cameraProperties.exposure, self.cameraProperties.gain, 0)
+        return (0, 0, 0)
+
+    ## turns on the chunk data (exposure time, gain, line status) sent with every image;
+    #  must be called before the acquisition starts
+    #  output: True if at least exposure time and gain are available
+    def enableChunkData(self):
+        try:
+            chunkModeActive = self.nodeCache_.get('ChunkModeActive')
+            chunkSelector = self.nodeCache_.get('ChunkSelector')
+            if (not chunkModeActive.canWrite()) or (not chunkSelector.canWrite()):
+                print('Chunk data not available, frame metadata will contain configured exposure and gain')
+                return False
+            chunkModeActive.node_.SetValue(True)
+            enabledChunks = []
+            chunkEnable = self.nodeCache_.get('ChunkEnable')
+            for entry in chunkSelector.node_.GetEntries():
+                chunkEntry = PySpin.CEnumEntryPtr(entry)
+                if (not PySpin.IsAvailable(chunkEntry)) or (not PySpin.IsReadable(chunkEntry)):
+                    continue
+                if chunkEntry.GetSymbolic() in ('ExposureTime', 'Gain', 'ExposureEndLineStatusAll'):
+                    chunkSelector.node_.SetIntValue(chunkEntry.GetValue())
+                    if chunkEnable.canWrite():
+                        chunkEnable.node_.SetValue(True)
+                        enabledChunks.append(chunkEntry.GetSymbolic())
+            print('Chunk data enabled: %s' % ', '.join(enabledChunks))
+            return ('ExposureTime' in enabledChunks) and ('Gain' in enabledChunks)
+        except PySpin.SpinnakerException as ex:
+            print('Unable to enable chunk data: %s' % ex)
+            return False
+
+    ## registers an incomplete image which is discarded
+    def onIncompleteFrame(self, frame):
+        self.telemetry_.incomplete_ += 1
+        missing = self.dropDetector_.onIncomplete(frame.GetFrameID(), frame.GetTimeStamp())
+        if missing > 0:
+            self.telemetryEvent('transportLoss', '%d frames lost before frame %d' % (missing, frame.GetFrameID()))
+        self.telemetryEvent('incomplete', 'Image incomplete with image status %d' % frame.GetImageStatus(), Verbosity.DEBUG)
+
+    ## output: dictionary {'session': {...}, 'recording': {...}, 'lastRecording': {...}} with numbers 
+    #  of received frames and of frames lost in transport, as incomplete images and by buffer overflow
+    def getDropStatistics(self):
+        if self.dropDetector_ == None:
+            return None
+        statistics = self.dropDetector_.getStatistics()
+        statistics['lastRecording'] = self.recordingDrops_.asDict() if self.recordingDrops_ != None else None
+        return statistics
          
         
-    def processFrame(self):
-        result = -1
-        if len(self.frameQueue_) < 1: #!< if the buffer is empty - exit, since there is nothing to do
-            return 0, None;
+    ## writes frames waiting in the queue to the file (with the motion gate only the frames
+    #  around activity, the others are skipped)
+    #  input: int maxFrames - maximal number of frames processed in one call
+    #  output: number of processed (written or skipped) frames or -1 on error
+    def processFrames(self, maxFrames):
+        written = 0
+        processed = 0
+        # read once: stopCapture() may set the flag on the GUI thread during the call
+        stopping = self.stopCaptureFlag_
         try:  
-            if (self.captureOn_ or self.stopCaptureFlag_):
-                 frameBuf = self.frameQueue_.popleft();
-                 self.aviRecorder_.Append(frameBuf);
-                 print('Received: %s, In buffer: %s\n' %(self.receivedFramesCnt_, len(self.frameQueue_)))
-                 if self.stopCaptureFlag_:
-                     if self.captureOn_:
-                         self.captureOn_ = False; 
-                         #!< capture is finished. From now on we just write to file 
-                         #!< remaining frames from the buffer
-                                                     
-
-                     if len(self.frameQueue_) == 0:  #!< if the buffer is empty
-                         self.aviRecorder_.Close();      #!< close the file and
-                         print('Video saved!\n');
-                         self.stopCaptureFlag_ = False;     #!< clear the flag
-            result = 0; #!< finish successfully                                     
+            if not (self.captureOn_ or stopping):
+                # frames queued after the file was closed do not belong to any recording,
+                # only the newest ones are kept as the pre-roll of the next recording
+                self.frameQueue_.discard(len(self.frameQueue_) - self.preRollFrames_)
+                return 0
+            
+            if stopping and self.captureOn_:
+                self.captureOn_ = False; 
+                #!< capture is finished. From now on we just write to file 
+                #!< remaining frames from the buffer
+
+            # the recording starts with the pre-roll: frames older than it are dropped
+            self.frameQueue_.discard(self.startSequence_ - self.preRollFrames_ - self.frameQueue_.getReleasedCount())
+            toProcess = maxFrames
+            if stopping:
+                # frames grabbed after stopCapture are not written (they may become the next pre-roll)
+                toProcess = min(toProcess, self.stopSequence_ - self.frameQueue_.getReleasedCount())
+
+            latency = self.telemetry_.latency_
+            if len(self.metadataBatch_) < maxFrames:
+                self.metadataBatch_ = numpy.zeros(maxFrames, dtype = FRAME_METADATA_DTYPE)
+            batchStart = 0 # first frame of the batch written to the current segment
+            while processed < toProcess:
+                dequeueStart = time.perf_counter()
+                frames = self.frameQueue_.peekBatch(toProcess - processed)
+                if len(frames) == 0: #!< if the buffer is empty - exit, since there is nothing to do
+                    break
+                decided = len(frames) # frames released after this batch
+                indices = range(decided) # indices of the frames to be written
+                if self.motionGate_ != None:
+                    decisions = self.motionGate_.decide(self.frameQueue_, decided, self.stopSequence_ if stopping else None)
+                    if len(decisions) == 0: # waiting for the frames of the pre-padding
+                        break
+                    decided = len(decisions)
+                    indices = [i for i in range(decided) if decisions[i]]
+                    frames = [frames[i] for i in indices]
+                for i in range(decided):
+                    latency[Stage.QUEUE_WAIT].record(dequeueStart - self.frameQueue_.peekPushTime(i))
+                if (self.captureConverter_ != None) and self.captureConverter_.isNeeded():
+                    # converted in parallel by the conversion workers, the results are in frame order
+                    convertStart = time.perf_counter()
+                    frames = self.captureConverter_.convertBatch(frames)
+                    latency[Stage.CONVERT].record(time.perf_counter() - convertStart)
+                for i, frameBuf in zip(indices, frames):
+                    dequeueStart = time.perf_counter()
+                    metadata = self.frameQueue_.peekMetadata(i)
+                    if self.isSegmentComplete(metadata['hostTimestamp']):
+                        self.writeMetadata(self.metadataBatch_[batchStart:written])
+                        batchStart = written
+                        self.switchSegment()
+                    if self.aviType_ == self.AviType.RAW:
+                        appendStart = time.perf_counter()
+                        latency[Stage.DEQUEUE].record(appendStart - dequeueStart)
+                        self.aviRecorder_.append(frameBuf) # copied as is
+                    else:
+                        image = PySpin.Image.Create(self.streamProperties_.width, self.streamProperties_.height, 0, 0, 
+                                                    self.PySpin_CapturePixelFormat, frameBuf)
+                        appendStart = time.perf_counter()
+                        latency[Stage.DEQUEUE].record(appendStart - dequeueStart)
+                        self.aviRecorder_.Append(image);
+                    self.metadataBatch_[written] = metadata
+                    self.segment_.countFrame(len(frameBuf), metadata['hostTimestamp'])
+                    latency[Stage.APPEND].record(time.perf_counter() - appendStart)
+                    written += 1
+                self.frameQueue_.release(decided)
+                processed += decided
+            # metadata of the whole batch is written at once, after the frames
+            self.writeMetadata(self.metadataBatch_[batchStart:written])
+            self.telemetry_.written_ += written
+            self.telemetry_.queued_ = len(self.frameQueue_)
+
+            if stopping and (self.frameQueue_.getReleasedCount() >= self.stopSequence_):  #!< if all frames of the recording are written
+                with self.recordingLock_:
+                    self.captureOn_ = False
+                    self.finishRecording() #!< close the file and
+                    if self.recordingDrops_ != None:
+                        drops = self.recordingDrops_.lost_
+                        print('Recording of the camera %s: %d frames received, %d lost (transport: %d, incomplete: %d, overflow: %d)' 
+                              % (self.getName(), self.recordingDrops_.received_, self.recordingDrops_.getLostCount(), 
+                                 drops[LossType.TRANSPORT], drops[LossType.INCOMPLETE], drops[LossType.OVERFLOW]))
+                    self.stopCaptureFlag_ = False;     #!< clear the flag
+                    self.recordingLock_.notify_all() # a waiting startCapture may continue
     
         except PySpin.SpinnakerException as ex:
-            print('Frame Processing Error: %s' % ex)
-            return -1, None
-        return result     
+            self.telemetryEvent('processingError', 'Frame Processing Error: %s' % ex)
+            return -1
+        return processed     
+
+    ## writes metadata records to the metadata file of the current segment
+    def writeMetadata(self, records):
+        if (len(records) > 0) and (self.metadataWriter_ != None):
+            self.metadataWriter_.write(records)
+
+    ## whether the current segment is full and the frame received at hostTime starts a new one
+    def isSegmentComplete(self, hostTime):
+        segment = self.segment_
+        if (self.nextSegment_ == None) or (segment.frameCnt_ == 0):
+            return False
+        if (self.captureProperties.segmentMinutes > 0) and (hostTime - segment.startTime_ >= self.captureProperties.segmentMinutes*60):
+            return True
+        return (self.captureProperties.segmentGB > 0) and (segment.dataSize_ >= self.captureProperties.segmentGB*1024**3)
+
+    ## continues the recording in the segment opened in advance; the full segment
+    #  is finalised and the one after the next is opened by the helper thread
+    def switchSegment(self):
+        nextSegment = self.nextSegment_.result() # normally opened long ago
+        if nextSegment == None:
+            self.nextSegment_ = None # opening failed: continue the current segment
+            self.telemetryEvent('segmentError', 'Unable to open the next segment, the recording continues in %s' % self.segment_.videoFilename_)
+            return
+        nextSegment.firstFrame_ = self.segment_.firstFrame_ + self.segment_.frameCnt_
+        self.segmentExecutor_.submit(self.closeSegment, self.segment_, self.segmentManifest_)
+        self.segment_ = nextSegment
+        self.aviRecorder_ = nextSegment.recorder_
+        self.metadataWriter_ = nextSegment.metadataWriter_
+        self.nextSegment_ = self.segmentExecutor_.submit(self.openSegment, nextSegment.index_ + 1)
+        self.telemetryEvent('segment', 'Recording continues in %s' % nextSegment.videoFilename_, Verbosity.SUMMARY)
+
+    ## closes the last segment (on the helper thread) after the last frame was written
+    def finishRecording(self):
+        if self.motionGate_ != None:
+            self.motionGate_.finish()
+            print('Motion gate of the camera %s: %d frames written, %d skipped' 
+                  % (self.getName(), self.motionGate_.writtenCnt_, self.motionGate_.skippedCnt_))
+            self.motionGate_ = None
+        self.segmentExecutor_.submit(self.closeSegment, self.segment_, self.segmentManifest_)
+        if self.nextSegment_ != None:
+            self.segmentExecutor_.submit(self.discardSegment, self.nextSegment_)
+        self.segmentExecutor_.shutdown(wait = False) # the submitted tasks are still completed
+        self.segmentExecutor_ = None
+        self.nextSegment_ = None
+        self.segment_ = None
+        self.aviRecorder_ = None
+        self.metadataWriter_ = None
 
 #  int j = frameQueue_.size();
 #  for (;j > 0; --j) {
@@ -396,35 +878,151 @@ class SpinnakerCamera:
             self.camera_.EndAcquisition();          
         except PySpin.SpinnakerException as ex:
             print('Error: %s for the camera %s' % ex, self.camera_ )
+        self.nodeCache_.refreshAccess()
+        if not self.closeSpool():
+            # the processing thread removes the spool after the last frame of the recording
+            print('Warning: %d spooled frames of the camera %s are not written yet' 
+                  % (len(self.frameQueue_.getSpool()), self.getName()))
+
+    ## detaches the spool and removes its file, unless frames of a stopped recording are still 
+    #  waiting in it; called when the acquisition stops and by the processing thread when it ends
+    #  output: True if no spool is left
+    def closeSpool(self):
+        if self.frameQueue_ == None:
+            return True
+        with self.recordingLock_:
+            if self.frameQueue_.isSpooling() and self.stopCaptureFlag_:
+                return False
+            self.frameQueue_.setSpool(None) # removes the spool file
+        return True
+
+
+    ## opens a video file and a metadata file of a recording; called from the helper thread
+    #  for all segments but the first one
+    #  input: int index - number of the segment
+    #  output: RecordingSegment or None on error
+    def openSegment(self, index):
+        baseName = self.recordingBaseName_
+        if self.captureProperties.segmentMinutes > 0 or self.captureProperties.segmentGB > 0:
+            baseName = '%s.s%04d' % (baseName, index)
+        try:
+            if self.aviType_ == self.AviType.RAW:
+                videoFilename = baseName + RAW_FILE_EXTENSION
+                rawHeader = dict(self.recordingHeader_)
+                rawHeader['imageFormat'] = self.captureImageFormat_
+                recorder = RawRecorder(videoFilename, rawHeader, self.getCaptureFrameSize())
+            else:
+                videoFilename = baseName + '.avi' #! note that AVIRecorder takes care of the file extension
+                if self.aviType_ == self.AviType.UNCOMPRESSED:
+                    option = PySpin.AVIOption()
+                elif self.aviType_ == self.AviType.MJPG:
+                    option = PySpin.MJPGOption()
+                    option.quality = self.captureProperties.MJPGQuality
+                elif self.aviType_ == self.AviType.H264:
+                    option = PySpin.H264Option()
+                    option.bitrate = self.captureProperties.H264BitRate
+                    option.height = self.streamProperties_.height
+                    option.width = self.streamProperties_.width
+                else:
+                    print('Error: Unknown AviType. Aborting...')
+                    return None
+                option.frameRate = self.recordingHeader_['fps']
+                recorder = PySpin.SpinVideo()
+                recorder.Open(baseName, option)
+        except (PySpin.SpinnakerException, OSError) as ex:
+            print('Error: unable to create the video file %s: %s' % (baseName, ex))
+            return None
+        print("Video is saving at %s\n" % videoFilename)
+
+        # per-frame metadata (ids, timestamps, exposure, gain, line status)
+        metadataHeader = dict(self.recordingHeader_)
+        metadataHeader['video'] = videoFilename
+        metadataHeader['segment'] = index
+        try:
+            metadataWriter = FrameMetadataWriter(baseName + METADATA_FILE_EXTENSION, metadataHeader)
+        except OSError as ex:
+            print('Unable to create frame metadata file: %s' % ex)
+            metadataWriter = None
+        return RecordingSegment(index, videoFilename, recorder, metadataWriter)
 
+    ## finalises a segment and adds it to the manifest; called from the helper thread
+    #  input: RecordingSegment segment, SegmentManifest manifest - of the recording the segment belongs to
+    #  (taken when the task is submitted, a new recording may have replaced segmentManifest_ meanwhile)
+    def closeSegment(self, segment, manifest):
+        try:
+            if self.aviType_ == self.AviType.RAW:
+                segment.recorder_.close()
+            else:
+                segment.recorder_.Close()
+        except (PySpin.SpinnakerException, OSError) as ex:
+            print('Error: unable to close %s: %s' % (segment.videoFilename_, ex))
+        if segment.metadataWriter_ != None:
+            segment.metadataWriter_.close()
+        manifest.add(segment)
+        print('Video saved: %s (%d frames)\n' % (segment.videoFilename_, segment.frameCnt_))
+
+    ## closes and removes a segment opened in advance but not needed; called from the helper thread
+    #  input: future of openSegment
+    def discardSegment(self, futureSegment):
+        segment = futureSegment.result()
+        if segment == None:
+            return
+        try:
+            if self.aviType_ == self.AviType.RAW:
+                segment.recorder_.close()
+            else:
+                segment.recorder_.Close()
+        except (PySpin.SpinnakerException, OSError) as ex:
+            print('Error: unable to close %s: %s' % (segment.videoFilename_, ex))
+        filenames = [segment.videoFilename_]
+        if segment.metadataWriter_ != None:
+            segment.metadataWriter_.close()
+            filenames.append(segment.metadataWriter_.filename_)
+        # SpinVideo may add a postfix to the file name
+        filenames += glob.glob(glob.escape(segment.videoFilename_[:-len('.avi')]) + '-*.avi')
+        for filename in filenames:
+            if os.path.exists(filename):
+                os.remove(filename)
 
     #! TODO: the generated name is not unique but has a constant postfix 0000: correct this!
+    ## starts a new recording; if the previous one is still being written, it waits until 
+    #  its last frame is written and its files are closed
+    #  output: 0 on success, -1 on error
     def startCapture(self):
+        with self.recordingLock_:
+            if self.captureOn_ and not self.stopCaptureFlag_:
+                print('The camera %s is already recording' % self.getName())
+                return -1
+            if self.stopCaptureFlag_:
+                print('Waiting for the previous recording of the camera %s to be written...' % self.getName())
+                if not self.recordingLock_.wait_for(lambda: not self.stopCaptureFlag_, RECORDING_FINISH_TIMEOUT):
+                    print('Error: the previous recording of the camera %s is still being written, no new recording started' % self.getName())
+                    return -1
+            return self.openRecording()
+
+    ## opens the files of a new recording and starts capturing; called by startCapture 
+    #  when no recording is active
+    def openRecording(self):
         result = 0;
-        self.stopCaptureFlag_ = False
         print('*** CREATING VIDEO ***\n')
 
         try:      
             # Retrieve device serial number for filename
             deviceSerialNumber = ''
-            nodeMapTLDevice = self.camera_.GetTLDeviceNodeMap()
-            nodeSerial = PySpin.CStringPtr(nodeMapTLDevice.GetNode('DeviceSerialNumber'))
-            if PySpin.IsAvailable(nodeSerial) and PySpin.IsReadable(nodeSerial):
-                deviceSerialNumber = nodeSerial.GetValue()
+            nodeSerial = self.nodeCache_.get('DeviceSerialNumber')
+            if nodeSerial.readable_:
+                deviceSerialNumber = nodeSerial.node_.GetValue()
                 print('Device serial number retrieved as %s...' % deviceSerialNumber)
 
             #! Set frame rate equal to the current acquisition frame rate (Hz)
-            nodemap = self.camera_.GetNodeMap()       
-            nodeFramerate = PySpin.CFloatPtr(nodemap.GetNode('AcquisitionFrameRate'))
-            if (not PySpin.IsAvailable(nodeFramerate)) or (not PySpin.IsReadable(nodeFramerate)):
+            nodeFramerate = self.nodeCache_.get('AcquisitionFrameRate')
+            if not nodeFramerate.canRead():
                 print('Unable to retrieve frame rate. Aborting...')
                 return -1
-            frameRateToSet = nodeFramerate.GetValue();
+            frameRateToSet = nodeFramerate.node_.GetValue();
             print('Frame rate to be set to %d...' % frameRateToSet)
        
             #! Create a unique filename and configure file parameters
-            self.aviRecorder_ = PySpin.SpinVideo()
-            
             aviFilename = '%s%sSN%s.%s.%s' % (self.captureProperties.outputPath, self.captureProperties.cameraPrefix , deviceSerialNumber, datetime.datetime.now().strftime("%Y%m%dT%H%M%S"), self.captureProperties.cameraSuffix)
             
             # use the configured options
@@ -434,48 +1032,41 @@ class SpinnakerCamera:
                 self.aviType_ = self.AviType.MJPG
             elif self.captureProperties.aviType == 'H264':
                 self.aviType_ = self.AviType.H264
+            elif self.captureProperties.aviType == 'RAW':
+                self.aviType_ = self.AviType.RAW
             else:
-                print('Unknown aviType (', self.captureProperties.aviType, ') requested, only UNCOMPRESSED, MJPG and H264 supported')
-        
+                print('Unknown aviType (', self.captureProperties.aviType, ') requested, only UNCOMPRESSED, MJPG, H264 and RAW supported')
 
+            self.recordingBaseName_ = aviFilename
+            self.recordingHeader_ = {'camera': deviceSerialNumber, 'model': self.getModel(),
+                                     'width': self.streamProperties_.width, 'height': self.streamProperties_.height, 
+                                     'fps': frameRateToSet, 'pixelFormat': self.PySpin_CapturePixelFormatString,
+                                     'startTime': datetime.datetime.now().isoformat(), 
+                                     'preRollFrames': min(self.preRollFrames_, len(self.frameQueue_))}
+            self.segment_ = self.openSegment(0)
+            if self.segment_ == None:
+                return -1
+            self.aviRecorder_ = self.segment_.recorder_
+            self.metadataWriter_ = self.segment_.metadataWriter_
 
-            if self.aviType_ == self.AviType.UNCOMPRESSED:
-                #aviFilename = 'SaveToAvi-Uncompressed-%s' % deviceSerialNumber
-                option = PySpin.AVIOption()
-                    
-            elif self.aviType_ == self.AviType.MJPG:
-                #aviFilename = 'SaveToAvi-MJPG-%s' % (deviceSerialNumber,)   
-                option = PySpin.MJPGOption()
-                #option.quality = 75
-                option.quality = self.captureProperties.MJPGQuality
-    
-            elif self.aviType_ == self.AviType.H264:
-                #aviFilename = 'SaveToAvi-H264-%s' % deviceSerialNumber    
-                option = PySpin.H264Option()
-                #option.bitrate = 1000000
-                option.bitrate = self.captureProperties.H264BitRate
-                option.height = self.camera_.Height.GetValue()
-                option.width = self.camera_.Width.GetValue()
-    
+            # segments are opened in advance and finalised by a helper thread, so the
+            # processing thread never waits for the files to be opened or closed
+            self.segmentManifest_ = SegmentManifest(aviFilename + SEGMENT_MANIFEST_EXTENSION, self.recordingHeader_)
+            self.segmentExecutor_ = concurrent.futures.ThreadPoolExecutor(max_workers = 1)
+            if self.captureProperties.segmentMinutes > 0 or self.captureProperties.segmentGB > 0:
+                self.nextSegment_ = self.segmentExecutor_.submit(self.openSegment, 1)
             else:
-                print('Error: Unknown AviType. Aborting...')
-                return -1
-            option.frameRate = frameRateToSet
-            self.aviRecorder_.Open(aviFilename, option)
-            #! note that AVIRecorder takes care of the file extension
-            print("Video is saving at %s.avi\n" % aviFilename)
+                self.nextSegment_ = None
+            self.motionGate_ = self.createMotionGate(aviFilename)
             
-            sNodeMap = self.camera_.GetTLStreamNodeMap() 
-            streamNode = PySpin.CIntegerPtr(sNodeMap.GetNode('StreamTotalBufferCount'))
-            if not PySpin.IsAvailable(streamNode) or not PySpin.IsReadable(streamNode):
-                print('Unable to get Stream Total Buffer Count (node retrieval). Aborting...\n')
-                return False
-            #Spinnaker::GenApi::INodeMap& sNodeMap = camera_->GetTLStreamNodeMap();
-            #Spinnaker::GenApi::CIntegerPtr streamNode = sNodeMap.GetNode("StreamTotalBufferCount");
-            self.receivedFramesCnt_ = streamNode.GetValue();
+            self.receivedFramesCnt_ = 0
+            self.recordingDrops_ = None
+            self.dropDetector_.startRecording()
+            self.frameQueue_.resetOverrunCount()
             
+            # the frames of the pre-roll, still in the frame buffer, are written first
+            self.startSequence_ = self.frameQueue_.getPushedCount()
             self.captureOn_ = True
-            self.processFrame()
         except PySpin.SpinnakerException as ex:
             print('Error: %s' % ex)
             return -1
@@ -485,7 +1076,12 @@ class SpinnakerCamera:
     ## Stops capturing new frames.
     # AVI file will be closed only after buffer is purged!
     def stopCapture(self):
-        self.stopCaptureFlag_ = True
+        with self.recordingLock_:
+            if self.captureOn_ and not self.stopCaptureFlag_:
+                self.recordingDrops_ = self.dropDetector_.stopRecording()
+                self.stopSequence_ = self.frameQueue_.getPushedCount()
+                self.stopCaptureFlag_ = True
+                self.frameQueue_.wakeUp() # let the processing thread close the file
              
 
     def enableTrigger(self, triggerTypeToSet):
@@ -495,175 +1091,178 @@ class SpinnakerCamera:
         result = self.disableTrigger()
         if result != 0:
             return result
-        if self.camera_.TriggerSource.GetAccessMode() != PySpin.RW:
+        triggerSource = self.nodeCache_.get('TriggerSource')
+        if not triggerSource.canWrite():
             print('Unable to get trigger source (node retrieval). Aborting...')
             return -1
         if triggerTypeToSet == self.TriggerType.SOFTWARE:
-            self.camera_.TriggerSource.SetValue(PySpin.TriggerSource_Software)
+            triggerSource.setEntry('Software')
         elif triggerTypeToSet == self.TriggerType.HARDWARE:
-            self.camera_.TriggerSource.SetValue(PySpin.TriggerSource_Line0)
+            triggerSource.setEntry('Line0')
         return 0
         
 
     def disableTrigger(self):
-        if self.camera_.TriggerMode.GetAccessMode() != PySpin.RW:
+        triggerMode = self.nodeCache_.get('TriggerMode')
+        if not triggerMode.setEntry('Off'):
             print('Unable to disable trigger mode (node retrieval). Aborting...')
             return -1
-        self.camera_.TriggerMode.SetValue(PySpin.TriggerMode_Off)
         print('Trigger mode disabled...')
         return 0
 
 
     def enableFrameRateSetting(self):
-         nodeMap = self.camera_.GetNodeMap();
-         acqFrameRate =  PySpin.CEnumerationPtr(nodeMap.GetNode("AcquisitionFrameRateAuto"));
-         if (not PySpin.IsAvailable(acqFrameRate)) or (not PySpin.IsWritable(acqFrameRate)): 
+         acqFrameRate = self.nodeCache_.get('AcquisitionFrameRateAuto')
+         if not acqFrameRate.canWrite(): 
              print('Unable to retrieve AcquisitionFrameRateAuto. Aborting...')
              return -1
-         acqFrameRateAutoOff = PySpin.CEnumEntryPtr(acqFrameRate.GetEntryByName('Off'))
-         if not PySpin.IsAvailable(acqFrameRateAutoOff) or not PySpin.IsReadable(acqFrameRateAutoOff):
+         # setting up a value for the FrameRate auto ( 0 = Off, 1 = Once, 2= Continous )
+         if not acqFrameRate.setEntry('Off'): # setting to Off
              print('Unable to set Buffer Handling mode (Value retrieval). Aborting...\n')
              return -1
-         # setting up a value for the FrameRate auto ( 0 = Off, 1 = Once, 2= Continous )
-         acqFrameRate.SetIntValue(acqFrameRateAutoOff.GetValue()) # setting to Off
 
-         frameRateEnable = PySpin.CBooleanPtr(nodeMap.GetNode("AcquisitionFrameRateEnabled"));
-         if (not PySpin.IsAvailable(acqFrameRate)) or (not PySpin.IsWritable(acqFrameRate)): 
+         frameRateEnable = self.nodeCache_.get('AcquisitionFrameRateEnabled')
+         if not frameRateEnable.canWrite(): 
              print('Unable to retrieve AcqFrameRateEnable. Aborting...')
              return -1
-         frameRateEnable.SetValue(True)
+         frameRateEnable.node_.SetValue(True)
+         self.nodeCache_.get('AcquisitionFrameRate').refresh() # writable now
          return 0;
     
     
+    ## the setters and getters of the live settings are called by the acquisition thread,
+    #  so their messages are passed to the telemetry channel instead of being printed
     def setFrameRate(self, frameRate):
-        nodemap = self.camera_.GetNodeMap()
-        nodeAcquisitionFramerate = PySpin.CFloatPtr(nodemap.GetNode("AcquisitionFrameRate"))
-        if not PySpin.IsAvailable(nodeAcquisitionFramerate) and not PySpin.IsReadable(nodeAcquisitionFramerate):
-            print('Unable to retrieve frame rate. Aborting...')
+        nodeAcquisitionFramerate = self.nodeCache_.get('AcquisitionFrameRate')
+        if not nodeAcquisitionFramerate.canWrite():
+            self.telemetryEvent('fpsError', 'Unable to retrieve frame rate. Aborting...')
             return -1
-        nodeAcquisitionFramerate.SetValue(frameRate)
-        print('Frame rate set to %d...' % frameRate)      
+        nodeAcquisitionFramerate.node_.SetValue(frameRate)
+        frameRate = nodeAcquisitionFramerate.node_.GetValue()
+        # keep the stream description (used for buffer sizing and loss detection) up to date
+        if self.streamProperties_ != None:
+            self.streamProperties_.fps = frameRate
+        if self.dropDetector_ != None:
+            self.dropDetector_.setFrameRate(frameRate)
         return 0
         
     def getFrameRate(self):
-        nodemap = self.camera_.GetNodeMap()
-        nodeAcquisitionFramerate = PySpin.CFloatPtr(nodemap.GetNode("AcquisitionFrameRate"))
-        if not PySpin.IsAvailable(nodeAcquisitionFramerate) and not PySpin.IsReadable(nodeAcquisitionFramerate):
-            print('Unable to retrieve frame rate. Aborting...')
+        nodeAcquisitionFramerate = self.nodeCache_.get('AcquisitionFrameRate')
+        if not nodeAcquisitionFramerate.canRead():
+            self.telemetryEvent('fpsError', 'Unable to retrieve frame rate. Aborting...')
             return -1
-        frameRate = nodeAcquisitionFramerate.GetValue()
+        frameRate = nodeAcquisitionFramerate.node_.GetValue()
         return frameRate
 
 
     def enableExposureAuto(self):
-        if self.camera_.ExposureAuto.GetAccessMode() != PySpin.RW:
+        if not self.nodeCache_.get('ExposureAuto').setEntry('Continuous'):
             print('Unable to enable automatic exposure. Aborting...')
             return -1
-        self.camera_.ExposureAuto.SetValue(PySpin.ExposureAuto_On)
+        self.nodeCache_.get('ExposureTime').refresh() # read-only now
         print('Automatic exposure enabled...')
         return 0
     
     
     def disableExposureAuto(self):
-        if self.camera_.ExposureAuto.GetAccessMode() != PySpin.RW:
-            print('Unable to disable automatic exposure. Aborting...')
+        if not self.nodeCache_.get('ExposureAuto').setEntry('Off'):
+            self.telemetryEvent('exposureError', 'Unable to disable automatic exposure. Aborting...')
             return -1
-        self.camera_.ExposureAuto.SetValue(PySpin.ExposureAuto_Off)
-        print('Automatic exposure disabled...')
+        self.nodeCache_.get('ExposureTime').refresh() # writable now
+        self.telemetryEvent('exposureAuto', 'Automatic exposure disabled...', Verbosity.DEBUG)
         return 0
     
     # exposure time in microseconds
     def setExposureTime(self, exposureTime):
         self.disableExposureAuto();        
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to set exposure time. Aborting...')
+        nodeExposureTime = self.nodeCache_.get('ExposureTime')
+        if not nodeExposureTime.canWrite():
+            self.telemetryEvent('exposureError', 'Unable to set exposure time. Aborting...')
             return -1
         # Ensure desired exposure time does not exceed the maximum
-        exposureTime = min(self.camera_.ExposureTime.GetMax(), exposureTime)
-        self.camera_.ExposureTime.SetValue(exposureTime)
+        exposureTime = min(nodeExposureTime.node_.GetMax(), exposureTime)
+        nodeExposureTime.node_.SetValue(exposureTime)
         return 0
     
         
     def getExposureTime(self):
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to get exposure time. Aborting...')
+        nodeExposureTime = self.nodeCache_.get('ExposureTime')
+        if not nodeExposureTime.canRead():
+            self.telemetryEvent('exposureError', 'Unable to get exposure time. Aborting...')
             return -1
-        # Ensure desired exposure time does not exceed the maximum
-        exposureTime = self.camera_.ExposureTime.GetValue()
+        exposureTime = nodeExposureTime.node_.GetValue()
         return exposureTime
     
 
     def enableGainAuto(self):
-        if self.camera_.ExposureAuto.GetAccessMode() != PySpin.RW:
-            print('Unable to enable automatic exposure. Aborting...')
+        if not self.nodeCache_.get('GainAuto').setEntry('Continuous'):
+            print('Unable to enable automatic gain. Aborting...')
             return -1
-        self.camera_.GainAuto.SetValue(PySpin.GainAuto_On)
+        self.nodeCache_.get('Gain').refresh() # read-only now
         print('Automatic gain enabled...')
         return 0
     
     
     def disableGainAuto(self):
-        if self.camera_.ExposureAuto.GetAccessMode() != PySpin.RW:
-            print('Unable to disable automatic gain. Aborting...')
+        if not self.nodeCache_.get('GainAuto').setEntry('Off'):
+            self.telemetryEvent('gainError', 'Unable to disable automatic gain. Aborting...')
             return -1
-        self.camera_.GainAuto.SetValue(PySpin.GainAuto_Off)
-        print('Automatic gain disabled...')
+        self.nodeCache_.get('Gain').refresh() # writable now
+        self.telemetryEvent('gainAuto', 'Automatic gain disabled...', Verbosity.DEBUG)
         return 0
     
     
     def setGain(self, gain):
         self.disableGainAuto();        
-        if self.camera_.Gain.GetAccessMode() != PySpin.RW:
-            print('Unable to set gain. Aborting...')
+        nodeGain = self.nodeCache_.get('Gain')
+        if not nodeGain.canWrite():
+            self.telemetryEvent('gainError', 'Unable to set gain. Aborting...')
             return -1
-        # Ensure desired exposure time does not exceed the maximum
-        #gain = min(self.camera_.Gain.GetMax(), gain)
-        self.camera_.Gain.SetValue(gain)
+        #gain = min(nodeGain.node_.GetMax(), gain)
+        nodeGain.node_.SetValue(gain)
         return 0
             
     def getGain(self):
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to get gain. Aborting...')
+        nodeGain = self.nodeCache_.get('Gain')
+        if not nodeGain.canRead():
+            self.telemetryEvent('gainError', 'Unable to get gain. Aborting...')
             return -1
-        # Ensure desired exposure time does not exceed the maximum
-        exposureTime = self.camera_.Gain.GetValue()
-        return exposureTime
+        gain = nodeGain.node_.GetValue()
+        return gain
     
    
     
     def setHorizontalFlip(self, value): # bool
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to set horizontal flip. Aborting...')
+        reverseX = self.nodeCache_.get('ReverseX')
+        if not reverseX.canWrite():
+            self.telemetryEvent('xFlipError', 'Unable to set horizontal flip. Aborting...')
             return -1
-        #print ('value: %s' % value)
-        self.camera_.ReverseX.SetValue((value == 'True'), True)
-        #print('self.camera_.ReverseX.SetValue() %s' % value)
+        reverseX.node_.SetValue((value == 'True'), True)
         return 0
     
     def getHorizontalFlip(self):
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to get vertical flip. Aborting...')
+        reverseX = self.nodeCache_.get('ReverseX')
+        if not reverseX.canRead():
+            self.telemetryEvent('xFlipError', 'Unable to get horizontal flip. Aborting...')
             return -1
-        isFlip = self.camera_.ReverseX.GetValue()
-        #print('self.camera_.ReverseX.GetValue() %s' % isFlip)
+        isFlip = reverseX.node_.GetValue()
         return isFlip        
  
     
     def setVerticalFlip(self, value): # bool
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to set vertical flip. Aborting...')
+        reverseY = self.nodeCache_.get('ReverseY')
+        if not reverseY.canWrite():
+            self.telemetryEvent('yFlipError', 'Unable to set vertical flip. Aborting...')
             return -1
-        print('value: %s' % value)
-        self.camera_.ReverseY.SetValue((value == 'True'), True)
-        print('self.camera_.ReverseY.SetValue() %s' % value)
+        reverseY.node_.SetValue((value == 'True'), True)
         return 0
     
     def getVerticalFlip(self):
-        if self.camera_.ExposureTime.GetAccessMode() != PySpin.RW:
-            print('Unable to get vertical flip. Aborting...')
+        reverseY = self.nodeCache_.get('ReverseY')
+        if not reverseY.canRead():
+            self.telemetryEvent('yFlipError', 'Unable to get vertical flip. Aborting...')
             return -1
-        isFlip = self.camera_.ReverseY.GetValue()
-        #print('self.camera_.ReverseY.GetValue() %s' % isFlip)
+        isFlip = reverseY.node_.GetValue()
         return isFlip
 
 
@@ -681,26 +1280,26 @@ class SpinnakerCamera:
         elif PixelFormatString == 'Mono8':
             streamProperties_format = ImageFormat.MONO8
         elif PixelFormatString == 'Mono12Packed':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.MONO12P
         elif PixelFormatString == 'Mono12p':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.MONO12P
         elif PixelFormatString == 'Mono16':
             streamProperties_format = ImageFormat.Mono16
         elif PixelFormatString == 'BayerGR8':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.BAYER8
         elif PixelFormatString == 'BayerGR12p':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.BAYER12P
         elif PixelFormatString == 'BayerGR12Packed':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.BAYER12P
         elif PixelFormatString == 'BayerGR16':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.BAYER16
         elif PixelFormatString == 'YCbCr411_8_CbYYCrYY':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.YCbCr411
         elif PixelFormatString == 'YCbCr422_8_CbYCrY':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.YCbCr422
             #PySpinPixelTypeEnumValue = PySpin.PixelFormat_YCbCr422_8_CbYCrY
         elif PixelFormatString == 'YCbCr8_CbYCr':
-            streamProperties_format = ImageFormat.RGB24
+            streamProperties_format = ImageFormat.YCbCr
         else:
            print('The following pixelformat is not yet handled: %s' % PixelFormatString)   
 
@@ -714,64 +1313,26 @@ class SpinnakerCamera:
         cameraName = self.getName()
 #        cameraSerialNum = self.getSerial()
 #        print('cameraSerialNum: %s' % cameraSerialNum)
-        
-        # This should be folded back into acquisition_ini to avaoid configuring the ini file name in two positions....
-        self.iniFile_ = AcquisitionINI()
-        ini_file_name = "acquisition.ini"
-#        cameraProperties = self.iniFile_.getCameraProperties(cameraName)
-#        displayProperties = self.iniFile_.getDisplayProperties(cameraName)
-#        captureProperties = self.iniFile_.getCaptureProperties(cameraName)
-#        triggerProperties = self.iniFile_.getTriggerProperties(cameraName)
-
 
         cameraModel = self.getModel()
         # re-create the key
-        sectionFullName = cameraModel + ", ID " + cameraName# + ", Camera"
+        sectionFullName = cameraModel + ", ID " + cameraName
         print('acquisition.ini sectionFullName: %s' % sectionFullName)
         
-        # the ini file was already checked, so we simply assume a clean ini file
-        self.config_ = configparser.RawConfigParser()
-        self.config_.optionxform = lambda option: option # switch to case-preserving mode 
-        self.config_.read(ini_file_name)
-        if self.config_.has_section(sectionFullName + ", Camera"):
-            labels, entries = zip(*self.config_.items(sectionFullName + ", Camera"))
-            cameraProperties = CameraProperties(*entries)
-        else:
-            print('Could not read sectionFullName: %s' % sectionFullName + ", Camera")
-            #self.iniFile_.checkAndRecreateSection(self.iniFile_.defaultSectionTitle_, self.iniFile_.cameraSubsectionTitle_)
-            cameraProperties = self.iniFile_.getCameraProperties(cameraName)
-                
-        
-
-        if self.config_.has_section(sectionFullName + ", Display"):
-            labels, entries = zip(*self.config_.items(sectionFullName + ", Display"))
-            displayProperties = DisplayProperties(*entries)
-        else:
-            print('Could not read sectionFullName: %s' % sectionFullName + ", Display")                
-            displayProperties = self.iniFile_.getDisplayProperties(cameraName)
-
-        if self.config_.has_section(sectionFullName + ", Capture"):
-            labels, entries = zip(*self.config_.items(sectionFullName + ", Capture"))
-            captureProperties = CaptureProperties(*entries)
-        else:
-            print('Could not read sectionFullName: %s' % sectionFullName + ", Capture")                
-            captureProperties = self.iniFile_.getCaptureProperties(cameraName)
-
-        if self.config_.has_section(sectionFullName + ", Trigger"):
-            labels, entries = zip(*self.config_.items(sectionFullName + ", Trigger"))
-            triggerProperties = TriggerProperties(*entries)
-        else:
-            print('Could not read sectionFullName: %s' % sectionFullName + ", Trigger")                
-            triggerProperties = self.iniFile_.getTriggerProperties(cameraName)
-
+        # the ini file is parsed once for all cameras (and is thread-safe), 
+        # missing sections are recreated from the default section
+        iniFile = getAcquisitionINI()
+        cameraProperties = iniFile.getCameraProperties(sectionFullName)
+        displayProperties = iniFile.getDisplayProperties(sectionFullName)
+        captureProperties = iniFile.getCaptureProperties(sectionFullName)
+        triggerProperties = iniFile.getTriggerProperties(sectionFullName)
 
         #print('self.cameraProperties.pixelFormat: %s' % cameraProperties.pixelFormat)
-        del self.config_
         
-        #save the ini file to where the video files are written
+        #save the ini file to where the video files are written (once for all cameras writing there)
         host_name = socket.getfqdn()
-        output_aquisition_ini_fqn = '%s%s.%s' % (captureProperties.outputPath, ini_file_name, host_name)
-        shutil.copy2(ini_file_name, output_aquisition_ini_fqn)
+        output_aquisition_ini_fqn = '%s%s.%s' % (captureProperties.outputPath, os.path.basename(iniFile.filename_), host_name)
+        iniFile.copyTo(output_aquisition_ini_fqn)
         
         
         return cameraProperties, displayProperties, captureProperties, triggerProperties
\ No newline at end of file
@@ -1,39 +1,42 @@
-import ctypes
-import PySpin
-from VideoSingleton import VideoSingleton
+# PySpin and the camera pipeline (VideoSingleton) are imported when they are needed,
+# so the control window (or the console) starts before the heavy modules are loaded
+import time
+import concurrent.futures
 from data_structures import CameraProperties
-
-# class for checking available memory
-class MEMORYSTATUSEX(ctypes.Structure):
-    _fields_ = [
-        ("dwLength", ctypes.c_ulong),
-        ("dwMemoryLoad", ctypes.c_ulong),
-        ("ullTotalPhys", ctypes.c_ulonglong),
-        ("ullAvailPhys", ctypes.c_ulonglong),
-        ("ullTotalPageFile", ctypes.c_ulonglong),
-        ("ullAvailPageFile", ctypes.c_ulonglong),
-        ("ullTotalVirtual", ctypes.c_ulonglong),
-        ("ullAvailVirtual", ctypes.c_ulonglong),
-        ("sullAvailExtendedVirtual", ctypes.c_ulonglong)
-    ]
-
-    def __init__(self):
-        # have to initialize this to the size of MEMORYSTATUSEX
-        self.dwLength = ctypes.sizeof(self)
-        super(MEMORYSTATUSEX, self).__init__()
-        
+import telemetry
+from telemetry import TelemetryReporter, Verbosity
+import memory_planner
+from memory_planner import MemoryPlanner
 
 class SpinnakerControl:       
-    def __init__(self): 
+    ## input: int verbosity - level of the console output (telemetry.Verbosity),
+    #         string latencyReportFile - json file for latency statistics written when acquisition stops,
+    #         memoryBudget - upper limit (in bytes) for the frame buffers of all cameras (None - no limit),
+    #         bool headless - no video windows (wx and PIL are not imported),
+    #         bool mosaic - the frames of all cameras are shown as tiles of one window
+    def __init__(self, verbosity = Verbosity.SUMMARY, latencyReportFile = None, memoryBudget = None, headless = False, mosaic = False): 
         self.acquisitionOn_ = False  # whether acquisition is on
         self.recordingOn_ = False  # whether recording is on
+        self.verbosity_ = verbosity
+        self.telemetryReporter_ = None # thread printing statistics of all cameras
+        self.latencyReportFile_ = latencyReportFile
+        self.memoryPlanner_ = MemoryPlanner(memoryBudget) # splits memory for frame buffers across cameras
+        self.bufferPlans_ = [] # BufferPlan of every camera of the last acquisition
+        self.headless_ = headless
+        self.mosaic_ = mosaic
+        self.mosaicDisplay_ = None # wxWindow.MosaicDisplay of all cameras (mosaic only)
 
         self.videoSources_ = [] # list of objects controlling cameras and stream from them
         self.names_ = []   # list of cameras' names
         self.camList_ = None # list of cameras references, data from it are used by videoSources_
         
+        importStart = time.perf_counter()
+        import PySpin
+        systemStart = time.perf_counter()
+        telemetry.startupTimer.record('PySpin import', systemStart - importStart)
         # Retrieve reference to system object essential for Spinnaker Api
         self.system_ = PySpin.System.GetInstance()
+        telemetry.startupTimer.record('Spinnaker system instance', time.perf_counter() - systemStart)
 
         # Get current library version
         version = self.system_.GetLibraryVersion()
@@ -50,32 +53,78 @@ class SpinnakerControl:
     ## auxilary function returning available memory used in startAcquisition
     # ouput long long int
     def getAvailableSystemMemory(self):
-        status = MEMORYSTATUSEX()
-        ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)) 
-        
-        # return status.ullAvailVirtual;
-        return status.ullAvailPhys;
+        return memory_planner.getAvailableSystemMemory()
+
+    ## input: memoryBudget - upper limit (in bytes) for the frame buffers of all cameras (None - no limit)
+    def setMemoryBudget(self, memoryBudget):
+        self.memoryPlanner_.setMemoryBudget(memoryBudget)
 
+    ## output: list of BufferPlan (name, frameSize, frames, bytes, seconds) of every camera
+    def getBufferPlans(self):
+        return list(self.bufferPlans_)
 
-    ## initializes list of cameras; creates objects VideoSingleton for each of them;
-    #  gets their names and stores them in a list
+
+    ## creates the VideoSingleton of a camera and sets up its stream; runs on a worker thread
+    #  input: int index, camera pointer
+    #  output: VideoSingleton, result of open(), full name of the camera
+    def initCamera(self, index, camera):
+        from VideoSingleton import VideoSingleton
+        initStart = time.perf_counter()
+        source = VideoSingleton(index, camera, self.headless_, createDisplay = False)
+        streamStart = time.perf_counter()
+        res, cameraName = source.open()
+        name = source.spinnakerCamera_.getName()
+        telemetry.startupTimer.record('camera %s: init' % name, streamStart - initStart)
+        telemetry.startupTimer.record('camera %s: stream setup' % name, time.perf_counter() - streamStart)
+        return source, res, cameraName
+
+    ## initializes list of cameras; creates objects VideoSingleton for all of them 
+    #  concurrently; gets their names and stores them in a list (in the order of the cameras)
     #  output: error code (if < 0) or number of camera (if > 0)
     def initCameras(self):    
+        import PySpin
         result = 0
             
         # Retrieve list of cameras from the system
         try:
             if len(self.videoSources_) > 0:
                 self.close();
+            listStart = time.perf_counter()
             self.camList_ = self.system_.GetCameras()
             numCameras = self.camList_.GetSize()
+            cameras = [self.camList_.GetByIndex(i) for i in range(numCameras)]
+            telemetry.startupTimer.record('camera list', time.perf_counter() - listStart)
             print('Number of cameras detected:', numCameras)     
-                    
-            for i in range (0, numCameras):
-                self.videoSources_.append(VideoSingleton(i, self.camList_.GetByIndex(i)))
-                res, cameraName = self.videoSources_[i].open()
+
+            importStart = time.perf_counter()
+            import VideoSingleton # the camera pipeline modules, once for all worker threads
+            telemetry.startupTimer.record('pipeline modules import', time.perf_counter() - importStart)
+
+            # every camera is initialised on its own thread (Init, device information, stream setup)
+            initStart = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(max_workers = max(1, numCameras)) as executor:
+                futures = [executor.submit(self.initCamera, i, camera) for i, camera in enumerate(cameras)]
+            for i, future in enumerate(futures):
+                try:
+                    source, res, cameraName = future.result()
+                except PySpin.SpinnakerException as ex:
+                    print('Error: %s for the camera %d' % (ex, i))
+                    result = -1
+                    continue
+                self.videoSources_.append(source)
                 self.names_.append(cameraName)
                 result += res
+            telemetry.startupTimer.record('cameras initialised (%d in parallel)' % numCameras, time.perf_counter() - initStart)
+
+            # windows belong to the GUI thread, so they are created here
+            displayStart = time.perf_counter()
+            if self.mosaic_ and not self.headless_ and (len(self.videoSources_) > 0):
+                from wxWindow import MosaicDisplay
+                self.mosaicDisplay_ = MosaicDisplay(len(self.videoSources_))
+            for source in self.videoSources_:
+                source.createDisplay(self.mosaicDisplay_)
+            if not self.headless_:
+                telemetry.startupTimer.record('video windows', time.perf_counter() - displayStart)
             if result == 0:
                 result = numCameras
         except PySpin.SpinnakerException as ex:
@@ -85,6 +134,38 @@ class SpinnakerControl:
   
        
 
+    ## applies the settings of every camera from the ini file
+    #  input: AcquisitionINI iniFile (loaded)
+    def loadSettings(self, iniFile):
+        for i, cameraName in enumerate(self.names_):
+            self.applySettings(i, iniFile)
+        iniFile.save() # sections recreated for new cameras, written at once
+
+    ## applies the settings of the cameras whose sections of the ini file were changed since it was read
+    #  (frame rate, exposure, gain, flips and windows; pixel formats and capture settings need a restart)
+    #  input: AcquisitionINI iniFile (loaded)
+    #  output: list of names of the reconfigured cameras
+    def reloadSettings(self, iniFile):
+        changedDevices = iniFile.checkForChanges()
+        reconfigured = []
+        for i, cameraName in enumerate(self.names_):
+            if cameraName in changedDevices:
+                self.applySettings(i, iniFile)
+                reconfigured.append(cameraName)
+        if len(reconfigured) > 0:
+            iniFile.save()
+            print('Settings reloaded for: %s' % ', '.join(reconfigured))
+        return reconfigured
+
+    def applySettings(self, index, iniFile):
+        cameraName = self.names_[index]
+        cameraProperties = iniFile.getCameraProperties(cameraName)
+        displayProperties = iniFile.getDisplayProperties(cameraName)
+        captureProperties = iniFile.getCaptureProperties(cameraName)
+        triggerProperties = iniFile.getTriggerProperties(cameraName)
+        return self.setParameters(index, cameraProperties, displayProperties, captureProperties, triggerProperties)
+
+
     ## for every camera computes the capacity of buffer for the streams 
     #  and launches the acquisition
     def startAcquisition(self): 
@@ -92,29 +173,20 @@ class SpinnakerControl:
           if nVideoSource <= 0:
             return -1;
         
-          # compute total available memory
-          totalMemory = self.getAvailableSystemMemory();
-        
-          # compute the share of memory to be assigned for buffers of every stream
-          # for every frame i: weight[i] = frameSize*frameRate[i]^2
-          # (we take square of frame rate to provide more space for streams with higher load)
-          totalWeight = 0.0;
-          frameSize = []
-          weightOfStream = []
-          for i in range(0, nVideoSource):
-              streamProperties = self.videoSources_[i].streamProperties_
-              frameSize.append(streamProperties.getFrameSize());
-              weightOfStream.append(frameSize[i]*(streamProperties.fps**2));
-              totalWeight += weightOfStream[i];
-        
-          # memoryShare[i] = weight[i]/sum_of_weights
-          # buffer capacity = memoryShare[i]*totalMemory/frameSize[i]
-          # since buffer capacity is in frames, not in bytes
-          for i in range(0, nVideoSource):
-              memoryShare = weightOfStream[i]/totalWeight;
-              assignedBufferCapacity = totalMemory*memoryShare/frameSize[i];
-              self.videoSources_[i].startAcquisition(assignedBufferCapacity);
+          # split the memory left after the reserves for the OS and the encoders
+          # across the streams (in frames of the size stored in the buffers)
+          streams = []
+          for name, source in zip(self.names_, self.videoSources_):
+              streams.append((name, source.spinnakerCamera_.getBufferFrameSize(), source.streamProperties_.fps))
+          self.bufferPlans_ = self.memoryPlanner_.plan(streams)
+          MemoryPlanner.printPlan(self.bufferPlans_)
+
+          for source, plan in zip(self.videoSources_, self.bufferPlans_):
+              source.startAcquisition(plan.frames);
         
+          if self.telemetryReporter_ == None:
+              self.telemetryReporter_ = TelemetryReporter(verbosity = self.verbosity_)
+              self.telemetryReporter_.start()
           self.AcquisitionOn_ = True;
           return 0
 
@@ -137,8 +209,29 @@ class SpinnakerControl:
     def stopAcquisition(self): 
         for x in self.videoSources_:
             x.stopAcquisition()
+        if self.telemetryReporter_ != None:
+            self.telemetryReporter_.stop()
+            self.telemetryReporter_ = None
+        if self.latencyReportFile_ != None:
+            self.saveLatencyStatistics(self.latencyReportFile_)
         self.acquisitionOn_ = False
 
+    ## output: dictionary {camera name: statistics of lost frames}, see SpinnakerCamera.getDropStatistics
+    def getDropStatistics(self):
+        return dict((name, source.spinnakerCamera_.getDropStatistics()) for name, source in zip(self.names_, self.videoSources_))
+
+    ## output: dictionary {camera name: {stage: {'count', 'p50', 'p99', 'max'}}}, times in ms
+    def getLatencyStatistics(self):
+        return telemetry.channel.getLatencyStatistics()
+
+    ## writes latency statistics of all cameras to a json file
+    def saveLatencyStatistics(self, filename):
+        try:
+            telemetry.channel.saveLatencyStatistics(filename)
+            print('Latency statistics saved to %s' % filename)
+        except OSError as ex:
+            print('Unable to save latency statistics: %s' % ex)
+
                         
     ## stops recording and acquisition, clears all data structures    
     def close(self): 
@@ -158,4 +251,19 @@ class SpinnakerControl:
         if (index < len(self.videoSources_) and (index >= 0)):
             print(cameraProperties.fps)
             result = self.videoSources_[index].setParameters(cameraProperties, displayProperties, captureProperties, triggerProperties)
-        return result
\ No newline at end of file
+        return result
+
+    ## changes a setting of a camera while it is streaming (see live_settings)
+    #  input: int index, string name - fps, exposure, gain, xFlip or yFlip, value - new value
+    #  output: int sequence number of the change (-1 if there is no such camera)
+    def changeSetting(self, index, name, value):
+        if (index < len(self.videoSources_) and (index >= 0)):
+            return self.videoSources_[index].changeSetting(name, value)
+        return -1
+
+    ## waits until a change of the camera setting is applied
+    #  output: SettingConfirmation or None on timeout
+    def waitForSetting(self, index, sequence, timeout = None):
+        if (index < len(self.videoSources_) and (index >= 0)):
+            return self.videoSources_[index].waitForSetting(sequence, timeout)
+        return None
\ No newline at end of file
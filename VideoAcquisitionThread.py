@@ -4,20 +4,26 @@ Created on Fri Jan  4 09:27:07 2019
 
 Thread acquiring frames from the camera. It puts each frame 
 to a queue for saving to video file and to a buffer for displaying. 
-Each SpinnakerCamera instance should have own instance of VideoAcquisitionThread
+Each SpinnakerCamera instance should have own instance of VideoAcquisitionThread.
+Frames shown in another pixel format are converted and drawn by a conversion 
+worker (frame_conversion), at most one frame of the camera at a time
 
 @author: taskcontroller
 """
 
 import threading
 import time
+import concurrent.futures
 from SpinnakerCamera import SpinnakerCamera
 from data_structures import ImageFormat
-from PIL import Image
-from wxWindow import VideoDisplay
+from telemetry import Stage
+from frame_conversion import getConversionPool
 
 class VideoAcquisitionThread(threading.Thread):   
-    ## input: SpinnakerCamera spinCameraPtr
+    # maximal time (in ms) to wait for the next frame before checking whether the thread should stop 
+    GRAB_TIMEOUT = 100
+
+    ## input: SpinnakerCamera spinCameraPtr, VideoDisplay videoDisplay (None - frames are not displayed)
     def __init__(self, spinCameraPtr, videoDisplay): 
         threading.Thread.__init__(self) 
         
@@ -26,13 +32,16 @@ class VideoAcquisitionThread(threading.Thread):
         
         self.spinnakerCamera_ = spinCameraPtr
         self.videoDisplay_ = videoDisplay
+        self.lastBatch_ = None # AcquisitionBatch of the last acquireFrames call
+        self.displayFuture_ = None # frame being converted and shown by a conversion worker
         #self.lock_ = threading.Lock()
         #frameSize_ = 0
      
     def __del__(self):
         if not self.stop_:
             self.stop()
-        self.videoDisplay_.Close()    
+        if self.videoDisplay_ != None:
+            self.videoDisplay_.Close()    
         #del self.videoDisplay_
         del self.spinnakerCamera_
         print("VideoAcquisitionThread deleted!")    
@@ -49,22 +58,29 @@ class VideoAcquisitionThread(threading.Thread):
         
      
     def run(self): 
-        framePeriod = 1.0/self.streamProperties_.fps
-        frameCntMax = self.streamProperties_.fps/self.displayFrameRate_
-        frameCnt = frameCntMax;
+        # the thread blocks in the camera driver until the next frame arrives,
+        # the timeout only limits the reaction time to stop_ and pause_
+        displayPeriod = 1.0/self.displayFrameRate_
+        nextDisplayTime = time.perf_counter()
         while not self.stop_:
-            #self.lock_.acquire()
-            timeStart = time.perf_counter();
-            if not self.pause_:
-                # process frame if necessary
-                if frameCnt <= 0:
-                    frameCnt = frameCntMax;
-                    # put the frame to queue for recording and to buffer for displaying
-                    result, self.frameBuffer_ = self.spinnakerCamera_.acquireFrames(True)
-                    #self.spinnakerCamera_.processFrame()
-                    if result == 0:
-                        self.videoDisplay_.showByPixelFormat(self.spinnakerCamera_.displayProperties.pixelFormat , self.streamProperties_.width, self.streamProperties_.height, self.frameBuffer_)
-                        
+            if self.pause_:
+                time.sleep(displayPeriod)
+                continue
+            # the frame is displayed if the display period has elapsed, independently 
+            # of the number of frames acquired meanwhile
+            needDisplay = (self.videoDisplay_ != None) and (time.perf_counter() >= nextDisplayTime)
+            # put the frame to queue for recording and (if needed) to buffer for displaying
+            result, self.frameBuffer_, self.lastBatch_ = self.spinnakerCamera_.acquireFrames(needDisplay, self.GRAB_TIMEOUT)
+            if needDisplay and (result == 0) and (self.frameBuffer_ is not None):
+                displayConverter = self.spinnakerCamera_.displayConverter_
+                if (displayConverter != None) and displayConverter.isNeeded():
+                    # a frame still being converted is not overtaken, the new one is skipped
+                    if (self.displayFuture_ == None) or self.displayFuture_.done():
+                        self.displayFuture_ = getConversionPool().submit(self.show, displayConverter.convert, self.frameBuffer_)
+                else:
+                    self.show(None, self.frameBuffer_)
+                # do not try to catch up missed display frames
+                nextDisplayTime = max(nextDisplayTime + displayPeriod, time.perf_counter())
                         
 #                        if self.streamProperties_.format == ImageFormat.RGB24:
 #                            self.videoDisplay_.showRGB(self.streamProperties_.width, self.streamProperties_.height, self.frameBuffer_)
@@ -77,21 +93,26 @@ class VideoAcquisitionThread(threading.Thread):
                         #image.show()
                     #!!Image image = QImage(frameBuffer_, streamProperties_.width, streamProperties_.height, streamProperties_.format);
                     #!!emit frameReady(image);    // emit QImage to the MainWindow object
-                else:
-                    # just put the frame to queue without displaying
-                    self.spinnakerCamera_.acquireFrames(False); 
-                frameCnt -= 1
-            # compute processing time and wait according to the frame rate
-            # we take half of the period to ensure timely responses
-            timeElapsed = time.perf_counter() - timeStart;                
-            sleepTime = framePeriod - timeElapsed;
-            if sleepTime > 0:
-                time.sleep(sleepTime)
-            #self.lock_.release()
 
+
+    ## converts (on a conversion worker) and draws a frame
+    #  input: convert - function converting raw frame data to the display pixel format (None - no conversion)
+    def show(self, convert, frameBuffer):
+        displayStart = time.perf_counter()
+        if convert != None:
+            frameBuffer = convert(frameBuffer)
+        if not self.stop_:
+            self.videoDisplay_.showByPixelFormat(self.spinnakerCamera_.displayProperties.pixelFormat , self.streamProperties_.width, self.streamProperties_.height, frameBuffer)
+        self.spinnakerCamera_.telemetry_.latency_[Stage.DISPLAY].record(time.perf_counter() - displayStart)
      
     def stop(self): 
         self.stop_ = True;
+        # wait until the pending grab returns, so the acquisition can be ended safely
+        if self.is_alive() and (threading.current_thread() is not self):
+            self.join(2.0*self.GRAB_TIMEOUT/1000.0)
+        # the window may be closed after the frame being shown
+        if self.displayFuture_ != None:
+            concurrent.futures.wait([self.displayFuture_], 2.0*self.GRAB_TIMEOUT/1000.0)
         #self.lock_.acquire()
         #del frameBuffer_;
         #self.lock_.release()
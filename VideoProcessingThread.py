@@ -13,6 +13,13 @@ import time
 from SpinnakerCamera import SpinnakerCamera
 
 class VideoProcessingThread(threading.Thread):   
+    # maximal time (in s) to sleep if no frames are signalled
+    WAIT_TIMEOUT = 0.1
+    # default maximal number of frames written in one batch
+    MAX_BATCH_SIZE = 100
+    # maximal time (in s) to wait in stop() for the frames of a stopped recording to be written
+    STOP_TIMEOUT = 60.0
+
     ## input: SpinnakerCamera spinCameraPtr
     def __init__(self, spinCameraPtr): 
         threading.Thread.__init__(self) 
@@ -23,6 +30,7 @@ class VideoProcessingThread(threading.Thread):
         self.spinnakerCamera_ = spinCameraPtr
         self.numberOfFrames_ = 0
         self.streamProperties_ = None                
+        self.maxBatchSize_ = self.MAX_BATCH_SIZE
         #self.lock_ = threading.Lock()
         #frameSize_ = 0
      
@@ -32,9 +40,11 @@ class VideoProcessingThread(threading.Thread):
         del self.spinnakerCamera_    
         print("VideoProcessingThread deleted!")    
  
-    ## input: StreamProperties &streamProperties
-    def launch(self, streamProperties):
+    ## input: StreamProperties &streamProperties, int maxBatchSize - maximal number
+    #  of frames written before the thread checks stop_ and pause_ again
+    def launch(self, streamProperties, maxBatchSize = MAX_BATCH_SIZE):
         self.streamProperties_ = streamProperties
+        self.maxBatchSize_ = max(1, int(maxBatchSize))
         #self.frameSize_ = self.streamProperties_.width*self.streamProperties_.height;
         #if streamProperties_.format == QImage::Format_RGB888:
         #    self.frameSize_*=3;
@@ -44,22 +54,36 @@ class VideoProcessingThread(threading.Thread):
         
      
     def run(self): 
-        framePeriod = 1.0/self.streamProperties_.fps;
+        frameQueue = self.spinnakerCamera_.frameQueue_
         while not self.stop_:
-            #self.lock_.release()
-            timeStart = time.perf_counter();
-            if not self.pause_:
-                self.spinnakerCamera_.processFrame() # copy to buffer;
-            # compute processing time and wait according to the frame rate
-            # we take half of the period to ensure timely responses
-            timeElapsed = time.perf_counter() - timeStart;                
-            sleepTime = framePeriod/2.0 - timeElapsed;
-            if sleepTime > 0:
-                time.sleep(sleepTime)
-            #self.lock_.acquire()
+            # sleep until the acquisition thread signals new frames (beyond the pre-roll or the
+            # pre-padding of the motion gate); the timeout only limits the reaction time to stop_ and pause_
+            frameQueue.waitForFrames(self.WAIT_TIMEOUT, self.spinnakerCamera_.getKeptFrameCount() + 1)
+            if self.pause_:
+                time.sleep(self.WAIT_TIMEOUT)
+                continue
+            # write all queued frames (up to the batch limit) before sleeping again
+            while (self.spinnakerCamera_.processFrames(self.maxBatchSize_) >= self.maxBatchSize_) and not self.stop_:
+                pass
+        # if recording was stopped together with acquisition, write the rest of the frames
+        if self.spinnakerCamera_.stopCaptureFlag_:
+            self.spinnakerCamera_.processFrames(len(frameQueue) + 1)
+        # the spool is not removed by SpinnakerCamera.stop() while its frames are being written
+        self.spinnakerCamera_.closeSpool()
      
+    ## asks the thread to stop and waits until the remaining frames of a stopped recording are written
+    #  output: True if the thread has finished
     def stop(self): 
         self.stop_ = True;
+        if self.spinnakerCamera_.frameQueue_ != None:
+            self.spinnakerCamera_.frameQueue_.wakeUp()
+        if self.is_alive() and (threading.current_thread() is not self):
+            self.join(self.STOP_TIMEOUT)
+            if self.is_alive():
+                print('Warning: frames of the camera %s are still being written after %.0f s' 
+                      % (self.spinnakerCamera_.getName(), self.STOP_TIMEOUT))
+                return False
+        return True
         #self.lock_.acquire()
         #del frameBuffer_;
         #self.lock_.release()
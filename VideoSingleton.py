@@ -17,7 +17,6 @@ from VideoProcessingThread import VideoProcessingThread
 from VideoAcquisitionThread import VideoAcquisitionThread
 from data_structures import CameraProperties
 from SpinnakerCamera import SpinnakerCamera
-from wxWindow import VideoDisplay
 
 
 class VideoSingleton:
@@ -25,23 +24,29 @@ class VideoSingleton:
     INITIAL_WINDOW_HEIGHT = 256;
     DISPLAY_FRAME_RATE = 25;
 
-    #constructor; input: camera index and pointer to the camera
-    def __init__(self, camIndex = 0, camPtr = None): 
+    #constructor; input: camera index and pointer to the camera,
+    # bool headless - no video window is created and frames are never converted for display,
+    # bool createDisplay - whether the window is created now (otherwise by createDisplay(), 
+    # e.g. if the object is constructed on a worker thread)
+    def __init__(self, camIndex = 0, camPtr = None, headless = False, createDisplay = True): 
         # index of the camera in camera list; 
         # currently used only for correct initial location of the output window
         self.cameraIndex_ = camIndex
         
         # object for the control of the camera using Spinnaker API
-        self.spinnakerCamera_ = SpinnakerCamera(camPtr); 
+        self.spinnakerCamera_ = SpinnakerCamera(camPtr, headless); 
         self.acquisitionOn_ = False # whether acquisition is on
         
-        self.videoDisplay_ = VideoDisplay()  # window to display the acquired video frames
+        self.headless_ = headless
+        self.videoDisplay_ = None  # window to display the acquired video frames
         self.streamProperties_ = None # structure containing frame information
 
         # thread that acquires frames and put them into a buffer
         self.acquisitionThread_ = VideoAcquisitionThread(self.spinnakerCamera_, self.videoDisplay_)
         # thread that processes frames and saves them to files.
         self.processingThread_ = VideoProcessingThread(self.spinnakerCamera_)
+        if createDisplay:
+            self.createDisplay()
         #QObject::connect(acquisitionThread_, SIGNAL(frameReady(const QImage &)), &window_, SLOT(setFrame(const QImage &)));
         
     def __del__(self):
@@ -53,6 +58,18 @@ class VideoSingleton:
         #del self.spinnakerCamera_
         print("VideoSingleton deleted!")
 
+    ## creates the video window (nothing in headless mode); must be called from the GUI thread
+    #  input: MosaicDisplay mosaicDisplay - the frames are shown in a tile of it (None - own window)
+    def createDisplay(self, mosaicDisplay = None):
+        if self.headless_ or (self.videoDisplay_ != None):
+            return
+        if mosaicDisplay != None:
+            self.videoDisplay_ = mosaicDisplay.addTile(self.spinnakerCamera_.getName())
+        else:
+            from wxWindow import VideoDisplay # wx is needed only with a window
+            self.videoDisplay_ = VideoDisplay()
+        self.acquisitionThread_.videoDisplay_ = self.videoDisplay_
+
     ## inits the camera, gets its name and model to display at the window caption
     def open(self):  
         res = -1
@@ -76,17 +93,20 @@ class VideoSingleton:
             if res == 0:
                 self.acquisitionOn_ = True;
                 #self.window_.setGeometry(100 + cameraIndex_*INITIAL_WINDOW_WIDTH, 100, INITIAL_WINDOW_WIDTH, INITIAL_WINDOW_HEIGHT);
-                self.videoDisplay_.Center()
-                self.videoDisplay_.Show()
+                if self.videoDisplay_ != None:
+                    self.videoDisplay_.Center()
+                    self.videoDisplay_.Show()
                 self.acquisitionThread_.launch(self.streamProperties_, self.DISPLAY_FRAME_RATE);
                 self.processingThread_.launch(self.streamProperties_);
         return res
     
-    ## stops both threads and close the window
+    ## stops both threads and close the window; the frames of a stopped recording
+    #  still buffered are written before the camera and its buffer are stopped
     def stopAcquisition(self):
         self.acquisitionThread_.stop()
-        self.videoDisplay_.Close();
-        self.processingThread_.stop();
+        if self.videoDisplay_ != None:
+            self.videoDisplay_.Close();
+        self.processingThread_.stop(); # joins the thread
         self.spinnakerCamera_.stop();
         self.acquisitionOn_ = False;
 
@@ -112,17 +132,42 @@ class VideoSingleton:
     def setParameters(self, cameraProperties, displayProperties, captureProperties, triggerProperties):
 #        print('cameraProperties.xFlip: %s' % cameraProperties.xFlip)
 #        print('cameraProperties.yFlip: %s' % cameraProperties.yFlip)
-        self.videoDisplay_.setScaling(displayProperties.stretch)
-        self.videoDisplay_.setImageRotation(displayProperties.rotation)
-        self.videoDisplay_.resize(displayProperties.windowWidth, displayProperties.windowHeight)
+        if self.videoDisplay_ != None:
+            self.videoDisplay_.setScaling(displayProperties.stretch)
+            self.videoDisplay_.setImageRotation(displayProperties.rotation)
+            self.videoDisplay_.resize(displayProperties.windowWidth, displayProperties.windowHeight)
+        if self.acquisitionOn_:
+            # the camera is streaming: the acquisition thread applies the changes between frames
+            for name in ('fps', 'exposure', 'gain', 'xFlip', 'yFlip'):
+                self.changeSetting(name, getattr(cameraProperties, name))
+            return 0
         result = self.spinnakerCamera_.setFrameRate(cameraProperties.fps)
         self.spinnakerCamera_.setExposureTime(cameraProperties.exposure)
         self.spinnakerCamera_.setGain(cameraProperties.gain)            
         self.spinnakerCamera_.setHorizontalFlip(cameraProperties.xFlip)
         self.spinnakerCamera_.setVerticalFlip(cameraProperties.yFlip)
+        if result == 0:
+            print('Frame rate set to %d, exposure time to %d us, gain to %.1f (automatic exposure and gain disabled)...' 
+                  % (self.spinnakerCamera_.getFrameRate(), self.spinnakerCamera_.getExposureTime(), self.spinnakerCamera_.getGain()))
         return result
 
 
+    ## changes a setting without stopping the acquisition (see live_settings)
+    #  input: string name - one of live_settings.LIVE_SETTINGS, value - new value
+    #  output: int sequence number of the change, stored in the metadata of the frames grabbed after it
+    def changeSetting(self, name, value):
+        sequence = self.spinnakerCamera_.submitSetting(name, value)
+        if not self.acquisitionOn_:
+            # no acquisition thread: applied at once
+            self.spinnakerCamera_.applySettingCommands()
+            self.spinnakerCamera_.confirmSettings(None)
+        return sequence
+
+    ## input: int sequence - returned by changeSetting, float timeout - in s (None - no limit)
+    #  output: SettingConfirmation (with the value read back from the camera) or None on timeout
+    def waitForSetting(self, sequence, timeout = None):
+        return self.spinnakerCamera_.settingsQueue_.waitForConfirmation(sequence, timeout)
+
     # output CameraProperties cameraParameters
     def getParameters(self):
         cameraParameters = CameraProperties(fps = self.spinnakerCamera_.getFrameRate(), 
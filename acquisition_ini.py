@@ -2,47 +2,103 @@
 """
 Created on Fri Jan 11 14:22:12 2019
 class for reading/writing cameras configurations and display settings to ini file
+
+The file is parsed once: properties are created (and validated) on first request
+and cached, changed or recreated sections are written back in one batch by
+save(). checkForChanges() reloads the file when it was modified by someone else
+and reports the devices whose sections changed. getAcquisitionINI() returns the
+instance shared by the control window, SpinnakerControl and the cameras.
 @author: taskcontroller
 """
+import os
+import shutil
+import threading
 import configparser
-from data_structures import CameraProperties, DisplayProperties, CaptureProperties, TriggerProperties
+from data_structures import CameraProperties, DisplayProperties, CaptureProperties, TriggerProperties, GeneralProperties
+
+DEFAULT_FILENAME = "acquisition.ini"
 
 class AcquisitionINI:
-    def __init__(self):
-        self.filename_ = "acquisition.ini"
+    def __init__(self, filename = DEFAULT_FILENAME):
+        self.filename_ = filename
         self.defaultSectionTitle_ = 'Default'
         self.cameraSubsectionTitle_ = 'Camera'
         self.displaySubsectionTitle_ = 'Display'
         self.captureSubsectionTitle_ = 'Capture'
         self.triggerSubsectionTitle_ = 'Trigger'
+        self.generalSubsectionTitle_ = 'General' # only in the Default section
         
-        self.config_ = configparser.RawConfigParser()
-        self.config_.optionxform = lambda option: option # switch to case-preserving mode 
+        self.config_ = self.createParser()
+        self.properties_ = {}     # namedtuples already created, by (deviceName, subsection)
+        self.modified_ = False    # whether config_ has changes not written to the file yet
+        self.fileSignature_ = None # (modification time, size) of the file when it was last read or written
+        self.copies_ = set()      # files the ini file was already copied to
+        self.lock_ = threading.RLock() # cameras are initialised concurrently
         
     def __del__(self): 
         del self.config_
 
+    @staticmethod
+    def createParser():
+        config = configparser.RawConfigParser()
+        config.optionxform = lambda option: option # switch to case-preserving mode 
+        return config
+
+    # Returns (modification time, size) of the ini file, None if there is no file
+    def getFileSignature(self):
+        try:
+            fileStat = os.stat(self.filename_)
+        except OSError:
+            return None
+        return (fileStat.st_mtime_ns, fileStat.st_size)
+
+
+    # Returns the namedtuple class of a subsection (None if unknown)
+    def getPropertiesClass(self, subsection):
+        if subsection == self.cameraSubsectionTitle_: 
+            return CameraProperties
+        elif subsection == self.displaySubsectionTitle_:             
+            return DisplayProperties
+        elif subsection == self.captureSubsectionTitle_:             
+            return CaptureProperties
+        elif subsection == self.triggerSubsectionTitle_:             
+            return TriggerProperties
+        elif subsection == self.generalSubsectionTitle_:             
+            return GeneralProperties
+        return None
+
+    # Creates properties from (label, entry) pairs of an ini-file section;
+    # entries are matched by label, absent ones get default values
+    @staticmethod
+    def makeProperties(propertiesClass, items):
+        entries = dict((label, entry) for label, entry in items if label in propertiesClass._fields)
+        return propertiesClass(**entries)
 
     def checkAndRecreateSection(self, deviceName, subsection):
         sectionFullName = deviceName + ", " + subsection
         #print('sectionFullName: %s' % sectionFullName)
         recreateSection = False
         if self.config_.has_section(sectionFullName):
-            labels, entries = zip(*self.config_.items(sectionFullName))                       
-            if subsection == self.cameraSubsectionTitle_: 
-                correctLabels = CameraProperties._fields
-            elif subsection == self.displaySubsectionTitle_:             
-                correctLabels = DisplayProperties._fields
-            elif subsection == self.captureSubsectionTitle_:             
-                correctLabels = CaptureProperties._fields
-            elif subsection == self.triggerSubsectionTitle_:             
-                correctLabels = TriggerProperties._fields
-            else:
-                correctLabels = []   
-            if labels != correctLabels:   
-                self.config_.remove_section(sectionFullName)
-                print('Error in section %s of ini-file, recreated' %sectionFullName)
-                recreateSection = True
+            labels = [label for label, entry in self.config_.items(sectionFullName)]
+            propertiesClass = self.getPropertiesClass(subsection)
+            correctLabels = propertiesClass._fields if propertiesClass != None else ()
+            unknownLabels = [label for label in labels if label not in correctLabels]
+            missingLabels = [label for label in correctLabels if label not in labels]
+            if (len(unknownLabels) > 0) or (len(missingLabels) > 0):
+                # keep the user's settings: only unknown entries are removed and missing ones are 
+                # added with default values (e.g. after new settings were introduced)
+                for label in unknownLabels:
+                    self.config_.remove_option(sectionFullName, label)
+                if len(missingLabels) > 0:
+                    if deviceName == self.defaultSectionTitle_:
+                        defaultProperties = propertiesClass()
+                    else:
+                        defaultProperties = self.getProperties(self.defaultSectionTitle_, subsection)
+                    for label in missingLabels:
+                        self.config_.set(sectionFullName, label, str(getattr(defaultProperties, label)))
+                print('Section %s of ini-file updated: %d unknown entries removed, %d missing entries added' 
+                      % (sectionFullName, len(unknownLabels), len(missingLabels)))
+                self.modified_ = True
         else:
              recreateSection = True
             
@@ -71,6 +127,9 @@ class AcquisitionINI:
                     defaultProperties = TriggerProperties()                
                 else:                                       # ... otherwise - copy from default section
                     defaultProperties = self.getTriggerProperties(self.defaultSectionTitle_)
+
+            elif subsection == self.generalSubsectionTitle_:# General subsection exists for the default section only
+                defaultProperties = GeneralProperties()
             
             iniFileLabels = defaultProperties._fields
             iniFileEntries = list(defaultProperties)
@@ -79,43 +138,102 @@ class AcquisitionINI:
                 self.config_.set(sectionFullName, label, str(entry))
                 #print(label + ", " + str(entry))
             
-            # write config data to the file
-            cfgfile = open(self.filename_,'w')
-            self.config_.write(cfgfile)
-            cfgfile.close()
+            # written to the file by save()
+            self.modified_ = True
         return sectionFullName    
   
                        
     def load(self):  
-        self.config_.read(self.filename_) 
-        if not self.config_:
-            print('No INI file found, recreated')
-        print('TOAST2')
-        self.checkAndRecreateSection(self.defaultSectionTitle_, self.cameraSubsectionTitle_)
-        self.checkAndRecreateSection(self.defaultSectionTitle_, self.displaySubsectionTitle_)        
-        self.checkAndRecreateSection(self.defaultSectionTitle_, self.captureSubsectionTitle_)        
-        self.checkAndRecreateSection(self.defaultSectionTitle_, self.triggerSubsectionTitle_)        
+        with self.lock_:
+            self.fileSignature_ = self.getFileSignature()
+            self.config_ = self.createParser()
+            self.config_.read(self.filename_) 
+            self.properties_ = {}
+            if not self.config_:
+                print('No INI file found, recreated')
+            print('TOAST2')
+            self.checkAndRecreateSection(self.defaultSectionTitle_, self.cameraSubsectionTitle_)
+            self.checkAndRecreateSection(self.defaultSectionTitle_, self.displaySubsectionTitle_)        
+            self.checkAndRecreateSection(self.defaultSectionTitle_, self.captureSubsectionTitle_)        
+            self.checkAndRecreateSection(self.defaultSectionTitle_, self.triggerSubsectionTitle_)        
+            self.checkAndRecreateSection(self.defaultSectionTitle_, self.generalSubsectionTitle_)        
+            self.save()
+
+    # Writes the sections changed or recreated since the last save to the file at once;
+    # a temporary file replaces the ini file, so a crash never leaves it half written
+    def save(self):
+        with self.lock_:
+            if not self.modified_:
+                return
+            tmpFilename = self.filename_ + '.tmp'
+            with open(tmpFilename, 'w') as cfgfile:
+                self.config_.write(cfgfile)
+                cfgfile.flush()
+                os.fsync(cfgfile.fileno())
+            os.replace(tmpFilename, self.filename_)
+            self.fileSignature_ = self.getFileSignature()
+            self.modified_ = False
+
+    # Copies the ini file (with all changes saved) to filename, once per filename
+    def copyTo(self, filename):
+        with self.lock_:
+            if filename in self.copies_:
+                return
+            self.save()
+            try:
+                shutil.copy2(self.filename_, filename)
+                self.copies_.add(filename)
+            except OSError as ex:
+                print('Could not copy %s to %s: %s' % (self.filename_, filename, ex))
+
+    # Reads the file again if it was modified since it was last read or written
+    # output: list of device names whose sections were changed, added or removed
+    #         (empty if the file was not modified)
+    def checkForChanges(self):
+        with self.lock_:
+            fileSignature = self.getFileSignature()
+            if (fileSignature == None) or (fileSignature == self.fileSignature_):
+                return []
+            self.fileSignature_ = fileSignature
+            config = self.createParser()
+            try:
+                config.read(self.filename_)
+            except configparser.Error as ex:
+                print('Could not reload %s (%s), previous settings kept' % (self.filename_, ex))
+                return []
+            changedDevices = set()
+            for section in set(self.config_.sections()) | set(config.sections()):
+                oldItems = dict(self.config_.items(section)) if self.config_.has_section(section) else None
+                newItems = dict(config.items(section)) if config.has_section(section) else None
+                if oldItems != newItems:
+                    changedDevices.add(section.rsplit(", ", 1)[0])
+            self.config_ = config
+            self.modified_ = False # sections recreated before are recreated again on request
+            # keep the properties of unchanged devices, the others are parsed again on request
+            self.properties_ = dict((key, properties) for key, properties in self.properties_.items() 
+                                    if key[0] not in changedDevices)
+            if len(changedDevices) > 0:
+                print('%s reloaded, changed sections: %s' % (self.filename_, ', '.join(sorted(changedDevices))))
+            return sorted(changedDevices)
     
     # Returns a list of camera options  
     def getProperties(self, deviceName, subsection):
-        # check whether section exists and get full section name from deviceName
-        sectionFullName = self.checkAndRecreateSection(deviceName, subsection)           
-        
-        labels, entries = zip(*self.config_.items(sectionFullName))     
-        print(entries) 
-        if subsection == self.cameraSubsectionTitle_: 
-            properties = CameraProperties(*entries)
-        elif subsection == self.displaySubsectionTitle_:             
-            properties = DisplayProperties(*entries) 
-        elif subsection == self.captureSubsectionTitle_ :             
-            properties = CaptureProperties(*entries)
-        elif subsection == self.triggerSubsectionTitle_ :             
-            properties = TriggerProperties(*entries)            
-        else:
-            properties = None
+        with self.lock_:
+            properties = self.properties_.get((deviceName, subsection))
+            if properties != None:
+                return properties
+            # check whether section exists and get full section name from deviceName
+            sectionFullName = self.checkAndRecreateSection(deviceName, subsection)           
             
-        print(entries)    
-        return properties
+            items = self.config_.items(sectionFullName)
+            propertiesClass = self.getPropertiesClass(subsection)
+            if propertiesClass != None: 
+                properties = self.makeProperties(propertiesClass, items)
+                self.properties_[(deviceName, subsection)] = properties
+            else:
+                properties = None
+                
+            return properties
 
 
     # Returns a namedtuple of camera properties  
@@ -134,4 +252,23 @@ class AcquisitionINI:
    # Returns a namedtuple of trigger options  
     def getTriggerProperties(self, deviceName):
         return self.getProperties(deviceName, self.triggerSubsectionTitle_)
+
+    # Returns a namedtuple of the application settings (Default section)
+    def getGeneralProperties(self):
+        return self.getProperties(self.defaultSectionTitle_, self.generalSubsectionTitle_)
         
+
+
+# instances shared in the process, by file name
+sharedIniFiles = {}
+sharedIniFilesLock = threading.Lock()
+
+# Returns the AcquisitionINI of the file shared by all users in the process (loaded on first use)
+def getAcquisitionINI(filename = DEFAULT_FILENAME):
+    with sharedIniFilesLock:
+        iniFile = sharedIniFiles.get(filename)
+        if iniFile == None:
+            iniFile = AcquisitionINI(filename)
+            iniFile.load()
+            sharedIniFiles[filename] = iniFile
+        return iniFile
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 14:52:08 2026
+
+benchmark measures the throughput of the acquisition pipeline without cameras:
+N simulated cameras (fake_pyspin) are run through the real pipeline
+(VideoSingleton with its acquisition and processing threads, frame buffers,
+recording to files) without windows. After a warm-up, the following is
+measured per camera over the given duration:
+sustained frame rate (received and written), drop rate (lost in transport,
+incomplete, buffer overflow), high-water mark of the frame buffer, latency
+percentiles of the pipeline stages and CPU time of the camera threads.
+
+Everything runs in a temporary directory (or --output) with its own
+acquisition.ini, so no settings of the user are touched.
+
+With --start-stop N the recordings are afterwards started and stopped N times
+in quick succession (without waiting for the writers) and it is checked that
+every recording was finished and the writer threads are still running.
+
+Usage: python benchmark.py --cameras 4 --width 1280 --height 1024 --fps 100 --duration 10 [--json results.json]
+       [--start-stop 60]
+
+@author: taskcontroller
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import tempfile
+import configparser
+import fake_pyspin
+from fake_pyspin import FakeCameraConfig
+from data_structures import CameraProperties, DisplayProperties, CaptureProperties, TriggerProperties
+try:
+    import psutil
+except ImportError:
+    psutil = None # CPU time of threads is read from /proc (Linux only)
+
+# time (in s) the pipelines run before the measurement starts
+WARMUP_SECONDS = 1.0
+# maximal time (in s) to wait for the writers after recording stops
+DRAIN_TIMEOUT = 30.0
+# range of the length (in s) of a recording and of the pause after it in the start/stop check
+START_STOP_SECONDS = (0.05, 0.3)
+# serial number of the first simulated camera
+FIRST_SERIAL = 19000001
+FAKE_CAMERA_MODEL = 'Simulated Camera'
+
+
+## output: CPU time (user + system, in s) of the thread with the given native id, None if unknown
+def getThreadCpuTime(nativeId):
+    if nativeId == None:
+        return None
+    if psutil != None:
+        for thread in psutil.Process().threads():
+            if thread.id == nativeId:
+                return thread.user_time + thread.system_time
+        return None
+    try:
+        with open('/proc/self/task/%d/stat' % nativeId) as statFile:
+            fields = statFile.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12]))/os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+## output: CPU time (in s) of the acquisition and processing threads of a camera, None if unknown
+def getCameraCpuTime(source):
+    times = [getThreadCpuTime(getattr(thread, 'native_id', None))
+             for thread in (source.acquisitionThread_, source.processingThread_)]
+    if None in times:
+        return None
+    return sum(times)
+
+
+## writes acquisition.ini with a section per simulated camera
+def writeIniFile(filename, cameraConfigs, args, outputPath):
+    cameraProperties = CameraProperties(fps = args.fps, exposure = min(CameraProperties().exposure, 0.5e6/args.fps),
+                                        pixelFormat = args.pixel_format, binning = args.binning, decimation = args.decimation)
+    displayProperties = DisplayProperties(pixelFormat = 'Mono8') # nothing is displayed
+    captureProperties = CaptureProperties(pixelFormat = args.capture_pixel_format or args.pixel_format,
+                                          outputPath = outputPath, aviType = args.avi_type,
+                                          spoolPath = args.spool_path, segmentMinutes = args.segment_minutes)
+    config = configparser.RawConfigParser()
+    config.optionxform = lambda option: option
+    deviceNames = ['Default'] + ['%s, ID %s' % (cameraConfig.model, cameraConfig.serial) for cameraConfig in cameraConfigs]
+    for deviceName in deviceNames:
+        for subsection, properties in (('Camera', cameraProperties), ('Display', displayProperties),
+                                       ('Capture', captureProperties), ('Trigger', TriggerProperties())):
+            section = deviceName + ', ' + subsection
+            config.add_section(section)
+            for label, entry in zip(properties._fields, properties):
+                config.set(section, label, str(entry))
+    with open(filename, 'w') as iniFile:
+        config.write(iniFile)
+
+
+## starts and stops the recordings of all cameras without waiting for the writers in between
+#  input: list of VideoSingleton sources, int cycles - number of recordings
+#  output: list of the numbers of failures per camera (recordings not started or not finished, writer thread terminated)
+def checkStartStop(sources, cycles):
+    failures = [0]*len(sources)
+    for cycle in range(cycles):
+        for i, source in enumerate(sources):
+            if source.startRecording() != 0:
+                print('Start/stop check: recording %d of the camera %s was not started' % (cycle, source.spinnakerCamera_.getName()))
+                failures[i] += 1
+        time.sleep(random.uniform(*START_STOP_SECONDS))
+        for source in sources:
+            source.stopRecording()
+        time.sleep(random.uniform(0, START_STOP_SECONDS[1]))
+    drainEnd = time.perf_counter() + DRAIN_TIMEOUT
+    while any(source.spinnakerCamera_.stopCaptureFlag_ for source in sources) and (time.perf_counter() < drainEnd):
+        time.sleep(0.1)
+    for i, source in enumerate(sources):
+        camera = source.spinnakerCamera_
+        if not source.processingThread_.is_alive():
+            print('Start/stop check: the writer thread of the camera %s terminated' % camera.getName())
+            failures[i] += 1
+        elif camera.captureOn_ or camera.stopCaptureFlag_ or (camera.aviRecorder_ != None):
+            print('Start/stop check: the last recording of the camera %s was not finished' % camera.getName())
+            failures[i] += 1
+    print('Start/stop check: %d recordings per camera, %d failures' % (cycles, sum(failures)))
+    return failures
+
+
+## output: dictionary of the counters of a camera which are compared before and after the measurement
+def takeSnapshot(source):
+    camera = source.spinnakerCamera_
+    session = camera.getDropStatistics()['session']
+    return {'time': time.perf_counter(), 'received': camera.telemetry_.received_, 'written': camera.telemetry_.written_,
+            'transport': session['transport'], 'incomplete': session['incomplete'], 'overflow': session['overflow'],
+            'cpu': getCameraCpuTime(source)}
+
+
+## output: dictionary of the results of a camera
+def getResults(name, source, first, last):
+    interval = last['time'] - first['time']
+    difference = dict((key, last[key] - first[key]) for key in ('received', 'written', 'transport', 'incomplete', 'overflow'))
+    lost = difference['transport'] + difference['incomplete'] + difference['overflow']
+    sent = difference['received'] + difference['transport'] + difference['incomplete']
+    frameQueue = source.spinnakerCamera_.frameQueue_
+    latency = source.spinnakerCamera_.telemetry_.getLatencyStatistics()
+    cpu = None
+    if (first['cpu'] != None) and (last['cpu'] != None):
+        cpu = 100.0*(last['cpu'] - first['cpu'])/interval
+    results = {'camera': name, 'seconds': interval,
+               'receivedFps': difference['received']/interval, 'writtenFps': difference['written']/interval,
+               'lost': lost, 'dropRate': lost/sent if sent > 0 else 0.0,
+               'highWaterMark': frameQueue.getHighWaterMark(), 'capacity': frameQueue.getCapacity(),
+               'cpuPercent': cpu, 'latency': latency}
+    results.update((key, difference[key]) for key in ('transport', 'incomplete', 'overflow'))
+    return results
+
+
+def printResults(results):
+    print('\n%-10s %9s %9s %8s %9s %11s %7s %12s %12s %12s' % ('camera', 'recv fps', 'writ fps', 'lost', 'drop %',
+          'buffer hwm', 'cpu %', 'grab p50/99', 'wait p50/99', 'append p50/99'))
+    for result in results:
+        latency = result['latency']
+        print('%-10s %9.1f %9.1f %8d %9.3f %5d/%-5d %7s %5.1f/%-6.1f %5.1f/%-6.1f %5.1f/%-6.1f'
+              % (result['camera'], result['receivedFps'], result['writtenFps'], result['lost'], 100.0*result['dropRate'],
+                 result['highWaterMark'], result['capacity'],
+                 '%.1f' % result['cpuPercent'] if result['cpuPercent'] != None else 'n/a',
+                 latency['grab']['p50'], latency['grab']['p99'], latency['queueWait']['p50'], latency['queueWait']['p99'],
+                 latency['append']['p50'], latency['append']['p99']))
+    print('latencies in ms; cpu: acquisition and processing thread of the camera (100% = one core)')
+
+
+## runs the simulated cameras through the pipeline, output: list of result dictionaries or None on error
+def runBenchmark(args):
+    cameraConfigs = [FakeCameraConfig(serial = FIRST_SERIAL + i, model = FAKE_CAMERA_MODEL, width = args.width,
+                                      height = args.height, pixelFormat = args.pixel_format, fps = args.fps,
+                                      dropProbability = args.drop_probability, dropEvery = args.drop_every,
+                                      dropBurst = args.drop_burst, incompleteProbability = args.incomplete_probability,
+                                      seed = i)
+                     for i in range(args.cameras)]
+    fake_pyspin.install(cameraConfigs, args.write_videos, args.encoder_delay/1000.0)
+
+    outputPath = args.output if args.output != None else tempfile.mkdtemp(prefix = 'benchmark_')
+    os.makedirs(outputPath, exist_ok = True)
+    os.chdir(outputPath) # acquisition.ini is read from the working directory
+    writeIniFile('acquisition.ini', cameraConfigs, args, os.path.join(outputPath, ''))
+    print('Benchmark directory: %s' % outputPath)
+
+    # imported only after the simulation is installed as PySpin
+    import PySpin
+    import telemetry
+    from VideoSingleton import VideoSingleton
+    from memory_planner import MemoryPlanner
+
+    system = PySpin.System.GetInstance()
+    cameraList = system.GetCameras()
+    sources = []
+    names = []
+    for i in range(cameraList.GetSize()):
+        source = VideoSingleton(i, cameraList.GetByIndex(i), headless = True)
+        res, cameraName = source.open()
+        if res != 0:
+            print('Unable to open the camera %d' % i)
+            return None
+        camera = source.spinnakerCamera_
+        source.setParameters(camera.cameraProperties, camera.displayProperties, camera.captureProperties, camera.triggerProperties)
+        sources.append(source)
+        names.append(camera.getName())
+
+    memoryBudget = int(args.memory_budget*1024**3) if args.memory_budget != None else None
+    plans = MemoryPlanner(memoryBudget).plan([(name, source.spinnakerCamera_.getBufferFrameSize(), source.streamProperties_.fps)
+                                              for name, source in zip(names, sources)])
+    MemoryPlanner.printPlan(plans)
+
+    reporter = None
+    if args.verbosity > telemetry.Verbosity.QUIET:
+        reporter = telemetry.TelemetryReporter(verbosity = args.verbosity)
+        reporter.start()
+    for source, plan in zip(sources, plans):
+        source.startAcquisition(plan.frames)
+    for source in sources:
+        source.startRecording()
+
+    time.sleep(WARMUP_SECONDS)
+    for source in sources:
+        source.spinnakerCamera_.frameQueue_.resetHighWaterMark()
+        for histogram in source.spinnakerCamera_.telemetry_.latency_.values():
+            histogram.reset()
+    first = [takeSnapshot(source) for source in sources]
+    time.sleep(args.duration)
+    last = [takeSnapshot(source) for source in sources]
+    results = [getResults(name, source, firstSnapshot, lastSnapshot)
+               for name, source, firstSnapshot, lastSnapshot in zip(names, sources, first, last)]
+
+    for source in sources:
+        source.stopRecording()
+    drainEnd = time.perf_counter() + DRAIN_TIMEOUT
+    while any(source.spinnakerCamera_.stopCaptureFlag_ for source in sources) and (time.perf_counter() < drainEnd):
+        time.sleep(0.1)
+    if args.start_stop > 0:
+        for result, failures in zip(results, checkStartStop(sources, args.start_stop)):
+            result['startStopFailures'] = failures
+    for source in sources:
+        source.stopAcquisition()
+    if reporter != None:
+        reporter.stop()
+    cameraList.Clear()
+    system.ReleaseInstance()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Measures the throughput of the acquisition pipeline with simulated cameras')
+    parser.add_argument('--cameras', type = int, default = 4, help = 'number of simulated cameras')
+    parser.add_argument('--width', type = int, default = 1280)
+    parser.add_argument('--height', type = int, default = 1024)
+    parser.add_argument('--fps', type = float, default = 100.0)
+    parser.add_argument('--binning', type = int, default = 1, help = 'binning set in the cameras (--width, --height: sensor size)')
+    parser.add_argument('--decimation', type = int, default = 1, help = 'decimation set in the cameras')
+    parser.add_argument('--pixel-format', default = 'Mono8', choices = fake_pyspin.PIXEL_FORMAT_NAMES, help = 'camera pixel format')
+    parser.add_argument('--capture-pixel-format', default = None, help = 'pixel format of the recording (default: camera pixel format)')
+    parser.add_argument('--avi-type', default = 'MJPG', choices = ('UNCOMPRESSED', 'MJPG', 'H264', 'RAW'))
+    parser.add_argument('--duration', type = float, default = 10.0, help = 'measured time in s (after %.0f s of warm-up)' % WARMUP_SECONDS)
+    parser.add_argument('--drop-probability', type = float, default = 0.0, help = 'probability of a frame lost in transport')
+    parser.add_argument('--drop-every', type = int, default = 0, help = 'lose --drop-burst frames every DROP_EVERY frames')
+    parser.add_argument('--drop-burst', type = int, default = 1)
+    parser.add_argument('--incomplete-probability', type = float, default = 0.0, help = 'probability of an incomplete image')
+    parser.add_argument('--encoder-delay', type = float, default = 0.0, help = 'time (in ms) the simulated encoder spends per frame')
+    parser.add_argument('--write-videos', action = 'store_true', help = 'write the frame data of simulated videos to disk')
+    parser.add_argument('--spool-path', default = '', help = 'directory of the frame spool (default: no spool)')
+    parser.add_argument('--segment-minutes', type = float, default = 0.0)
+    parser.add_argument('--start-stop', type = int, default = 0, 
+                        help = 'start and stop the recordings START_STOP times after the measurement and check that all were finished')
+    parser.add_argument('--memory-budget', type = float, default = None, help = 'memory for the frame buffers in GB')
+    parser.add_argument('--output', default = None, help = 'directory for the ini and the recordings (default: temporary)')
+    parser.add_argument('--verbosity', type = int, default = 1, choices = range(4), help = 'telemetry output during the run')
+    parser.add_argument('--json', default = None, help = 'file for the results')
+    args = parser.parse_args()
+    # the benchmark changes the working directory
+    if args.json != None:
+        args.json = os.path.abspath(args.json)
+    if args.output != None:
+        args.output = os.path.abspath(args.output)
+
+    results = runBenchmark(args)
+    if results == None:
+        sys.exit(1)
+    printResults(results)
+    failed = sum(result.get('startStopFailures', 0) for result in results) > 0
+    if args.json != None:
+        with open(args.json, 'w') as jsonFile:
+            json.dump({'settings': vars(args), 'cameras': results}, jsonFile, indent = 2)
+        print('Results saved to %s' % args.json)
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
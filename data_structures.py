@@ -11,6 +11,26 @@ class ImageFormat:
     MONO8 = 'L'
     Mono16 = 'Mono16'
     YCbCr = 'YCbCr'
+    MONO12P = 'Mono12p'      # two pixels packed into three bytes
+    BAYER8 = 'Bayer8'        # raw colour sensor data, one byte per pixel
+    BAYER12P = 'Bayer12p'
+    BAYER16 = 'Bayer16'
+    YCbCr411 = 'YCbCr411'    # 4 pixels in 6 bytes
+    YCbCr422 = 'YCbCr422'    # 2 pixels in 4 bytes
+
+# number of bits per pixel for every ImageFormat
+BITS_PER_PIXEL = {
+    ImageFormat.RGB24: 24,
+    ImageFormat.MONO8: 8,
+    ImageFormat.Mono16: 16,
+    ImageFormat.YCbCr: 24,
+    ImageFormat.MONO12P: 12,
+    ImageFormat.BAYER8: 8,
+    ImageFormat.BAYER12P: 12,
+    ImageFormat.BAYER16: 16,
+    ImageFormat.YCbCr411: 12,
+    ImageFormat.YCbCr422: 16,
+}
 
 class StreamProperties: 
     def __init__(self, width, height, fps, imageFormat = ImageFormat.MONO8):
@@ -19,19 +39,21 @@ class StreamProperties:
         self.fps = fps
         self.format = imageFormat
         
+    # output: size of a frame in bytes
     def getFrameSize(self):
-        frameSize = self.width*self.height
-        if self.format == ImageFormat.RGB24:
-            frameSize *= 3
-        if self.format == ImageFormat.YCbCr:
-            frameSize *= 3
+        bitsPerPixel = BITS_PER_PIXEL.get(self.format, 24) # unknown formats: assume the largest one
+        frameSize = (self.width*self.height*bitsPerPixel + 7)//8
         frameSize += 512 # for non-standart frame sizes
         return frameSize      
     
 
-class CameraProperties(namedtuple('CameraProperties', ['fps', 'gain', 'exposure', 'xFlip', 'yFlip', 'pixelFormat'])):
+# offsetX, offsetY, width, height - region of interest in pixels after binning and decimation
+#             (width, height 0 - the largest region), binning, decimation - factor applied in both directions
+class CameraProperties(namedtuple('CameraProperties', ['fps', 'gain', 'exposure', 'xFlip', 'yFlip', 'pixelFormat',
+                                                       'offsetX', 'offsetY', 'width', 'height', 'binning', 'decimation'])):
     def __new__(cls, fps = 25.0, gain = 0.0, exposure = 39000.0, 
-                       xFlip = False, yFlip = False, pixelFormat = 'Mono8'):
+                       xFlip = False, yFlip = False, pixelFormat = 'Mono8',
+                       offsetX = 0, offsetY = 0, width = 0, height = 0, binning = 1, decimation = 1):
         try:
             fps = float(fps)
         except ValueError:
@@ -65,8 +87,51 @@ class CameraProperties(namedtuple('CameraProperties', ['fps', 'gain', 'exposure'
             pixelFormat = str(pixelFormat)
         except ValueError:
             raise ValueError('pixelFormat value ' + str(pixelFormat) + ' in ini-file has incorrect format!')  
+
+        try:
+            offsetX = int(offsetX)
+        except ValueError:
+            raise ValueError('offsetX value ' + str(offsetX) + ' in ini-file has incorrect format!')
+        if offsetX < 0:
+            raise ValueError('offsetX value ' + str(offsetX) + ' in ini-file should not be negative!')
+
+        try:
+            offsetY = int(offsetY)
+        except ValueError:
+            raise ValueError('offsetY value ' + str(offsetY) + ' in ini-file has incorrect format!')
+        if offsetY < 0:
+            raise ValueError('offsetY value ' + str(offsetY) + ' in ini-file should not be negative!')
+
+        try:
+            width = int(width)
+        except ValueError:
+            raise ValueError('width value ' + str(width) + ' in ini-file has incorrect format!')
+        if width < 0:
+            raise ValueError('width value ' + str(width) + ' in ini-file should not be negative!')
+
+        try:
+            height = int(height)
+        except ValueError:
+            raise ValueError('height value ' + str(height) + ' in ini-file has incorrect format!')
+        if height < 0:
+            raise ValueError('height value ' + str(height) + ' in ini-file should not be negative!')
+
+        try:
+            binning = int(binning)
+        except ValueError:
+            raise ValueError('binning value ' + str(binning) + ' in ini-file has incorrect format!')
+        if binning < 1:
+            raise ValueError('binning value ' + str(binning) + ' in ini-file should be at least 1!')
+
+        try:
+            decimation = int(decimation)
+        except ValueError:
+            raise ValueError('decimation value ' + str(decimation) + ' in ini-file has incorrect format!')
+        if decimation < 1:
+            raise ValueError('decimation value ' + str(decimation) + ' in ini-file should be at least 1!')
             
-        self = super().__new__(cls, fps, gain, exposure, xFlip, yFlip, pixelFormat)
+        self = super().__new__(cls, fps, gain, exposure, xFlip, yFlip, pixelFormat,
+                               offsetX, offsetY, width, height, binning, decimation)
         return self
         
         
@@ -101,8 +166,20 @@ class DisplayProperties(namedtuple('DisplayProperties', ['stretch', 'rotation',
         return self
     
     
-class CaptureProperties(namedtuple('CaptureProperties', ['pixelFormat', 'outputPath', 'cameraPrefix', 'cameraSuffix', 'aviType', 'MJPGQuality', 'H264BitRate'])):
-    def __new__(cls, pixelFormat = 'Mono8', outputPath = 'D:/', cameraPrefix = 'Camera_', cameraSuffix = '', aviType = 'MJPG', MJPGQuality = 75, H264BitRate = 1000000):            
+# spoolPath - directory on a fast local disk for frames which do not fit into the memory buffer
+#             (empty - no spool), spoolSeconds - length of the stall (in s) the spool bridges,
+# segmentMinutes, segmentGB - a new file is started when the current one is this long (in minutes)
+#             or large (in GB of frame data before encoding); 0 - no limit
+# preRollSeconds - length of the pre-roll kept while not recording and written at the start of a recording (0 - none)
+# motionThreshold - activity (mean absolute difference of sampled pixel values to the previous frame) a frame 
+#             needs to be recorded with its padding (0 - all frames are recorded), motionDecimation - every n-th 
+#             row and pixel is sampled, motionPreSeconds, motionPostSeconds - padding before and after the activity
+class CaptureProperties(namedtuple('CaptureProperties', ['pixelFormat', 'outputPath', 'cameraPrefix', 'cameraSuffix', 'aviType', 'MJPGQuality', 'H264BitRate', 
+                                                         'spoolPath', 'spoolSeconds', 'segmentMinutes', 'segmentGB', 'preRollSeconds',
+                                                         'motionThreshold', 'motionDecimation', 'motionPreSeconds', 'motionPostSeconds'])):
+    def __new__(cls, pixelFormat = 'Mono8', outputPath = 'D:/', cameraPrefix = 'Camera_', cameraSuffix = '', aviType = 'MJPG', MJPGQuality = 75, H264BitRate = 1000000,
+                spoolPath = '', spoolSeconds = 10.0, segmentMinutes = 0.0, segmentGB = 0.0, preRollSeconds = 0.0,
+                motionThreshold = 0.0, motionDecimation = 8, motionPreSeconds = 1.0, motionPostSeconds = 2.0):            
         try:
             pixelFormat = str(pixelFormat)
         except ValueError:
@@ -137,8 +214,55 @@ class CaptureProperties(namedtuple('CaptureProperties', ['pixelFormat', 'outputP
             H264BitRate = int(H264BitRate)
         except ValueError:
             raise ValueError('H264BitRate value ' + str(H264BitRate) + ' in ini-file has incorrect format!')                    
+
+        try:
+            spoolPath = str(spoolPath)
+        except ValueError:
+            raise ValueError('spoolPath value ' + str(spoolPath) + ' in ini-file has incorrect format!')
+
+        try:
+            spoolSeconds = float(spoolSeconds)
+        except ValueError:
+            raise ValueError('spoolSeconds value ' + str(spoolSeconds) + ' in ini-file has incorrect format!')
+
+        try:
+            segmentMinutes = float(segmentMinutes)
+        except ValueError:
+            raise ValueError('segmentMinutes value ' + str(segmentMinutes) + ' in ini-file has incorrect format!')
+
+        try:
+            segmentGB = float(segmentGB)
+        except ValueError:
+            raise ValueError('segmentGB value ' + str(segmentGB) + ' in ini-file has incorrect format!')
+
+        try:
+            preRollSeconds = float(preRollSeconds)
+        except ValueError:
+            raise ValueError('preRollSeconds value ' + str(preRollSeconds) + ' in ini-file has incorrect format!')
+
+        try:
+            motionThreshold = float(motionThreshold)
+        except ValueError:
+            raise ValueError('motionThreshold value ' + str(motionThreshold) + ' in ini-file has incorrect format!')
+
+        try:
+            motionDecimation = int(motionDecimation)
+        except ValueError:
+            raise ValueError('motionDecimation value ' + str(motionDecimation) + ' in ini-file has incorrect format!')
+
+        try:
+            motionPreSeconds = float(motionPreSeconds)
+        except ValueError:
+            raise ValueError('motionPreSeconds value ' + str(motionPreSeconds) + ' in ini-file has incorrect format!')
+
+        try:
+            motionPostSeconds = float(motionPostSeconds)
+        except ValueError:
+            raise ValueError('motionPostSeconds value ' + str(motionPostSeconds) + ' in ini-file has incorrect format!')
           
-        self = super().__new__(cls, pixelFormat, outputPath, cameraPrefix, cameraSuffix, aviType, MJPGQuality, H264BitRate)
+        self = super().__new__(cls, pixelFormat, outputPath, cameraPrefix, cameraSuffix, aviType, MJPGQuality, H264BitRate, 
+                               spoolPath, spoolSeconds, segmentMinutes, segmentGB, preRollSeconds,
+                               motionThreshold, motionDecimation, motionPreSeconds, motionPostSeconds)
         return self
             
     
@@ -166,4 +290,27 @@ class TriggerProperties(namedtuple('TriggerProperties', ['triggerMode', 'trigger
 
           
         self = super().__new__(cls, triggerMode, triggerSource, triggerOverlap, triggerActivation)
-        return self    
\ No newline at end of file
+        return self    
+
+
+# settings of the application (only in the Default section of the ini-file)
+# headless - no video windows: wx and PIL are not imported, frames are only recorded,
+# mosaic - the frames of all cameras are shown in one window (MosaicDisplay)
+class GeneralProperties(namedtuple('GeneralProperties', ['headless', 'mosaic'])):
+    def __new__(cls, headless = False, mosaic = False):
+        if str(headless).lower() in ('true', '1', 'yes', 'on'):
+            headless = True
+        elif str(headless).lower() in ('false', '0', 'no', 'off'):
+            headless = False
+        else:
+            raise ValueError('headless value ' + str(headless) + ' in ini-file has incorrect format!')
+
+        if str(mosaic).lower() in ('true', '1', 'yes', 'on'):
+            mosaic = True
+        elif str(mosaic).lower() in ('false', '0', 'no', 'off'):
+            mosaic = False
+        else:
+            raise ValueError('mosaic value ' + str(mosaic) + ' in ini-file has incorrect format!')
+
+        self = super().__new__(cls, headless, mosaic)
+        return self
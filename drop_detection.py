@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:40:12 2026
+
+drop_detection defines DropDetector, which finds frames lost on the way from the
+camera to the file using FrameID and device timestamp of every received image,
+and classifies the losses.
+
+@author: taskcontroller
+"""
+
+# set of constants defining the kind of frame loss
+class LossType:
+    TRANSPORT = 'transport'   # frame never arrived (dropped by the camera, the transport or the driver)
+    INCOMPLETE = 'incomplete' # frame arrived incomplete and was discarded
+    OVERFLOW = 'overflow'     # frame arrived but did not fit into the frame buffer
+    ALL = (TRANSPORT, INCOMPLETE, OVERFLOW)
+
+# a timestamp gap is counted as loss only if it exceeds this many frame periods
+TIMESTAMP_GAP_TOLERANCE = 1.5
+
+
+## counts of received and lost frames over some interval (session or recording)
+class DropStatistics:
+    def __init__(self):
+        self.received_ = 0
+        self.lost_ = dict((lossType, 0) for lossType in LossType.ALL)
+        self.firstFrameId_ = None
+        self.lastFrameId_ = None
+
+    def getLostCount(self):
+        return sum(self.lost_.values())
+
+    ## output: dictionary with received frames, losses by type and frame id range
+    def asDict(self):
+        statistics = {'received': self.received_, 'lost': self.getLostCount(),
+                      'firstFrameId': self.firstFrameId_, 'lastFrameId': self.lastFrameId_}
+        statistics.update(self.lost_)
+        return statistics
+
+
+class DropDetector:
+    ## input: float fps - expected frame rate
+    def __init__(self, fps):
+        self.framePeriod_ = 0
+        self.setFrameRate(fps)
+        self.lastFrameId_ = None
+        self.lastTimestamp_ = None
+        self.session_ = DropStatistics()   # since acquisition start
+        self.recording_ = None             # since recording start (None if not recording)
+
+    ## input: float fps - expected frame rate, used when frame ids are unusable
+    def setFrameRate(self, fps):
+        self.framePeriod_ = 1e9/fps if fps > 0 else 0 # in ns, as device timestamps
+
+    ## starts counting for a new recording
+    def startRecording(self):
+        self.recording_ = DropStatistics()
+
+    ## stops counting for the current recording, output: DropStatistics of the recording
+    def stopRecording(self):
+        recording = self.recording_
+        self.recording_ = None
+        return recording
+
+    ## number of frames missing between the previous frame and the given one
+    def countMissing(self, frameId, timestamp):
+        missing = 0
+        if self.lastFrameId_ != None and frameId > self.lastFrameId_:
+            missing = frameId - self.lastFrameId_ - 1
+        elif self.lastTimestamp_ != None and self.framePeriod_ > 0 and timestamp > self.lastTimestamp_:
+            # frame ids restarted or are not supported: estimate the gap from timestamps
+            periods = (timestamp - self.lastTimestamp_)/self.framePeriod_
+            if periods > TIMESTAMP_GAP_TOLERANCE:
+                missing = int(round(periods)) - 1
+        self.lastFrameId_ = frameId
+        self.lastTimestamp_ = timestamp
+        return missing
+
+    def count(self, lossType, number):
+        recording = self.recording_ # may be reset by another thread meanwhile
+        self.session_.lost_[lossType] += number
+        if recording != None:
+            recording.lost_[lossType] += number
+
+    def countReceived(self, frameId):
+        for statistics in (self.session_, self.recording_):
+            if statistics != None:
+                statistics.received_ += 1
+                if statistics.firstFrameId_ == None:
+                    statistics.firstFrameId_ = frameId
+                statistics.lastFrameId_ = frameId
+
+    ## registers a complete frame
+    #  input: int frameId, int timestamp - device timestamp in ns
+    #  output: number of frames lost in transport before this frame
+    def onFrame(self, frameId, timestamp):
+        missing = self.countMissing(frameId, timestamp)
+        if missing > 0:
+            self.count(LossType.TRANSPORT, missing)
+        self.countReceived(frameId)
+        return missing
+
+    ## registers an incomplete frame, output: number of frames lost in transport before it
+    def onIncomplete(self, frameId, timestamp):
+        missing = self.countMissing(frameId, timestamp)
+        if missing > 0:
+            self.count(LossType.TRANSPORT, missing)
+        self.count(LossType.INCOMPLETE, 1)
+        return missing
+
+    ## registers a frame which did not fit into the frame buffer
+    def onOverflow(self):
+        self.count(LossType.OVERFLOW, 1)
+
+    ## output: dictionary {'session': {...}, 'recording': {...} or None}
+    def getStatistics(self):
+        return {'session': self.session_.asDict(),
+                'recording': self.recording_.asDict() if self.recording_ != None else None}
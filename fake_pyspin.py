@@ -0,0 +1,631 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 09:41:26 2026
+
+fake_pyspin simulates the part of the PySpin API used by SpinnakerCamera and
+SpinnakerControl (System, camera list, node maps, GetNextImage, Image.Convert,
+chunk data, SpinVideo), so the whole pipeline runs without cameras, e.g. for
+benchmarks (see benchmark) and regression tests.
+
+Every simulated camera produces frames at its frame rate in real time into a
+limited number of driver buffers (StreamBufferCountManual); frames arriving
+when all buffers are occupied are lost, as with a real camera whose host falls
+behind. Additional losses (random or periodic bursts) and incomplete images can
+be configured per camera with FakeCameraConfig.
+
+Usage: call fake_pyspin.install([FakeCameraConfig(...), ...]) before the first
+import of SpinnakerCamera, SpinnakerControl or VideoSingleton.
+
+@author: taskcontroller
+"""
+
+import sys
+import time
+import random
+import threading
+from collections import namedtuple, deque
+import numpy
+
+# access modes of nodes
+NI, NA, WO, RO, RW = range(5)
+
+EVENT_TIMEOUT_INFINITE = 0xFFFFFFFFFFFFFFFF
+EVENT_TIMEOUT_NONE = 0
+SPINNAKER_ERR_TIMEOUT = -1011
+SPINNAKER_ERR_NOT_STREAMING = -1002
+
+# color processing algorithms of Image.Convert
+NO_COLOR_PROCESSING, NEAREST_NEIGHBOR, EDGE_SENSING, HQ_LINEAR = range(4)
+
+# values of enumeration nodes set directly by SpinnakerCamera
+ExposureAuto_Off, ExposureAuto_Once, ExposureAuto_Continuous = range(3)
+ExposureAuto_On = ExposureAuto_Continuous
+GainAuto_Off, GainAuto_Once, GainAuto_Continuous = range(3)
+GainAuto_On = GainAuto_Continuous
+TriggerMode_Off, TriggerMode_On = range(2)
+TriggerSource_Software, TriggerSource_Line0, TriggerSource_Line1, TriggerSource_Line2, TriggerSource_Line3 = range(5)
+
+# simulated pixel formats with their number of bits per pixel
+PIXEL_FORMAT_BITS = [('Mono8', 8), ('Mono12Packed', 12), ('Mono12p', 12), ('Mono16', 16),
+                     ('BayerGR8', 8), ('BayerGR12Packed', 12), ('BayerGR12p', 12), ('BayerGR16', 16),
+                     ('RGB8', 24), ('YCbCr411_8_CbYYCrYY', 12), ('YCbCr422_8_CbYCrY', 16), ('YCbCr8_CbYCr', 24)]
+PIXEL_FORMAT_NAMES = [name for name, bits in PIXEL_FORMAT_BITS]
+PIXEL_FORMAT_SIZE = dict((index, bits) for index, (name, bits) in enumerate(PIXEL_FORMAT_BITS))
+for _index, _name in enumerate(PIXEL_FORMAT_NAMES):
+    setattr(sys.modules[__name__], 'PixelFormat_' + _name, _index)
+
+# number of different images generated per camera and cycled through
+PATTERN_FRAMES = 8
+
+LibraryVersion = namedtuple('LibraryVersion', 'major minor type build')
+
+
+class SpinnakerException(Exception):
+    def __init__(self, message, errorcode = -1001):
+        Exception.__init__(self, message)
+        self.errorcode = errorcode
+        self.message = message
+
+
+## settings of a simulated camera
+# dropProbability - probability that a frame is lost in transport,
+# dropEvery, dropBurst - dropBurst frames are lost every dropEvery frames (0 - no periodic losses),
+# incompleteProbability - probability that an image arrives incomplete,
+# clockDrift - relative deviation of the camera clock (e.g. 1e-5), seed - of the random losses,
+# initTime - time (in s) Init() takes, as with a real camera
+class FakeCameraConfig(namedtuple('FakeCameraConfig', ['serial', 'model', 'width', 'height', 'pixelFormat', 'fps',
+                                                       'dropProbability', 'dropEvery', 'dropBurst', 'incompleteProbability',
+                                                       'clockDrift', 'seed', 'initTime'])):
+    def __new__(cls, serial = '19000000', model = 'Chameleon3 CM3-U3-13Y3M', width = 1280, height = 1024, pixelFormat = 'Mono8',
+                fps = 25.0, dropProbability = 0.0, dropEvery = 0, dropBurst = 1, incompleteProbability = 0.0,
+                clockDrift = 0.0, seed = 0, initTime = 0.0):
+        if pixelFormat not in PIXEL_FORMAT_NAMES:
+            raise ValueError('pixel format %s is not simulated' % pixelFormat)
+        return super().__new__(cls, str(serial), str(model), int(width), int(height), pixelFormat, float(fps),
+                               float(dropProbability), int(dropEvery), int(dropBurst), float(incompleteProbability),
+                               float(clockDrift), seed, float(initTime))
+
+# cameras returned by System.GetCameras()
+cameraConfigs_ = [FakeCameraConfig()]
+# whether SpinVideo writes the frame data to disk (otherwise it is only copied)
+writeVideos_ = False
+# time (in s) SpinVideo.Append spends per frame, simulating the encoder
+encoderDelay_ = 0.0
+
+
+## sets the simulated cameras and recorder
+def configure(cameraConfigs, writeVideos = False, encoderDelay = 0.0):
+    global cameraConfigs_, writeVideos_, encoderDelay_
+    cameraConfigs_ = list(cameraConfigs)
+    writeVideos_ = writeVideos
+    encoderDelay_ = encoderDelay
+
+## configures the simulation and makes "import PySpin" return this module
+def install(cameraConfigs = None, writeVideos = False, encoderDelay = 0.0):
+    if cameraConfigs != None:
+        configure(cameraConfigs, writeVideos, encoderDelay)
+    sys.modules['PySpin'] = sys.modules[__name__]
+    return sys.modules[__name__]
+
+
+## output: size of an image in bytes
+def getImageSize(width, height, pixelFormat):
+    return (width*height*PIXEL_FORMAT_SIZE[pixelFormat] + 7)//8
+
+
+#####################################################################################
+# nodes
+
+class Node:
+    def __init__(self, name, value = None, accessMode = RW, minimum = None, maximum = None, onChange = None, onRead = None, increment = 1):
+        self.name_ = name
+        self.value_ = value
+        self.onRead_ = onRead # returns the current value of a status node
+        self.accessMode_ = accessMode
+        self.min_ = minimum
+        self.max_ = maximum
+        self.inc_ = increment # integer nodes accept min_ + k*inc_ only
+        self.onChange_ = onChange # called with the node after a new value is set
+        self.entries_ = []   # entries of an enumeration node
+        self.features_ = []  # nodes of a category
+
+    def GetName(self):
+        return self.name_
+
+    def GetAccessMode(self):
+        return self.accessMode_
+
+    def GetValue(self):
+        if self.onRead_ != None:
+            return self.onRead_()
+        return self.value_
+
+    def SetValue(self, value, verify = True):
+        if self.accessMode_ not in (RW, WO):
+            raise SpinnakerException('Node %s is not writable' % self.name_)
+        if self.entries_:
+            return self.SetIntValue(value)
+        if (self.min_ != None) and (value < self.min_) or (self.max_ != None) and (value > self.max_):
+            raise SpinnakerException('Value %s of node %s out of range' % (value, self.name_))
+        if (self.inc_ > 1) and ((value - (self.min_ or 0)) % self.inc_ != 0):
+            raise SpinnakerException('Value %s of node %s is not a multiple of the increment %d' % (value, self.name_, self.inc_))
+        self.value_ = value
+        if self.onChange_ != None:
+            self.onChange_(self)
+
+    def GetMin(self):
+        return self.min_
+
+    def GetMax(self):
+        return self.max_
+
+    def GetInc(self):
+        return self.inc_
+
+    def ToString(self):
+        return str(self.value_)
+
+    # enumeration nodes: value_ is the int value of the current entry
+    def addEntry(self, symbolic, value = None):
+        entry = Node(symbolic, len(self.entries_) if value == None else value, RO)
+        self.entries_.append(entry)
+        return entry
+
+    def GetEntries(self):
+        return list(self.entries_)
+
+    def GetEntryByName(self, symbolic):
+        for entry in self.entries_:
+            if entry.name_ == symbolic:
+                return entry
+        return None
+
+    def GetCurrentEntry(self):
+        for entry in self.entries_:
+            if entry.value_ == self.value_:
+                return entry
+        return None
+
+    def GetIntValue(self):
+        return self.value_
+
+    def SetIntValue(self, value):
+        if self.accessMode_ not in (RW, WO):
+            raise SpinnakerException('Node %s is not writable' % self.name_)
+        if not any(entry.value_ == value for entry in self.entries_):
+            raise SpinnakerException('Value %s is not an entry of node %s' % (value, self.name_))
+        self.value_ = value
+        if self.onChange_ != None:
+            self.onChange_(self)
+
+    # enumeration entries
+    def GetSymbolic(self):
+        return self.name_
+
+    def GetDisplayName(self):
+        return self.name_
+
+    # category nodes
+    def GetFeatures(self):
+        return list(self.features_)
+
+
+class NodeMap:
+    def __init__(self):
+        self.nodes_ = {}
+
+    def add(self, node):
+        self.nodes_[node.name_] = node
+        return node
+
+    ## adds an enumeration node, input: list of entry names, name of the current entry
+    def addEnumeration(self, name, entries, current, accessMode = RW, onChange = None):
+        node = self.add(Node(name, None, accessMode, onChange = onChange))
+        for symbolic in entries:
+            node.addEntry(symbolic)
+        node.value_ = node.GetEntryByName(current).value_
+        return node
+
+    def GetNode(self, name):
+        return self.nodes_.get(name)
+
+    # camera_.Width etc. are shortcuts for the nodes
+    def __getattr__(self, name):
+        node = self.__dict__.get('nodes_', {}).get(name)
+        if node == None:
+            raise AttributeError(name)
+        return node
+
+
+# the pointer classes of PySpin only change the interface of a node
+def CValuePtr(node):
+    return node
+
+CCategoryPtr = CFloatPtr = CIntegerPtr = CBooleanPtr = CStringPtr = CEnumerationPtr = CEnumEntryPtr = CValuePtr
+
+def IsAvailable(node):
+    return (node != None) and (node.accessMode_ not in (NI, NA))
+
+def IsReadable(node):
+    return IsAvailable(node) and (node.accessMode_ in (RO, RW))
+
+def IsWritable(node):
+    return IsAvailable(node) and (node.accessMode_ in (WO, RW))
+
+
+#####################################################################################
+# images
+
+class ChunkData:
+    def __init__(self, exposureTime, gain, lineStatus):
+        self.exposureTime_ = exposureTime
+        self.gain_ = gain
+        self.lineStatus_ = lineStatus
+
+    def GetExposureTime(self):
+        return self.exposureTime_
+
+    def GetGain(self):
+        return self.gain_
+
+    def GetExposureEndLineStatusAll(self):
+        return self.lineStatus_
+
+
+class Image:
+    def __init__(self, width, height, pixelFormat, data, frameId = 0, timestamp = 0, incomplete = False, chunkData = None):
+        self.width_ = width
+        self.height_ = height
+        self.pixelFormat_ = pixelFormat
+        self.data_ = data
+        self.frameId_ = frameId
+        self.timestamp_ = timestamp
+        self.incomplete_ = incomplete
+        self.chunkData_ = chunkData
+
+    ## creates an image using the given buffer
+    @staticmethod
+    def Create(width, height, offsetX, offsetY, pixelFormat, data):
+        return Image(width, height, pixelFormat, numpy.frombuffer(data, dtype = numpy.uint8)
+                     if not isinstance(data, numpy.ndarray) else data)
+
+    def IsIncomplete(self):
+        return self.incomplete_
+
+    def GetImageStatus(self):
+        return 1 if self.incomplete_ else 0
+
+    def GetFrameID(self):
+        return self.frameId_
+
+    def GetTimeStamp(self):
+        return self.timestamp_
+
+    def GetWidth(self):
+        return self.width_
+
+    def GetHeight(self):
+        return self.height_
+
+    def GetPixelFormat(self):
+        return self.pixelFormat_
+
+    def GetBufferSize(self):
+        return self.data_.size
+
+    def GetData(self):
+        return self.data_
+
+    def GetNDArray(self):
+        return self.data_
+
+    def GetChunkData(self):
+        if self.chunkData_ == None:
+            raise SpinnakerException('No chunk data in the image')
+        return self.chunkData_
+
+    ## output: new image in the given pixel format (the data are not a real conversion,
+    #  but have the correct size and cost a comparable amount of copying)
+    def Convert(self, pixelFormat, algorithm = HQ_LINEAR):
+        size = getImageSize(self.width_, self.height_, pixelFormat)
+        if size == self.data_.size:
+            data = self.data_.copy()
+        elif size == 3*self.data_.size:
+            data = numpy.repeat(self.data_, 3)
+        else:
+            data = numpy.resize(self.data_, size)
+        return Image(self.width_, self.height_, pixelFormat, data, self.frameId_, self.timestamp_, self.incomplete_, self.chunkData_)
+
+    def Release(self):
+        pass
+
+
+#####################################################################################
+# camera
+
+class TLDevice:
+    def __init__(self, nodeMap):
+        self.nodeMap_ = nodeMap
+
+    def __getattr__(self, name):
+        return getattr(self.nodeMap_, name)
+
+
+class Camera:
+    def __init__(self, config):
+        self.config_ = config
+        self.random_ = random.Random(config.seed)
+        self.initialized_ = False
+        self.streaming_ = False
+        self.lock_ = threading.Lock()
+
+        # transport layer (device information)
+        self.tlDeviceNodeMap_ = NodeMap()
+        deviceInformation = self.tlDeviceNodeMap_.add(Node('DeviceInformation', None, RO))
+        for name, value in (('DeviceID', config.serial), ('DeviceSerialNumber', config.serial),
+                            ('DeviceModelName', config.model), ('DeviceVendorName', 'Simulated')):
+            deviceInformation.features_.append(self.tlDeviceNodeMap_.add(Node(name, value, RO)))
+        self.TLDevice = TLDevice(self.tlDeviceNodeMap_)
+
+        # transport layer (stream)
+        self.tlStreamNodeMap_ = NodeMap()
+        self.tlStreamNodeMap_.addEnumeration('StreamBufferHandlingMode', ['OldestFirst', 'OldestFirstOverwrite', 'NewestOnly', 'NewestFirst'], 'NewestFirst')
+        self.tlStreamNodeMap_.addEnumeration('StreamBufferCountMode', ['Manual', 'Auto'], 'Auto')
+        self.tlStreamNodeMap_.add(Node('StreamBufferCountManual', 10, RW, 1, 1000))
+        self.tlStreamNodeMap_.add(Node('StreamOutputBufferCount', 0, RO, onRead = self.getOutputBufferCount))
+
+        # camera
+        nodeMap = NodeMap()
+        self.nodeMap_ = nodeMap
+        # the configured size is the sensor size; binning, decimation and the offsets limit the image size
+        nodeMap.add(Node('Width', config.width, RW, 16, config.width, onChange = self.onGeometryChange, increment = 4))
+        nodeMap.add(Node('Height', config.height, RW, 16, config.height, onChange = self.onGeometryChange, increment = 2))
+        nodeMap.add(Node('OffsetX', 0, RW, 0, 0, onChange = self.onGeometryChange, increment = 4))
+        nodeMap.add(Node('OffsetY', 0, RW, 0, 0, onChange = self.onGeometryChange, increment = 2))
+        for name in ('BinningHorizontal', 'BinningVertical', 'DecimationHorizontal', 'DecimationVertical'):
+            nodeMap.add(Node(name, 1, RW, 1, 4, onChange = self.onGeometryChange))
+        nodeMap.addEnumeration('PixelFormat', PIXEL_FORMAT_NAMES, config.pixelFormat)
+        nodeMap.add(Node('AcquisitionFrameRate', config.fps, RW, 1.0, 1000.0, onChange = self.onFrameRateChange))
+        nodeMap.addEnumeration('AcquisitionFrameRateAuto', ['Off', 'Continuous'], 'Continuous')
+        nodeMap.add(Node('AcquisitionFrameRateEnabled', False))
+        nodeMap.addEnumeration('AcquisitionMode', ['Continuous', 'SingleFrame', 'MultiFrame'], 'Continuous')
+        nodeMap.add(Node('ExposureTime', 10000.0, RW, 10.0, 1e6))
+        nodeMap.addEnumeration('ExposureAuto', ['Off', 'Once', 'Continuous'], 'Off')
+        nodeMap.add(Node('Gain', 0.0, RW, 0.0, 48.0))
+        nodeMap.addEnumeration('GainAuto', ['Off', 'Once', 'Continuous'], 'Off')
+        nodeMap.add(Node('ReverseX', False))
+        nodeMap.add(Node('ReverseY', False))
+        nodeMap.addEnumeration('TriggerMode', ['Off', 'On'], 'Off')
+        nodeMap.addEnumeration('TriggerSource', ['Software', 'Line0', 'Line1', 'Line2', 'Line3'], 'Line0')
+        nodeMap.add(Node('ChunkModeActive', False))
+        nodeMap.addEnumeration('ChunkSelector', ['ExposureTime', 'Gain', 'ExposureEndLineStatusAll', 'Timestamp'], 'ExposureTime')
+        nodeMap.add(Node('ChunkEnable', False))
+
+        self.start_ = 0.0         # time.perf_counter() of frame 0
+        self.framePeriod_ = 1.0/config.fps
+        self.lastProduced_ = -1   # index of the last frame exposed by the simulated sensor
+        self.buffered_ = deque()  # indices of frames waiting in the driver buffers
+        self.patterns_ = []       # image data cycled through
+        self.lostCnt_ = 0         # frames lost by the simulation (full buffers, transport)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or 'nodeMap_' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.__dict__['nodeMap_'], name)
+
+    def Init(self):
+        if self.config_.initTime > 0:
+            time.sleep(self.config_.initTime)
+        self.initialized_ = True
+
+    def DeInit(self):
+        self.initialized_ = False
+
+    def IsInitialized(self):
+        return self.initialized_
+
+    def IsStreaming(self):
+        return self.streaming_
+
+    def GetNodeMap(self):
+        return self.nodeMap_
+
+    def GetTLDeviceNodeMap(self):
+        return self.tlDeviceNodeMap_
+
+    def GetTLStreamNodeMap(self):
+        return self.tlStreamNodeMap_
+
+    ## keeps the image size and the offsets within the sensor reduced by binning and decimation
+    def onGeometryChange(self, node):
+        nodeMap = self.nodeMap_
+        for size, offset, sensorSize, binning, decimation in (
+                (nodeMap.Width, nodeMap.OffsetX, self.config_.width, nodeMap.BinningHorizontal, nodeMap.DecimationHorizontal),
+                (nodeMap.Height, nodeMap.OffsetY, self.config_.height, nodeMap.BinningVertical, nodeMap.DecimationVertical)):
+            maximum = sensorSize//(binning.value_*decimation.value_)
+            maximum -= (maximum - size.min_) % size.inc_
+            size.value_ = min(size.value_, maximum)
+            offset.value_ = min(offset.value_, maximum - size.value_)
+            offset.value_ -= offset.value_ % offset.inc_
+            size.max_ = maximum - offset.value_
+            size.max_ -= (size.max_ - size.min_) % size.inc_
+            offset.max_ = maximum - size.value_
+            offset.max_ -= offset.max_ % offset.inc_
+
+    def onFrameRateChange(self, node):
+        with self.lock_:
+            now = time.perf_counter()
+            self.framePeriod_ = 1.0/node.value_
+            # the next frame is exposed one (new) period after the last one
+            self.start_ = now - (self.lastProduced_ + 1)*self.framePeriod_
+
+    def BeginAcquisition(self):
+        if not self.initialized_:
+            raise SpinnakerException('Camera is not initialized', -1002)
+        width = self.nodeMap_.GetNode('Width').value_
+        height = self.nodeMap_.GetNode('Height').value_
+        pixelFormat = self.nodeMap_.GetNode('PixelFormat').value_
+        size = getImageSize(width, height, pixelFormat)
+        ramp = numpy.arange(size, dtype = numpy.uint32)
+        self.patterns_ = [((ramp + 8*i) & 0xFF).astype(numpy.uint8) for i in range(PATTERN_FRAMES)]
+        with self.lock_:
+            self.buffered_.clear()
+            self.lastProduced_ = -1
+            self.start_ = time.perf_counter()
+            self.streaming_ = True
+
+    def EndAcquisition(self):
+        if not self.streaming_:
+            raise SpinnakerException('Camera is not streaming', SPINNAKER_ERR_NOT_STREAMING)
+        self.streaming_ = False
+
+    ## whether the frame is lost in transport according to the configured losses
+    def isDropped(self, index):
+        config = self.config_
+        if (config.dropEvery > 0) and (index % config.dropEvery >= config.dropEvery - config.dropBurst):
+            return True
+        return (config.dropProbability > 0) and (self.random_.random() < config.dropProbability)
+
+    ## moves the frames exposed up to now into the free driver buffers
+    def produceFrames(self, now):
+        latest = int((now - self.start_)/self.framePeriod_)
+        if latest <= self.lastProduced_:
+            return
+        bufferCount = self.tlStreamNodeMap_.GetNode('StreamBufferCountManual').value_
+        index = self.lastProduced_ + 1
+        while (index <= latest) and (len(self.buffered_) < bufferCount):
+            if self.isDropped(index):
+                self.lostCnt_ += 1
+            else:
+                self.buffered_.append(index)
+            index += 1
+        self.lostCnt_ += latest + 1 - index # no free buffer for the rest
+        self.lastProduced_ = latest
+
+    ## number of frames waiting in the driver buffers
+    def getOutputBufferCount(self):
+        with self.lock_:
+            if self.streaming_:
+                self.produceFrames(time.perf_counter())
+            return len(self.buffered_)
+
+    def makeImage(self, index):
+        nodeMap = self.nodeMap_
+        incomplete = (self.config_.incompleteProbability > 0) and (self.random_.random() < self.config_.incompleteProbability)
+        timestamp = int(index*self.framePeriod_*(1.0 + self.config_.clockDrift)*1e9)
+        chunkData = None
+        if nodeMap.GetNode('ChunkModeActive').value_:
+            chunkData = ChunkData(nodeMap.GetNode('ExposureTime').value_, nodeMap.GetNode('Gain').value_, index & 0x1)
+        return Image(nodeMap.GetNode('Width').value_, nodeMap.GetNode('Height').value_, nodeMap.GetNode('PixelFormat').value_,
+                     self.patterns_[index % PATTERN_FRAMES], index, timestamp, incomplete, chunkData)
+
+    ## input: timeout in ms (EVENT_TIMEOUT_INFINITE - wait forever, EVENT_TIMEOUT_NONE - do not wait)
+    def GetNextImage(self, timeout = EVENT_TIMEOUT_INFINITE):
+        if not self.streaming_:
+            raise SpinnakerException('Camera is not streaming', SPINNAKER_ERR_NOT_STREAMING)
+        deadline = None if timeout == EVENT_TIMEOUT_INFINITE else time.perf_counter() + timeout/1000.0
+        while True:
+            with self.lock_:
+                now = time.perf_counter()
+                self.produceFrames(now)
+                if self.buffered_:
+                    return self.makeImage(self.buffered_.popleft())
+                nextFrameTime = self.start_ + (self.lastProduced_ + 1)*self.framePeriod_
+            if (deadline != None) and (now >= deadline):
+                raise SpinnakerException('Failed waiting for EventData on NEW_BUFFER_DATA event', SPINNAKER_ERR_TIMEOUT)
+            time.sleep(max(0.0, min(nextFrameTime, deadline) - now if deadline != None else nextFrameTime - now))
+            if not self.streaming_:
+                raise SpinnakerException('Camera is not streaming', SPINNAKER_ERR_NOT_STREAMING)
+
+
+class CameraList:
+    def __init__(self, cameras):
+        self.cameras_ = list(cameras)
+
+    def GetSize(self):
+        return len(self.cameras_)
+
+    def GetByIndex(self, index):
+        return self.cameras_[index]
+
+    def __len__(self):
+        return len(self.cameras_)
+
+    def __iter__(self):
+        return iter(self.cameras_)
+
+    def Clear(self):
+        self.cameras_ = []
+
+
+class System:
+    instance_ = None
+
+    @staticmethod
+    def GetInstance():
+        if System.instance_ == None:
+            System.instance_ = System()
+        return System.instance_
+
+    def __init__(self):
+        self.cameras_ = None
+
+    def GetLibraryVersion(self):
+        return LibraryVersion(1, 0, 0, 0)
+
+    def GetCameras(self):
+        if self.cameras_ == None:
+            self.cameras_ = [Camera(config) for config in cameraConfigs_]
+        return CameraList(self.cameras_)
+
+    def ReleaseInstance(self):
+        System.instance_ = None
+
+
+#####################################################################################
+# video files
+
+class AVIOption:
+    def __init__(self):
+        self.frameRate = 25.0
+
+class MJPGOption(AVIOption):
+    def __init__(self):
+        AVIOption.__init__(self)
+        self.quality = 75
+
+class H264Option(AVIOption):
+    def __init__(self):
+        AVIOption.__init__(self)
+        self.bitrate = 1000000
+        self.width = 0
+        self.height = 0
+
+
+## stores appended frames in a file without encoding (if writeVideos_), or only copies them
+class SpinVideo:
+    def __init__(self):
+        self.file_ = None
+        self.scratch_ = None
+        self.frameCnt_ = 0
+
+    def Open(self, filename, option):
+        if writeVideos_:
+            self.file_ = open(filename + '-0000.avi', 'wb')
+
+    def Append(self, image):
+        data = image.GetData()
+        if self.file_ != None:
+            self.file_.write(data)
+        else:
+            if (self.scratch_ is None) or (self.scratch_.size < data.size):
+                self.scratch_ = numpy.empty(data.size, dtype = numpy.uint8)
+            self.scratch_[:data.size] = data
+        if encoderDelay_ > 0:
+            time.sleep(encoderDelay_)
+        self.frameCnt_ += 1
+
+    def Close(self):
+        if self.file_ != None:
+            self.file_.close()
+            self.file_ = None
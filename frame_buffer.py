@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:41 2026
+
+frame_buffer defines FrameRingBuffer, a fixed-size circular buffer of
+preallocated frame slots used between the acquisition thread (producer)
+and the processing thread (consumer) of a single camera.
+
+Optionally a FrameSpool (frame_spool) is attached as an overflow tier: when the
+memory slots are full, frames go to the spool, and as long as the spool holds
+frames all new frames go there too, so the frames are consumed in the order
+they arrived (first the memory slots, then the spool).
+
+@author: taskcontroller
+"""
+
+import threading
+import time
+import numpy
+from frame_metadata import FRAME_METADATA_DTYPE
+
+
+class FrameRingBuffer:
+    ## input: int frameSize - size of one slot in bytes, int capacity - number of slots
+    def __init__(self, frameSize, capacity):
+        self.frameSize_ = int(frameSize)
+        self.capacity_ = max(1, int(capacity))
+        # all frame slots are allocated once, frames are copied into them
+        self.slots_ = numpy.zeros((self.capacity_, self.frameSize_), dtype = numpy.uint8)
+        self.lengths_ = numpy.zeros(self.capacity_, dtype = numpy.int64) # number of valid bytes in every slot
+        self.pushTimes_ = numpy.zeros(self.capacity_, dtype = numpy.float64) # time.perf_counter() when the frame was stored
+        self.metadata_ = numpy.zeros(self.capacity_, dtype = FRAME_METADATA_DTYPE) # per-frame metadata
+
+        self.head_ = 0 # index of the oldest occupied slot
+        self.count_ = 0 # number of occupied slots
+        self.overrunCnt_ = 0 # number of frames rejected because the buffer was full
+        self.spool_ = None # FrameSpool receiving frames which do not fit into memory (optional)
+        self.spooledCnt_ = 0 # number of frames written to the spool
+        self.highWaterMark_ = 0 # maximal number of frames stored at once (memory and spool)
+        # running frame counts, a frame's sequence number is the value of pushedCnt_ before it was stored
+        self.pushedCnt_ = 0 # frames stored since the buffer was created
+        self.releasedCnt_ = 0 # frames released since the buffer was created
+        # guards head_/count_ and wakes up the consumer when frames are added
+        self.lock_ = threading.Condition()
+
+    def __len__(self):
+        spool = self.spool_ # may be detached by another thread
+        return self.count_ + (spool.count_ if spool is not None else 0)
+
+    def getCapacity(self):
+        return self.capacity_
+
+    def getMemorySize(self):
+        return self.slots_.nbytes
+
+    def getOverrunCount(self):
+        return self.overrunCnt_
+
+    def resetOverrunCount(self):
+        with self.lock_:
+            self.overrunCnt_ = 0
+            self.spooledCnt_ = 0
+
+    ## output: maximal number of frames stored at once since the last reset
+    def getHighWaterMark(self):
+        return self.highWaterMark_
+
+    def resetHighWaterMark(self):
+        with self.lock_:
+            self.highWaterMark_ = len(self)
+
+    ## attaches an overflow spool (or detaches it with None); the old spool is closed.
+    #  Must not be called while the producer is running
+    def setSpool(self, spool):
+        with self.lock_:
+            oldSpool = self.spool_
+            self.spool_ = spool
+        if (oldSpool is not None) and (oldSpool is not spool):
+            oldSpool.close()
+
+    def getSpool(self):
+        return self.spool_
+
+    def getSpooledCount(self):
+        return self.spooledCnt_
+
+    ## output: number of frames stored since the buffer was created
+    def getPushedCount(self):
+        return self.pushedCnt_
+
+    ## output: number of frames released since the buffer was created (sequence number of the oldest frame)
+    def getReleasedCount(self):
+        return self.releasedCnt_
+
+    ## output: True if frames are waiting in the spool
+    def isSpooling(self):
+        spool = self.spool_
+        return (spool is not None) and (spool.count_ > 0)
+
+    ## slots of the oldest frames: the memory slots first, then the spool
+    def getReadTier(self):
+        with self.lock_:
+            spool = self.spool_
+            if (self.count_ == 0) and (spool is not None) and (spool.count_ > 0):
+                return spool
+            return self
+
+    ## copies a frame into the next free slot;
+    #  only the acquisition thread is allowed to call it
+    #  input: frame data (numpy array or bytes-like object), 
+    #         metadata - tuple of FRAME_METADATA_DTYPE fields (optional)
+    #  output: True if the frame was stored, False on overrun
+    def push(self, data, metadata = None):
+        return self.pushBatch([data], [metadata]) == 1
+
+    ## copies frames into the next free slots; the slots are reserved and published 
+    #  at once, so the consumer is woken up once per batch;
+    #  only the acquisition thread is allowed to call it
+    #  input: list of frame data (numpy arrays or bytes-like objects), 
+    #         list of metadata - tuples of FRAME_METADATA_DTYPE fields (None - no metadata)
+    #  output: number of stored frames; the frames after them were rejected (overrun)
+    def pushBatch(self, frames, metadata):
+        frameData = []
+        for data in frames:
+            if isinstance(data, numpy.ndarray):
+                data = data.reshape(-1).view(numpy.uint8)
+            else:
+                data = numpy.frombuffer(data, dtype = numpy.uint8)
+            if data.size > self.frameSize_:
+                raise ValueError('frame of %d bytes does not fit into a slot of %d bytes' % (data.size, self.frameSize_))
+            frameData.append(data)
+
+        slots = [] # (tier, slot) of every stored frame
+        with self.lock_:
+            spool = self.spool_
+            # frames go to memory as long as nothing waits in the spool, keeping the order of arrival
+            memoryFree = self.capacity_ - self.count_ if (spool is None) or (spool.count_ == 0) else 0
+            spoolFree = spool.capacity_ - spool.count_ if spool is not None else 0
+            memoryReserved = 0
+            spoolReserved = 0
+            for i in range(len(frameData)):
+                if memoryReserved < memoryFree:
+                    slots.append((self, (self.head_ + self.count_ + memoryReserved) % self.capacity_))
+                    memoryReserved += 1
+                elif spoolReserved < spoolFree:
+                    slots.append((spool, (spool.head_ + spool.count_ + spoolReserved) % spool.capacity_))
+                    spoolReserved += 1
+                else:
+                    self.overrunCnt_ += len(frameData) - i
+                    break
+            self.spooledCnt_ += spoolReserved
+
+        # the slots are invisible for the consumer until count_ is incremented,
+        # so the copy is done without holding the lock
+        pushTime = time.perf_counter()
+        for (tier, tail), data, frameMetadata in zip(slots, frameData, metadata):
+            tier.slots_[tail, :data.size] = data
+            tier.lengths_[tail] = data.size
+            tier.pushTimes_[tail] = pushTime
+            if frameMetadata is not None:
+                tier.metadata_[tail] = frameMetadata
+        if len(slots) > 0:
+            with self.lock_:
+                for tier, tail in slots:
+                    tier.count_ += 1
+                self.pushedCnt_ += len(slots)
+                stored = len(self)
+                if stored > self.highWaterMark_:
+                    self.highWaterMark_ = stored
+                self.lock_.notify()
+        return len(slots)
+
+    ## blocks the consumer until at least minFrames frames are stored, wakeUp() is called
+    #  or the timeout (in s) expires
+    #  output: number of stored frames
+    def waitForFrames(self, timeout = None, minFrames = 1):
+        with self.lock_:
+            if len(self) < minFrames:
+                self.lock_.wait(timeout)
+            return len(self)
+
+    ## wakes up the waiting consumer, e.g. to let it notice the end of capture
+    def wakeUp(self):
+        with self.lock_:
+            self.lock_.notify_all()
+
+    ## returns view of the oldest frame without removing it (or None if empty);
+    #  the view stays valid until release() is called
+    def peek(self):
+        with self.lock_:
+            tier = self.getReadTier()
+            if tier.count_ == 0:
+                return None
+            head = tier.head_
+            return tier.slots_[head, :tier.lengths_[head]]
+
+    ## returns views of up to maxFrames oldest frames (of the same tier) without removing them;
+    #  the views stay valid until release() is called
+    #  output: list of frame data, oldest first (empty if no frame is stored)
+    def peekBatch(self, maxFrames):
+        frames = []
+        with self.lock_:
+            tier = self.getReadTier()
+            for i in range(min(maxFrames, tier.count_)):
+                slot = (tier.head_ + i) % tier.capacity_
+                frames.append(tier.slots_[slot, :tier.lengths_[slot]])
+        return frames
+
+    ## tier and slot of a stored frame, counted across the memory slots and the spool
+    #  input: int index - 0 for the oldest frame, less than len()
+    def getSlot(self, index):
+        with self.lock_:
+            if index < self.count_:
+                return self, (self.head_ + index) % self.capacity_
+            spool = self.spool_
+            if (spool is None) or (index - self.count_ >= spool.count_):
+                raise IndexError('frame %d is not stored in the buffer' % index)
+            return spool, (spool.head_ + index - self.count_) % spool.capacity_
+
+    ## returns time.perf_counter() value when the frame (index 0 - the oldest one) was stored
+    def peekPushTime(self, index = 0):
+        tier, slot = self.getSlot(index)
+        return tier.pushTimes_[slot]
+
+    ## returns metadata record of the frame (index 0 - the oldest one), valid until release() is called
+    def peekMetadata(self, index = 0):
+        tier, slot = self.getSlot(index)
+        return tier.metadata_[slot]
+
+    ## frees the oldest slots after their frames were processed
+    #  input: int count - number of frames (returned by peek or peekBatch)
+    def release(self, count = 1):
+        with self.lock_:
+            tier = self.getReadTier() # the spool is taken under the lock
+            count = min(count, tier.count_)
+            tier.head_ = (tier.head_ + count) % tier.capacity_
+            tier.count_ -= count
+            self.releasedCnt_ += count
+
+    ## frees the oldest frames of all tiers without processing them
+    #  input: int count - number of frames (nothing is done if count <= 0)
+    def discard(self, count):
+        while (count > 0) and (len(self) > 0):
+            released = min(count, self.getReadTier().count_)
+            self.release(released)
+            count -= released
+
+    ## drops all stored frames; must not be called while the producer is running
+    def clear(self):
+        with self.lock_:
+            self.releasedCnt_ = self.pushedCnt_
+            self.head_ = 0
+            self.count_ = 0
+            if self.spool_ is not None:
+                self.spool_.clear()
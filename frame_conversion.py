@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 11:08:36 2026
+
+frame_conversion defines FrameConverter, the conversion of raw camera frames into
+another pixel format (debayering, colour space conversion), and the pool of
+conversion workers shared by all cameras.
+
+The acquisition thread only copies the raw buffers sent by the camera. The
+processing thread converts every batch of frames for the writer on the workers
+(the results are in frame order), and the newest frame is converted for display
+on a worker as well, so costly conversions (e.g. HQ_LINEAR) no longer slow down
+the thread which must keep up with the camera.
+
+@author: taskcontroller
+"""
+
+import os
+import threading
+import concurrent.futures
+import PySpin
+
+# number of conversion workers shared by all cameras
+CONVERSION_WORKERS = max(2, (os.cpu_count() or 2)//2)
+
+conversionPool = None
+conversionPoolLock = threading.Lock()
+
+## output: the pool of conversion workers (created on first use)
+def getConversionPool():
+    global conversionPool
+    with conversionPoolLock:
+        if conversionPool == None:
+            conversionPool = concurrent.futures.ThreadPoolExecutor(CONVERSION_WORKERS, thread_name_prefix = 'conversion')
+        return conversionPool
+
+
+class FrameConverter:
+    ## input: int width, int height, sourcePixelFormat - PySpin pixel format of the raw frames,
+    #         targetPixelFormat - PySpin pixel format to convert to, colorProcessing - PySpin color processing algorithm
+    def __init__(self, width, height, sourcePixelFormat, targetPixelFormat, colorProcessing = PySpin.HQ_LINEAR):
+        self.width_ = width
+        self.height_ = height
+        self.sourcePixelFormat_ = sourcePixelFormat
+        self.targetPixelFormat_ = targetPixelFormat
+        self.colorProcessing_ = colorProcessing
+
+    ## output: False if the frames are used as they are
+    def isNeeded(self):
+        return self.sourcePixelFormat_ != self.targetPixelFormat_
+
+    ## input: raw frame data (numpy array or bytes-like object)
+    #  output: frame data in the target pixel format
+    def convert(self, data):
+        if not self.isNeeded():
+            return data
+        image = PySpin.Image.Create(self.width_, self.height_, 0, 0, self.sourcePixelFormat_, data)
+        return image.Convert(self.targetPixelFormat_, self.colorProcessing_).GetData()
+
+    ## converts frames in parallel on the conversion workers
+    #  input: list of raw frame data
+    #  output: list of converted frame data in the order of the input
+    def convertBatch(self, frames):
+        if (not self.isNeeded()) or (len(frames) == 0):
+            return frames
+        if len(frames) == 1:
+            return [self.convert(frames[0])]
+        return list(getConversionPool().map(self.convert, frames))
+
+    ## converts a frame on a conversion worker
+    #  output: concurrent.futures.Future of the converted frame data
+    def submit(self, data):
+        return getConversionPool().submit(self.convert, data)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:15:03 2026
+
+frame_metadata defines the per-frame metadata stored next to every recording
+(a "sidecar" file) and the functions for writing and loading it.
+
+File layout: 8 bytes of magic, uint32 offset of the records, uint32 length of
+a json header describing the schema and the stream, the json header itself,
+zero padding up to the offset, then fixed-width records of FRAME_METADATA_DTYPE.
+The records can be read with numpy.fromfile or numpy.memmap using the offset.
+
+@author: taskcontroller
+"""
+
+import json
+import struct
+import numpy
+
+METADATA_MAGIC = b'MCAMETA\x00'
+METADATA_VERSION = 3
+METADATA_FILE_EXTENSION = '.frames'
+# records start at a multiple of this offset
+HEADER_ALIGNMENT = 4096
+
+# one record per written frame, in the order of the frames in the video file
+FRAME_METADATA_DTYPE = numpy.dtype([
+    ('frameId', '<u8'),          # FrameID reported by the camera
+    ('deviceTimestamp', '<u8'),  # camera timestamp in ns
+    ('hostTimestamp', '<f8'),    # time.time() when the frame was received by the host, in s
+    ('exposureTime', '<f4'),     # in microseconds
+    ('gain', '<f4'),             # in dB
+    ('lineStatus', '<u4'),       # state of the camera I/O lines (bit per line) at the end of exposure
+    ('settingsSequence', '<u4'), # sequence number of the last live setting change applied before the frame (0 - none)
+    ('motion', '<f4'),           # activity measured by the motion gate (see motion_gate, 0 - not measured)
+])
+
+
+## writes metadata records of a recording; used by the processing thread only
+class FrameMetadataWriter:
+    ## input: string filename, dictionary header - description of the stream (json serializable)
+    def __init__(self, filename, header):
+        self.filename_ = filename
+        header = dict(header)
+        header['version'] = METADATA_VERSION
+        header['dtype'] = [list(field) for field in FRAME_METADATA_DTYPE.descr]
+        headerData = json.dumps(header).encode('utf-8')
+        prefixSize = len(METADATA_MAGIC) + 8
+        dataOffset = -(-(prefixSize + len(headerData)) // HEADER_ALIGNMENT)*HEADER_ALIGNMENT
+
+        # large buffer: records are written in batches without blocking on the disk
+        self.file_ = open(filename, 'wb', buffering = 1024*1024)
+        self.file_.write(METADATA_MAGIC)
+        self.file_.write(struct.pack('<II', dataOffset, len(headerData)))
+        self.file_.write(headerData)
+        self.file_.write(b'\x00'*(dataOffset - prefixSize - len(headerData)))
+        self.recordsCnt_ = 0
+
+    ## input: numpy array of FRAME_METADATA_DTYPE
+    def write(self, records):
+        self.file_.write(records.tobytes())
+        self.recordsCnt_ += len(records)
+
+    def close(self):
+        if self.file_ != None:
+            self.file_.close()
+            self.file_ = None
+
+
+## reads the header of a metadata file
+#  output: dictionary header, int offset of the records
+def loadFrameMetadataHeader(filename):
+    with open(filename, 'rb') as metadataFile:
+        if metadataFile.read(len(METADATA_MAGIC)) != METADATA_MAGIC:
+            raise ValueError('%s is not a frame metadata file' % filename)
+        dataOffset, headerSize = struct.unpack('<II', metadataFile.read(8))
+        header = json.loads(metadataFile.read(headerSize).decode('utf-8'))
+    return header, dataOffset
+
+
+## loads all records of a metadata file
+#  input: string filename, bool memoryMap - map the file instead of reading it
+#  output: dictionary header, numpy array (or memmap) of records
+def loadFrameMetadata(filename, memoryMap = False):
+    header, dataOffset = loadFrameMetadataHeader(filename)
+    dtype = numpy.dtype([tuple(field) for field in header['dtype']])
+    if memoryMap:
+        records = numpy.memmap(filename, dtype = dtype, mode = 'r', offset = dataOffset)
+    else:
+        records = numpy.fromfile(filename, dtype = dtype, offset = dataOffset)
+    return header, records
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:08:51 2026
+
+frame_spool defines FrameSpool, the overflow tier of FrameRingBuffer: a circular
+buffer of frame slots in a memory-mapped file on a (fast, local) disk. Frames
+which do not fit into the memory buffer are written to it and read back by the
+processing thread in the same order once it catches up. The file is temporary
+and is removed when the spool is closed.
+
+FrameSpool has the same slot layout as FrameRingBuffer (slots_, lengths_,
+pushTimes_, metadata_, head_, count_); its state is guarded by the lock of the
+FrameRingBuffer it belongs to.
+
+@author: taskcontroller
+"""
+
+import os
+import gc
+import shutil
+import tempfile
+import numpy
+from frame_metadata import FRAME_METADATA_DTYPE
+
+SPOOL_FILE_PREFIX = 'frame_spool_'
+SPOOL_FILE_EXTENSION = '.spool'
+# fraction of the free disk space a spool may occupy
+MAX_DISK_FRACTION = 0.9
+
+
+class FrameSpool:
+    ## input: string directory - where the spool file is created, int frameSize - size of one slot in bytes,
+    #         int capacity - number of slots
+    def __init__(self, directory, frameSize, capacity):
+        self.frameSize_ = int(frameSize)
+        self.capacity_ = max(1, int(capacity))
+        fileHandle, self.filename_ = tempfile.mkstemp(prefix = SPOOL_FILE_PREFIX, suffix = SPOOL_FILE_EXTENSION, dir = directory)
+        os.close(fileHandle)
+        # pages are written back by the operating system, only the touched slots occupy the disk
+        self.slots_ = numpy.memmap(self.filename_, dtype = numpy.uint8, mode = 'w+', shape = (self.capacity_, self.frameSize_))
+        self.lengths_ = numpy.zeros(self.capacity_, dtype = numpy.int64)
+        self.pushTimes_ = numpy.zeros(self.capacity_, dtype = numpy.float64)
+        self.metadata_ = numpy.zeros(self.capacity_, dtype = FRAME_METADATA_DTYPE)
+        self.head_ = 0
+        self.count_ = 0
+
+    ## number of frames which fit into the spool
+    #  input: string directory, int frameSize (in bytes), float seconds - stall to be bridged, float fps
+    #  output: int number of slots limited by the free disk space (0 if the spool cannot be created)
+    @staticmethod
+    def capacityFor(directory, frameSize, seconds, fps):
+        try:
+            freeSpace = shutil.disk_usage(directory).free
+        except OSError as ex:
+            print('Unable to use %s for the frame spool: %s' % (directory, ex))
+            return 0
+        return int(min(seconds*fps, freeSpace*MAX_DISK_FRACTION // frameSize))
+
+    def __len__(self):
+        return self.count_
+
+    def getCapacity(self):
+        return self.capacity_
+
+    def getDiskSize(self):
+        return self.capacity_*self.frameSize_
+
+    ## drops all stored frames
+    def clear(self):
+        self.head_ = 0
+        self.count_ = 0
+
+    ## unmaps and removes the spool file
+    def close(self):
+        if self.slots_ is None:
+            return
+        self.slots_ = None
+        gc.collect() # release views of the memory map before the file is removed (required on Windows)
+        try:
+            os.remove(self.filename_)
+        except OSError as ex:
+            print('Unable to remove the frame spool %s: %s' % (self.filename_, ex))
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:52:30 2026
+
+frame_sync builds a synchronisation index of a multi-camera session: a table
+whose rows are moments in time and whose columns are the cameras, holding the
+number of the frame (in the video file) every camera took at that moment, or -1
+if the camera has no frame for it (dropped or unmatched).
+
+Device timestamps of every camera are mapped to the common host clock by a
+linear fit (which removes clock offset and drift), the constant offset between
+the cameras is removed, and the frames are matched to the nearest neighbour
+within a tolerance. Everything is vectorised with numpy.
+
+Usage: python frame_sync.py <video>.frames [<video>.frames ...] -o session.sync.npz
+
+@author: taskcontroller
+"""
+
+import argparse
+import numpy
+from frame_metadata import loadFrameMetadata
+
+# frames further apart than this fraction of the frame period are not matched
+DEFAULT_TOLERANCE = 0.5
+
+
+## maps device timestamps of one camera to the host clock
+#  input: numpy array of FRAME_METADATA_DTYPE records
+#  output: numpy array of times in s (host clock) of every frame
+def deviceToHostTime(records):
+    hostTime = records['hostTimestamp'].astype(numpy.float64)
+    deviceTime = records['deviceTimestamp'].astype(numpy.float64)*1e-9
+    if (len(records) < 2) or (not numpy.all(numpy.diff(deviceTime) > 0)):
+        return hostTime # device timestamps missing or restarted: only host time is usable
+    deviceTime -= deviceTime[0]
+    slope, intercept = numpy.polyfit(deviceTime, hostTime, 1)
+    # host times are delayed by the transport and the acquisition thread, but never early:
+    # refit on the earlier half of the frames to follow the lower envelope
+    residual = hostTime - (slope*deviceTime + intercept)
+    early = residual <= numpy.median(residual)
+    if numpy.count_nonzero(early) >= 2:
+        slope, intercept = numpy.polyfit(deviceTime[early], hostTime[early], 1)
+    return slope*deviceTime + intercept
+
+
+## finds for every row time the nearest frame of a camera
+#  input: sorted numpy arrays rowTimes and frameTimes, float tolerance (in s)
+#  output: numpy array with the frame index for every row (-1 if no frame within tolerance),
+#          every frame is assigned to one row at most
+def matchFrames(rowTimes, frameTimes, tolerance):
+    if len(frameTimes) == 0:
+        return numpy.full(len(rowTimes), -1, dtype = numpy.int64)
+    position = numpy.searchsorted(frameTimes, rowTimes)
+    left = numpy.clip(position - 1, 0, len(frameTimes) - 1)
+    right = numpy.clip(position, 0, len(frameTimes) - 1)
+    leftDistance = numpy.abs(rowTimes - frameTimes[left])
+    rightDistance = numpy.abs(frameTimes[right] - rowTimes)
+    nearest = numpy.where(rightDistance < leftDistance, right, left)
+    distance = numpy.minimum(leftDistance, rightDistance)
+    match = numpy.where(distance <= tolerance, nearest, -1)
+
+    # if several rows got the same frame, keep only the closest one
+    order = numpy.lexsort((distance, match))
+    sortedMatch = match[order]
+    duplicate = numpy.zeros(len(match), dtype = bool)
+    duplicate[1:] = (sortedMatch[1:] == sortedMatch[:-1]) & (sortedMatch[1:] >= 0)
+    match[order[duplicate]] = -1
+    return match
+
+
+## result of the alignment of a session
+class SyncIndex:
+    def __init__(self, cameraNames, frameIndex, rowTimes, offsets, jitter, unmatched):
+        self.cameraNames_ = list(cameraNames)
+        self.frameIndex_ = frameIndex # int64 array (rows x cameras), -1 where a camera has no frame
+        self.rowTimes_ = rowTimes     # host time (in s) of every row
+        self.offsets_ = offsets       # constant offset of every camera relative to the first rows (in s)
+        self.jitter_ = jitter         # residual timing error of matched frames per camera: (std, max) in s
+        self.unmatched_ = unmatched   # number of rows without a frame per camera
+
+    ## output: rows (frame index tuples) where all cameras have a frame
+    def getCompleteRows(self):
+        return self.frameIndex_[numpy.all(self.frameIndex_ >= 0, axis = 1)]
+
+    def save(self, filename):
+        numpy.savez(filename, frameIndex = self.frameIndex_, rowTimes = self.rowTimes_,
+                    cameraNames = numpy.array(self.cameraNames_), offsets = self.offsets_,
+                    jitter = numpy.array(self.jitter_), unmatched = numpy.array(self.unmatched_))
+
+    def printReport(self):
+        print('%d rows, %d with frames of all %d cameras' % (len(self.frameIndex_), len(self.getCompleteRows()), len(self.cameraNames_)))
+        for i, name in enumerate(self.cameraNames_):
+            print('%s: %d frames, %d rows without frame, offset %.3f ms, jitter std %.3f ms, max %.3f ms'
+                  % (name, numpy.count_nonzero(self.frameIndex_[:, i] >= 0), self.unmatched_[i],
+                     self.offsets_[i]*1e3, self.jitter_[i][0]*1e3, self.jitter_[i][1]*1e3))
+
+
+## aligns frames of several cameras
+#  input: list of numpy arrays with frame times (in s, common clock) of every camera,
+#         list of camera names, float tolerance - as fraction of the frame period
+#  output: SyncIndex
+def buildSyncIndex(cameraTimes, cameraNames, tolerance = DEFAULT_TOLERANCE):
+    nCameras = len(cameraTimes)
+    cameraTimes = [numpy.asarray(times, dtype = numpy.float64) for times in cameraTimes]
+    # the camera with the most frames defines the initial rows
+    order = sorted(range(nCameras), key = lambda i: -len(cameraTimes[i]))
+    reference = order[0]
+    rowTimes = cameraTimes[reference].copy()
+    periods = numpy.diff(rowTimes)
+    framePeriod = numpy.median(periods) if len(periods) > 0 else 1.0
+    maxDistance = tolerance*framePeriod
+
+    columns = [None]*nCameras
+    columns[reference] = numpy.arange(len(rowTimes), dtype = numpy.int64)
+    offsets = numpy.zeros(nCameras)
+    for camera in order[1:]:
+        frameTimes = cameraTimes[camera]
+        # remove the constant offset (e.g. different latency of the host timestamps)
+        nearest = matchFrames(rowTimes, frameTimes, numpy.inf)
+        if numpy.any(nearest >= 0):
+            offsets[camera] = numpy.median(frameTimes[nearest[nearest >= 0]] - rowTimes[nearest >= 0])
+        frameTimes = frameTimes - offsets[camera]
+        match = matchFrames(rowTimes, frameTimes, maxDistance)
+
+        # frames matching no row (e.g. the reference dropped them) become new rows
+        used = numpy.zeros(len(frameTimes), dtype = bool)
+        used[match[match >= 0]] = True
+        newFrames = numpy.flatnonzero(~used)
+        rowTimes = numpy.concatenate((rowTimes, frameTimes[newFrames]))
+        for other in range(nCameras):
+            if columns[other] is not None:
+                columns[other] = numpy.concatenate((columns[other], numpy.full(len(newFrames), -1, dtype = numpy.int64)))
+        columns[camera] = numpy.concatenate((match, newFrames))
+        rowOrder = numpy.argsort(rowTimes, kind = 'mergesort')
+        rowTimes = rowTimes[rowOrder]
+        for other in range(nCameras):
+            if columns[other] is not None:
+                columns[other] = columns[other][rowOrder]
+
+    frameIndex = numpy.stack(columns, axis = 1) if nCameras > 0 else numpy.zeros((0, 0), dtype = numpy.int64)
+
+    # residual jitter: deviation of matched frames from the row time, after offset removal
+    jitter = []
+    unmatched = []
+    for camera in range(nCameras):
+        matched = frameIndex[:, camera] >= 0
+        deviation = cameraTimes[camera][frameIndex[matched, camera]] - offsets[camera] - rowTimes[matched]
+        deviation -= numpy.median(deviation) if len(deviation) > 0 else 0
+        jitter.append((float(numpy.std(deviation)) if len(deviation) > 0 else 0.0,
+                       float(numpy.max(numpy.abs(deviation))) if len(deviation) > 0 else 0.0))
+        unmatched.append(int(numpy.count_nonzero(~matched)))
+    return SyncIndex(cameraNames, frameIndex, rowTimes, offsets, jitter, unmatched)
+
+
+## aligns recordings of a session from their metadata files
+#  input: list of metadata file names (frame_metadata), float tolerance
+#  output: SyncIndex
+def buildSyncIndexFromFiles(metadataFiles, tolerance = DEFAULT_TOLERANCE):
+    cameraTimes = []
+    cameraNames = []
+    for filename in metadataFiles:
+        header, records = loadFrameMetadata(filename)
+        cameraTimes.append(deviceToHostTime(records))
+        cameraNames.append(str(header.get('camera', filename)))
+    return buildSyncIndex(cameraTimes, cameraNames, tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Builds the frame synchronisation index of a multi-camera session')
+    parser.add_argument('metadataFiles', nargs = '+', help = 'frame metadata files (.frames) of the session')
+    parser.add_argument('-o', '--output', default = 'session.sync.npz', help = 'output file (numpy .npz)')
+    parser.add_argument('--tolerance', type = float, default = DEFAULT_TOLERANCE,
+                        help = 'maximal distance of matched frames as fraction of the frame period')
+    args = parser.parse_args()
+
+    syncIndex = buildSyncIndexFromFiles(args.metadataFiles, args.tolerance)
+    syncIndex.printReport()
+    syncIndex.save(args.output)
+    print('Synchronisation index saved to %s' % args.output)
+
+if __name__ == '__main__':
+    main()
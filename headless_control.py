@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 10:05:19 2026
+
+headless_control defines HeadlessControl, the console counterpart of
+main_control_window.VideoAcquisitionControl for recording nodes without a
+monitor. No windows are created and neither wx nor PIL is imported: cameras are
+initialised with the settings of the ini file, acquisition and (by default)
+recording start at once, and everything is stopped on Ctrl+C, on SIGTERM (e.g.
+from a service manager) or when the given duration has elapsed. Camera settings
+edited in the ini file while running are applied to the changed cameras.
+
+Commands typed on the console: r - start/stop recording, q - quit,
+set <camera index> <fps|exposure|gain|xFlip|yFlip> <value> - change a setting
+while streaming (the applied value is read back and printed).
+
+@author: taskcontroller
+"""
+
+import sys
+import time
+import signal
+import threading
+from SpinnakerControl import SpinnakerControl
+from acquisition_ini import getAcquisitionINI
+import telemetry
+from telemetry import Verbosity
+
+class HeadlessControl:
+    # maximal time (in s) between checks of the stop conditions
+    POLL_PERIOD = 0.5
+    # maximal time (in s) to wait for the confirmation of a setting change
+    SETTING_TIMEOUT = 2.0
+
+    def __init__(self, verbosity = Verbosity.SUMMARY, latencyReportFile = None, memoryBudget = None):
+        self.videoControl_ = SpinnakerControl(verbosity, latencyReportFile, memoryBudget, headless = True)
+        self.iniFile_ = getAcquisitionINI()
+        self.numCameras_ = 0
+        self.recordingOn_ = False
+        self.acquisitionOn_ = False
+        self.stopEvent_ = threading.Event() # set when the application should quit
+
+    ## initialises the cameras and starts acquisition
+    #  output: number of cameras (<= 0 on error)
+    def launch(self):
+        launchStart = time.perf_counter()
+        self.numCameras_ = self.videoControl_.initCameras()
+        if self.numCameras_ > 0:
+            self.videoControl_.loadSettings(self.iniFile_)
+            self.videoControl_.startAcquisition()
+            self.acquisitionOn_ = True
+        telemetry.startupTimer.record('launch (total)', time.perf_counter() - launchStart)
+        telemetry.startupTimer.printSummary()
+        return self.numCameras_
+
+    def startRecording(self):
+        if not self.recordingOn_:
+            self.videoControl_.startRecording()
+            self.recordingOn_ = True
+            print('Recording started')
+
+    def stopRecording(self):
+        if self.recordingOn_:
+            self.videoControl_.stopRecording()
+            self.recordingOn_ = False
+            print('Recording stopped')
+
+    ## signal handler, asks the main loop to quit
+    def requestStop(self, signalNumber = None, frame = None):
+        self.stopEvent_.set()
+
+    ## changes a setting of a streaming camera and prints the value read back from it
+    #  input: list of strings arguments - camera index, setting name, value
+    def changeSetting(self, arguments):
+        try:
+            index, name, value = int(arguments[0]), arguments[1], arguments[2]
+            if name not in ('xFlip', 'yFlip'):
+                value = float(value)
+            sequence = self.videoControl_.changeSetting(index, name, value)
+        except (IndexError, ValueError) as ex:
+            print('Usage: set <camera index> <fps|exposure|gain|xFlip|yFlip> <value> (%s)' % ex)
+            return
+        if sequence < 0:
+            print('No camera %d' % index)
+            return
+        confirmation = self.videoControl_.waitForSetting(index, sequence, self.SETTING_TIMEOUT)
+        if confirmation == None:
+            print('Change #%d of %s not applied yet' % (sequence, name))
+        elif confirmation.result != 0:
+            print('Change #%d of %s to %s failed, current value: %s' % (sequence, name, value, confirmation.applied))
+        else:
+            print('Change #%d: %s set to %s from frame %s' % (sequence, name, confirmation.applied, confirmation.frameId))
+
+    ## reads commands from the console until it is closed (e.g. when running as a service)
+    def readCommands(self):
+        for line in sys.stdin:
+            words = line.split()
+            if (len(words) > 0) and (words[0].lower() == 'set'):
+                self.changeSetting(words[1:])
+                continue
+            command = line.strip().lower()
+            if command == 'r':
+                if self.recordingOn_:
+                    self.stopRecording()
+                else:
+                    self.startRecording()
+            elif command == 'q':
+                self.requestStop()
+                return
+            elif command != '':
+                print('Unknown command %s (r - start/stop recording, q - quit, set - change a setting)' % command)
+
+    ## runs until a stop is requested
+    #  input: float duration - time (in s) after which the application quits (None - no limit),
+    #         bool recordOnStart - whether recording starts together with acquisition
+    #  output: 0 on success, -1 if no camera could be started
+    def run(self, duration = None, recordOnStart = True):
+        signal.signal(signal.SIGINT, self.requestStop)
+        signal.signal(signal.SIGTERM, self.requestStop)
+        if self.launch() <= 0:
+            print('No cameras started, quitting')
+            self.close()
+            return -1
+        if recordOnStart:
+            self.startRecording()
+        threading.Thread(target = self.readCommands, daemon = True).start()
+
+        endTime = time.perf_counter() + duration if duration != None else None
+        # short waits keep Ctrl+C responsive on every platform
+        while not self.stopEvent_.wait(self.POLL_PERIOD):
+            if (endTime != None) and (time.perf_counter() >= endTime):
+                break
+            # apply settings edited in the ini file while running
+            self.videoControl_.reloadSettings(self.iniFile_)
+        self.close()
+        return 0
+
+    ## stops recording and acquisition and releases the cameras
+    def close(self):
+        self.stopRecording()
+        if self.acquisitionOn_:
+            self.videoControl_.stopAcquisition()
+            self.acquisitionOn_ = False
+        if self.videoControl_.camList_ != None:
+            self.videoControl_.close()
+        print('Acquisition closed.')
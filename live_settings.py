@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 10:41:27 2026
+
+live_settings defines LiveSettingsQueue, the per-camera queue of setting changes
+(frame rate, exposure, gain, flips) requested from any thread while the camera
+is streaming. The acquisition thread applies queued commands between two frames,
+so the camera is never configured concurrently with GetNextImage and the stream
+does not have to be restarted.
+
+Every command gets a sequence number. Frames grabbed after a command was applied
+carry its number in the settingsSequence field of their metadata, and the
+confirmation of the command reports the value read back from the camera and the
+id of the first frame grabbed with it. Frames already waiting in the driver
+buffers may have been exposed before the change; with chunk data the actual
+exposure time and gain of every frame are in its metadata as well.
+
+@author: taskcontroller
+"""
+
+import threading
+import collections
+from collections import namedtuple
+
+# settings which can be changed while streaming (names of CameraProperties fields)
+LIVE_SETTINGS = ('fps', 'exposure', 'gain', 'xFlip', 'yFlip')
+
+## a requested change, sequence numbers start at 1 (0 in the metadata - no change applied yet)
+SettingCommand = namedtuple('SettingCommand', ['sequence', 'name', 'value'])
+
+## result of a command: requested and read-back value, id of the first frame grabbed
+#  after the change (None if the camera was not streaming) and the result of the setter (0 - success)
+SettingConfirmation = namedtuple('SettingConfirmation', ['sequence', 'name', 'requested', 'applied', 'frameId', 'result'])
+
+
+class LiveSettingsQueue:
+    # number of confirmations kept for getConfirmation
+    CONFIRMATIONS_KEPT = 256
+
+    def __init__(self):
+        self.commands_ = collections.deque()
+        self.lock_ = threading.Lock()
+        self.confirmed_ = threading.Condition(self.lock_)
+        self.nextSequence_ = 1
+        self.confirmations_ = collections.OrderedDict() # SettingConfirmation by sequence number
+
+    ## queues a change; called from any thread
+    #  input: string name - one of LIVE_SETTINGS, value - new value
+    #  output: int sequence number of the command
+    def submit(self, name, value):
+        if name not in LIVE_SETTINGS:
+            raise ValueError('%s cannot be changed while streaming (only %s)' % (name, ', '.join(LIVE_SETTINGS)))
+        with self.lock_:
+            sequence = self.nextSequence_
+            self.nextSequence_ += 1
+            self.commands_.append(SettingCommand(sequence, name, value))
+        return sequence
+
+    ## cheap check done by the acquisition thread before every grab
+    def hasPending(self):
+        return len(self.commands_) > 0
+
+    ## output: list of SettingCommand queued so far, in the order of submission
+    def takePending(self):
+        with self.lock_:
+            commands = list(self.commands_)
+            self.commands_.clear()
+        return commands
+
+    ## input: SettingConfirmation
+    def confirm(self, confirmation):
+        with self.lock_:
+            self.confirmations_[confirmation.sequence] = confirmation
+            while len(self.confirmations_) > self.CONFIRMATIONS_KEPT:
+                self.confirmations_.popitem(last = False)
+            self.confirmed_.notify_all()
+
+    ## output: SettingConfirmation of the command or None if it was not confirmed (yet)
+    def getConfirmation(self, sequence):
+        with self.lock_:
+            return self.confirmations_.get(sequence)
+
+    ## waits until the command is confirmed
+    #  input: int sequence, float timeout - in s (None - no limit)
+    #  output: SettingConfirmation or None on timeout
+    def waitForConfirmation(self, sequence, timeout = None):
+        with self.lock_:
+            self.confirmed_.wait_for(lambda: sequence in self.confirmations_, timeout)
+            return self.confirmations_.get(sequence)
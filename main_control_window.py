@@ -9,7 +9,10 @@ from it VideoAcquisitionControl, a window for controlling acquisition and record
 """
 
 from SpinnakerControl import SpinnakerControl
-from acquisition_ini import AcquisitionINI
+from acquisition_ini import getAcquisitionINI
+import telemetry
+from telemetry import Verbosity
+import time
 
 import wx
 
@@ -67,25 +70,34 @@ class MainWindow(wx.Frame):
 
 
 class VideoAcquisitionControl(MainWindow):
-    def __init__(self, title):
+    # period (in ms) of checking the ini file for changes
+    RELOAD_PERIOD = 1000
+
+    def __init__(self, title, verbosity = Verbosity.SUMMARY, latencyReportFile = None, memoryBudget = None, mosaic = False):
         #app = wx.App(redirect=True)
         super().__init__(title)
-        self.videoControl_ = SpinnakerControl()  
-        self.iniFile_ = AcquisitionINI()
+        self.videoControl_ = SpinnakerControl(verbosity, latencyReportFile, memoryBudget, mosaic = mosaic)  
+        self.iniFile_ = getAcquisitionINI()
         self.numCameras_ = 0 
         self.recordingOn_ = False
         self.acquisitionOn_ = False
+        # checks the ini file for changes made while running
+        self.reloadTimer_ = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onReloadTimer, self.reloadTimer_)
 
        
     def launch(self): 
-        self.iniFile_.load()
+        launchStart = time.perf_counter()
         self.numCameras_ = self.videoControl_.initCameras() 
         if self.numCameras_ > 0:            
             self.loadSettings()
             self.videoControl_.startAcquisition()
             self.acquisitionOn_ = True
+            self.reloadTimer_.Start(self.RELOAD_PERIOD)
         else:
             self.recordingBtn_.Disable()
+        telemetry.startupTimer.record('launch (total)', time.perf_counter() - launchStart)
+        telemetry.startupTimer.printSummary()
          
                   
     #def onToggleAquisition(self):        
@@ -107,6 +119,7 @@ class VideoAcquisitionControl(MainWindow):
      
     def onClose(self, event):        
         if super().onClose(event):   # if we really need to close      
+            self.reloadTimer_.Stop()
             if self.recordingOn_:
                 self.videoControl_.stopRecording() 
             if self.acquisitionOn_:
@@ -117,11 +130,8 @@ class VideoAcquisitionControl(MainWindow):
             print("Main window closed.")
 
     def loadSettings(self):          
-        for i in range(0,self.numCameras_):
-            print('DEBUG: self.videoControl_.names_[i] : %s' % self.videoControl_.names_[i] ) 
-            cameraName = self.videoControl_.names_[i]
-            cameraProperties = self.iniFile_.getCameraProperties(cameraName)
-            displayProperties = self.iniFile_.getDisplayProperties(cameraName)
-            captureProperties = self.iniFile_.getCaptureProperties(cameraName)
-            triggerProperties = self.iniFile_.getTriggerProperties(cameraName)
-            self.videoControl_.setParameters(i, cameraProperties, displayProperties, captureProperties, triggerProperties)              
\ No newline at end of file
+        self.videoControl_.loadSettings(self.iniFile_)
+
+    ## applies settings edited in the ini file while running (on the GUI thread, as windows may be resized)
+    def onReloadTimer(self, event):
+        self.videoControl_.reloadSettings(self.iniFile_)              
\ No newline at end of file
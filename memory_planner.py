@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:34:18 2026
+
+memory_planner computes how much memory the frame buffers of the cameras may
+occupy. It keeps headroom for the operating system and for the encoder of every
+camera, limits the rest to a configurable budget and splits it across the
+cameras; the result is a BufferPlan (bytes, frames and seconds of buffering)
+per camera.
+
+Available memory is queried with psutil if it is installed, otherwise with the
+native interface of the platform (GlobalMemoryStatusEx on Windows,
+/proc/meminfo on Linux, sysconf elsewhere).
+
+@author: taskcontroller
+"""
+
+import os
+import sys
+import ctypes
+from collections import namedtuple
+
+# fraction of the available memory left to the operating system (file cache, other processes)
+OS_RESERVE_FRACTION = 0.1
+# the operating system keeps at least this many bytes
+MIN_OS_RESERVE = 1024**3
+# bytes kept per camera for the encoder, the converted frames and the display
+ENCODER_RESERVE = 256*1024**2
+# minimal number of frames of every buffer, even if the budget is exceeded
+MIN_BUFFER_FRAMES = 16
+
+# buffer assigned to a single camera
+# name - camera name, frameSize - slot size in bytes, frames - capacity in frames,
+# bytes - memory of the buffer, seconds - time the buffer bridges at the camera frame rate
+BufferPlan = namedtuple('BufferPlan', 'name frameSize frames bytes seconds')
+
+
+# class for checking available memory on Windows
+class MEMORYSTATUSEX(ctypes.Structure):
+    _fields_ = [
+        ("dwLength", ctypes.c_ulong),
+        ("dwMemoryLoad", ctypes.c_ulong),
+        ("ullTotalPhys", ctypes.c_ulonglong),
+        ("ullAvailPhys", ctypes.c_ulonglong),
+        ("ullTotalPageFile", ctypes.c_ulonglong),
+        ("ullAvailPageFile", ctypes.c_ulonglong),
+        ("ullTotalVirtual", ctypes.c_ulonglong),
+        ("ullAvailVirtual", ctypes.c_ulonglong),
+        ("sullAvailExtendedVirtual", ctypes.c_ulonglong)
+    ]
+
+    def __init__(self):
+        # have to initialize this to the size of MEMORYSTATUSEX
+        self.dwLength = ctypes.sizeof(self)
+        super(MEMORYSTATUSEX, self).__init__()
+
+
+## output: available physical memory in bytes, 0 if it cannot be determined
+def getAvailableSystemMemory():
+    try:
+        import psutil
+        return int(psutil.virtual_memory().available)
+    except ImportError:
+        pass
+
+    if sys.platform.startswith('win'):
+        status = MEMORYSTATUSEX()
+        ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+        return int(status.ullAvailPhys)
+
+    try:
+        # MemAvailable includes the reclaimable file cache, unlike MemFree
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES')*os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+class MemoryPlanner:
+    ## input: memoryBudget - upper limit (in bytes) for all frame buffers together,
+    #         None to use all the memory left after the reserves
+    def __init__(self, memoryBudget = None, osReserveFraction = OS_RESERVE_FRACTION,
+                 minOsReserve = MIN_OS_RESERVE, encoderReserve = ENCODER_RESERVE):
+        self.memoryBudget_ = memoryBudget
+        self.osReserveFraction_ = osReserveFraction
+        self.minOsReserve_ = minOsReserve
+        self.encoderReserve_ = encoderReserve
+
+    def setMemoryBudget(self, memoryBudget):
+        self.memoryBudget_ = memoryBudget
+
+    ## memory which may be used by the frame buffers of all cameras
+    #  input: int nCameras, availableMemory (in bytes, queried if None)
+    #  output: int number of bytes
+    def getBufferMemory(self, nCameras, availableMemory = None):
+        if availableMemory == None:
+            availableMemory = getAvailableSystemMemory()
+        osReserve = max(self.minOsReserve_, int(availableMemory*self.osReserveFraction_))
+        usable = max(0, availableMemory - osReserve - nCameras*self.encoderReserve_)
+        if self.memoryBudget_ != None:
+            if self.memoryBudget_ > usable:
+                print('Memory budget of %.2f GB exceeds the available %.2f GB, the budget is reduced'
+                      % (self.memoryBudget_/1024.0**3, usable/1024.0**3))
+            usable = min(usable, int(self.memoryBudget_))
+        return usable
+
+    ## splits the buffer memory across the cameras
+    #  for every stream i: weight[i] = frameSize[i]*fps[i]^2
+    #  (the square of the frame rate provides more space for streams with higher load)
+    #  input: list of tuples (name, frameSize in bytes, fps), availableMemory (in bytes, queried if None)
+    #  output: list of BufferPlan in the order of the streams
+    def plan(self, streams, availableMemory = None):
+        if len(streams) == 0:
+            return []
+        bufferMemory = self.getBufferMemory(len(streams), availableMemory)
+        weights = [frameSize*(fps**2) for name, frameSize, fps in streams]
+        totalWeight = sum(weights)
+
+        plans = []
+        for (name, frameSize, fps), weight in zip(streams, weights):
+            share = weight/totalWeight if totalWeight > 0 else 1.0/len(streams)
+            frames = max(MIN_BUFFER_FRAMES, int(bufferMemory*share // frameSize))
+            plans.append(BufferPlan(name, frameSize, frames, frames*frameSize, frames/fps if fps > 0 else 0.0))
+        return plans
+
+    ## prints the plan, one line per camera
+    @staticmethod
+    def printPlan(plans):
+        for plan in plans:
+            print('Buffer plan for the camera %s: %d frames of %d bytes, %.1f MB, %.1f s'
+                  % (plan.name, plan.frames, plan.frameSize, plan.bytes/1024.0**2, plan.seconds))
+        print('Total buffer memory: %.1f MB' % (sum(plan.bytes for plan in plans)/1024.0**2))
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Nov  1 10:26:48 2026
+
+motion_gate defines the motion-gated recording policy: MotionDetector, a cheap
+activity measure computed by the acquisition thread for every frame put to the
+frame buffer, MotionGate, which decides in the processing thread which frames
+are written, and MotionIndex, the json file listing the skipped intervals of a
+recording (<recording>.motion.json).
+
+The detector compares a decimated sample of the raw frame (every n-th row and
+pixel, the most significant byte of the pixel) with the sample of the previous
+frame; the mean absolute difference is stored in the motion field of the frame
+metadata. A frame is written if a frame with activity above the threshold was
+received at most preFrames after or postFrames before it, so the processing
+thread keeps preFrames frames in the buffer before it decides.
+
+@author: taskcontroller
+"""
+
+import os
+import json
+import numpy
+from data_structures import ImageFormat, BITS_PER_PIXEL
+
+MOTION_INDEX_EXTENSION = '.motion.json'
+
+# byte sampled for every pixel format: (bytes per group of pixels, offset of the sampled byte);
+# the most significant byte of 16 bit pixels, the first channel of RGB and the luminance of YCbCr
+SAMPLED_BYTE = {
+    ImageFormat.RGB24: (3, 0),
+    ImageFormat.MONO8: (1, 0),
+    ImageFormat.Mono16: (2, 1),
+    ImageFormat.YCbCr: (3, 0),
+    ImageFormat.MONO12P: (3, 2),
+    ImageFormat.BAYER8: (1, 0),
+    ImageFormat.BAYER12P: (3, 2),
+    ImageFormat.BAYER16: (2, 1),
+    ImageFormat.YCbCr411: (3, 1),
+    ImageFormat.YCbCr422: (2, 1),
+}
+
+
+class MotionDetector:
+    ## input: StreamProperties of the raw frames, int decimation - every decimation-th row and
+    #         pixel (group of pixels for packed formats) is compared; even values keep the colour of Bayer frames
+    def __init__(self, streamProperties, decimation):
+        groupBytes, offset = SAMPLED_BYTE.get(streamProperties.format, (1, 0))
+        self.rowBytes_ = (streamProperties.width*BITS_PER_PIXEL.get(streamProperties.format, 8) + 7)//8
+        self.rowStep_ = max(1, int(decimation))
+        self.columnStart_ = offset
+        self.columnStep_ = groupBytes*self.rowStep_
+        self.previous_ = None # int16 sample of the previous frame
+        self.difference_ = None
+
+    ## input: raw frame data (numpy array or bytes-like object)
+    #  output: float activity - mean absolute difference to the previous frame (0 for the first frame)
+    def measure(self, data):
+        if not isinstance(data, numpy.ndarray):
+            data = numpy.frombuffer(data, dtype = numpy.uint8)
+        data = data.reshape(-1).view(numpy.uint8)
+        height = data.size//self.rowBytes_
+        rows = data[:height*self.rowBytes_].reshape(height, self.rowBytes_)
+        sample = rows[::self.rowStep_, self.columnStart_::self.columnStep_].astype(numpy.int16)
+        activity = 0.0
+        if (self.previous_ is not None) and (self.previous_.shape == sample.shape):
+            numpy.subtract(sample, self.previous_, out = self.difference_)
+            activity = float(numpy.abs(self.difference_, out = self.difference_).mean())
+        else:
+            self.difference_ = numpy.empty_like(sample)
+        self.previous_ = sample
+        return activity
+
+
+## the skipped intervals of a recording; the index is rewritten (atomically) after
+#  every interval, so after a crash it lists all intervals skipped so far
+class MotionIndex:
+    ## input: string filename, dictionary header - description of the recording (json serializable)
+    def __init__(self, filename, header):
+        self.filename_ = filename
+        self.header_ = dict(header)
+        self.intervals_ = []
+        self.save()
+
+    ## input: dictionary describing the skipped interval
+    def add(self, interval):
+        self.intervals_.append(interval)
+        self.save()
+
+    ## writes the index into a temporary file and replaces the old one with it
+    def save(self):
+        index = dict(self.header_)
+        index['skipped'] = self.intervals_
+        temporaryFilename = self.filename_ + '.tmp'
+        try:
+            with open(temporaryFilename, 'w') as indexFile:
+                json.dump(index, indexFile, indent = 2)
+            os.replace(temporaryFilename, self.filename_)
+        except OSError as ex:
+            print('Unable to save the motion index %s: %s' % (self.filename_, ex))
+
+
+## decides which frames of a recording are written; used by the processing thread only
+class MotionGate:
+    ## input: float threshold - activity starting a written interval, int preFrames, int postFrames -
+    #         frames written before and after every frame with activity, MotionIndex index
+    def __init__(self, threshold, preFrames, postFrames, index):
+        self.threshold_ = threshold
+        self.preFrames_ = max(0, int(preFrames))
+        self.postFrames_ = max(0, int(postFrames))
+        self.index_ = index
+        self.scanned_ = None # sequence number (see FrameRingBuffer) of the next frame checked for activity
+        self.lastMotion_ = None # sequence number of the newest frame with activity found so far
+        self.writtenCnt_ = 0 # frames written to the recording
+        self.skippedCnt_ = 0 # frames skipped in total
+        self.skipped_ = None # interval being skipped (dictionary) or None
+
+    ## decides about the oldest frames of the frame buffer; a frame is decided when the activity
+    #  of the preFrames frames after it is known (or the recording ends before them)
+    #  input: FrameRingBuffer frameQueue, int count - maximal number of frames decided,
+    #         endSequence - sequence number of the first frame not belonging to the recording (None - unknown yet)
+    #  output: list of bool, whether each of the oldest frames is written (shorter if the rest is not decided yet)
+    def decide(self, frameQueue, count, endSequence = None):
+        released = frameQueue.getReleasedCount()
+        newest = released + len(frameQueue) - 1
+        if endSequence != None:
+            newest = min(newest, endSequence - 1)
+        if (self.scanned_ == None) or (self.scanned_ < released):
+            self.scanned_ = released
+        decisions = []
+        for i in range(min(count, newest - released + 1)):
+            sequence = released + i
+            lookAhead = sequence + self.preFrames_
+            if (lookAhead > newest) and (endSequence == None):
+                break
+            while self.scanned_ <= min(lookAhead, newest):
+                if frameQueue.peekMetadata(self.scanned_ - released)['motion'] >= self.threshold_:
+                    self.lastMotion_ = self.scanned_
+                self.scanned_ += 1
+            write = (self.lastMotion_ != None) and (self.lastMotion_ >= sequence - self.postFrames_)
+            if write:
+                self.closeInterval()
+                self.writtenCnt_ += 1
+            else:
+                self.skipFrame(frameQueue.peekMetadata(i))
+            decisions.append(write)
+        return decisions
+
+    ## input: metadata record of a skipped frame
+    def skipFrame(self, metadata):
+        if self.skipped_ == None:
+            self.skipped_ = {'afterFrame': self.writtenCnt_, # number of frames written before the interval
+                             'firstFrameId': int(metadata['frameId']), 'startTime': float(metadata['hostTimestamp']),
+                             'frameCount': 0}
+        self.skipped_['lastFrameId'] = int(metadata['frameId'])
+        self.skipped_['endTime'] = float(metadata['hostTimestamp'])
+        self.skipped_['frameCount'] += 1
+        self.skippedCnt_ += 1
+
+    ## adds the interval being skipped to the index
+    def closeInterval(self):
+        if self.skipped_ != None:
+            self.index_.add(self.skipped_)
+            self.skipped_ = None
+
+    ## called after the last frame of the recording
+    def finish(self):
+        self.closeInterval()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 09:12:44 2026
+
+node_cache defines NodeCache, the GenICam nodes of a camera looked up once after
+Init(): every NodeHandle holds the typed pointer (CFloatPtr, CEnumerationPtr,
+...) of a node, its access flags and the values of its enumeration entries, so
+getters and setters of SpinnakerCamera do not search the node maps and
+re-check the access on every call.
+
+Access flags change when the camera changes state (e.g. ExposureTime becomes
+writable when ExposureAuto is switched off, PixelFormat becomes read-only
+while streaming); SpinnakerCamera refreshes them after such changes
+(NodeHandle.refresh, NodeCache.refreshAccess). The cache is rebuilt only when
+the camera is initialised again.
+
+@author: taskcontroller
+"""
+
+import PySpin
+
+# node maps of a camera
+class NodeMapType:
+    CAMERA = 'camera'       # GetNodeMap()
+    TL_DEVICE = 'tlDevice'  # GetTLDeviceNodeMap()
+    TL_STREAM = 'tlStream'  # GetTLStreamNodeMap()
+
+# nodes looked up when the cache is built: (name, node map, PySpin pointer class)
+CACHED_NODES = [
+    ('DeviceID', NodeMapType.TL_DEVICE, 'CStringPtr'),
+    ('DeviceSerialNumber', NodeMapType.TL_DEVICE, 'CStringPtr'),
+    ('DeviceModelName', NodeMapType.TL_DEVICE, 'CStringPtr'),
+    ('StreamBufferHandlingMode', NodeMapType.TL_STREAM, 'CEnumerationPtr'),
+    ('StreamBufferCountMode', NodeMapType.TL_STREAM, 'CEnumerationPtr'),
+    ('StreamBufferCountManual', NodeMapType.TL_STREAM, 'CIntegerPtr'),
+    ('StreamOutputBufferCount', NodeMapType.TL_STREAM, 'CIntegerPtr'),
+    ('Width', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('Height', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('OffsetX', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('OffsetY', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('BinningHorizontal', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('BinningVertical', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('DecimationHorizontal', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('DecimationVertical', NodeMapType.CAMERA, 'CIntegerPtr'),
+    ('PixelFormat', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('AcquisitionMode', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('AcquisitionFrameRate', NodeMapType.CAMERA, 'CFloatPtr'),
+    ('AcquisitionFrameRateAuto', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('AcquisitionFrameRateEnabled', NodeMapType.CAMERA, 'CBooleanPtr'),
+    ('ExposureAuto', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('ExposureTime', NodeMapType.CAMERA, 'CFloatPtr'),
+    ('GainAuto', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('Gain', NodeMapType.CAMERA, 'CFloatPtr'),
+    ('ReverseX', NodeMapType.CAMERA, 'CBooleanPtr'),
+    ('ReverseY', NodeMapType.CAMERA, 'CBooleanPtr'),
+    ('TriggerMode', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('TriggerSource', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('ChunkModeActive', NodeMapType.CAMERA, 'CBooleanPtr'),
+    ('ChunkSelector', NodeMapType.CAMERA, 'CEnumerationPtr'),
+    ('ChunkEnable', NodeMapType.CAMERA, 'CBooleanPtr'),
+]
+
+
+## a node with its access flags; node_ is the typed pointer (None if the camera has no such node)
+class NodeHandle:
+    def __init__(self, name, node):
+        self.name_ = name
+        self.node_ = node
+        self.available_ = False
+        self.readable_ = False
+        self.writable_ = False
+        self.entries_ = {} # values of enumeration entries by symbolic name
+        self.refresh()
+
+    ## reads the access flags of the node again
+    def refresh(self):
+        try:
+            self.available_ = (self.node_ != None) and PySpin.IsAvailable(self.node_)
+            self.readable_ = self.available_ and PySpin.IsReadable(self.node_)
+            self.writable_ = self.available_ and PySpin.IsWritable(self.node_)
+        except PySpin.SpinnakerException:
+            self.available_ = self.readable_ = self.writable_ = False
+
+    ## output: whether the node is writable; a node cached as not writable is checked
+    #  again, since it may have become writable after a change of the camera state
+    def canWrite(self):
+        if not self.writable_:
+            self.refresh()
+        return self.writable_
+
+    ## output: whether the node is readable (checked again if it was not)
+    def canRead(self):
+        if not self.readable_:
+            self.refresh()
+        return self.readable_
+
+    ## output: int value of the enumeration entry or None if the entry is not available
+    def getEntryValue(self, symbolic):
+        value = self.entries_.get(symbolic)
+        if (value == None) and self.available_:
+            entry = PySpin.CEnumEntryPtr(self.node_.GetEntryByName(symbolic))
+            if PySpin.IsAvailable(entry) and PySpin.IsReadable(entry):
+                value = entry.GetValue()
+                self.entries_[symbolic] = value
+        return value
+
+    ## sets the enumeration node to the entry, output: True on success
+    def setEntry(self, symbolic):
+        value = self.getEntryValue(symbolic)
+        if (value == None) or not self.canWrite():
+            return False
+        self.node_.SetIntValue(value)
+        return True
+
+
+class NodeCache:
+    ## input: camera pointer (initialised)
+    def __init__(self, camera):
+        self.camera_ = camera
+        self.nodeMaps_ = None
+        self.handles_ = {}
+
+    ## looks up all nodes of CACHED_NODES; called after camera Init()
+    def build(self):
+        self.nodeMaps_ = {NodeMapType.CAMERA: self.camera_.GetNodeMap(),
+                          NodeMapType.TL_DEVICE: self.camera_.GetTLDeviceNodeMap(),
+                          NodeMapType.TL_STREAM: self.camera_.GetTLStreamNodeMap()}
+        self.handles_ = {}
+        for name, nodeMapType, pointerClass in CACHED_NODES:
+            self.add(name, nodeMapType, pointerClass)
+
+    ## drops all handles, e.g. before camera DeInit()
+    def invalidate(self):
+        self.nodeMaps_ = None
+        self.handles_ = {}
+
+    def isValid(self):
+        return self.nodeMaps_ != None
+
+    def add(self, name, nodeMapType, pointerClass):
+        try:
+            node = self.nodeMaps_[nodeMapType].GetNode(name)
+            node = getattr(PySpin, pointerClass)(node) if node != None else None
+        except PySpin.SpinnakerException:
+            node = None
+        handle = NodeHandle(name, node)
+        self.handles_[name] = handle
+        return handle
+
+    ## output: NodeHandle of the node; nodes not in CACHED_NODES are looked up once on first use
+    def get(self, name, nodeMapType = NodeMapType.CAMERA, pointerClass = 'CValuePtr'):
+        handle = self.handles_.get(name)
+        if handle == None:
+            if self.nodeMaps_ == None:
+                self.build()
+                handle = self.handles_.get(name)
+            if handle == None:
+                handle = self.add(name, nodeMapType, pointerClass)
+        return handle
+
+    ## reads the access flags of all nodes again (e.g. after acquisition started or stopped)
+    def refreshAccess(self):
+        for handle in self.handles_.values():
+            handle.refresh()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:26:44 2026
+
+raw_recorder defines RawRecorder, which writes the frames of a recording as they
+come from the camera (no conversion, no encoding) into a container file, and
+RawReader, which gives access to any frame of such a file. Encoding is done
+later, e.g. with transcode.
+
+File layout: 8 bytes of magic, uint32 offset of the frames, uint32 length of a
+json header (stream properties: width, height, fps, pixel format, slot size,
+...), the json header itself and zero padding up to the offset. Frames follow
+in slots of fixed size (a multiple of SLOT_ALIGNMENT), so frame i starts at
+offset + i*slotSize. The file ends with the frame offset table (uint64 offset
+and uint32 length of every frame) and a trailer (uint64 position of the table,
+uint64 number of frames, 8 bytes of trailer magic). If the trailer is missing
+(the recording was not closed), the frames can still be found from the slot size.
+
+The file is preallocated and memory-mapped in large chunks, so frames are copied
+into the page cache and written back by the operating system in large
+sequential writes.
+
+@author: taskcontroller
+"""
+
+import os
+import json
+import struct
+import numpy
+
+RAW_MAGIC = b'MCARAW\x00\x00'
+RAW_TRAILER_MAGIC = b'MCAIDX\x00\x00'
+RAW_VERSION = 1
+RAW_FILE_EXTENSION = '.raw'
+# frames and the data offset are aligned to the page size
+SLOT_ALIGNMENT = 4096
+# the file is grown (and mapped) by at least this many bytes at once
+DEFAULT_CHUNK_SIZE = 256*1024**2
+
+# entry of the frame offset table
+FRAME_OFFSET_DTYPE = numpy.dtype([('offset', '<u8'), ('length', '<u4')])
+TRAILER_FORMAT = '<QQ8s'
+
+
+## rounds the value up to a multiple of the alignment
+def alignUp(value, alignment = SLOT_ALIGNMENT):
+    return -(-value // alignment)*alignment
+
+
+## writes frames of a single recording; used by the processing thread only
+class RawRecorder:
+    ## input: string filename, dictionary header - description of the stream (json serializable),
+    #         int frameSize - maximal size of a frame in bytes, int chunkSize - preallocation step in bytes
+    def __init__(self, filename, header, frameSize, chunkSize = DEFAULT_CHUNK_SIZE):
+        self.filename_ = filename
+        self.slotSize_ = alignUp(int(frameSize))
+        self.framesPerChunk_ = max(1, chunkSize // self.slotSize_)
+        header = dict(header)
+        header['version'] = RAW_VERSION
+        header['frameSize'] = int(frameSize)
+        header['slotSize'] = self.slotSize_
+        headerData = json.dumps(header).encode('utf-8')
+        prefixSize = len(RAW_MAGIC) + 8
+        self.dataOffset_ = alignUp(prefixSize + len(headerData))
+
+        self.file_ = open(filename, 'w+b')
+        self.file_.write(RAW_MAGIC)
+        self.file_.write(struct.pack('<II', self.dataOffset_, len(headerData)))
+        self.file_.write(headerData)
+        self.file_.write(b'\x00'*(self.dataOffset_ - prefixSize - len(headerData)))
+        self.file_.flush()
+
+        self.chunk_ = None      # memory map of the current chunk (framesPerChunk_ slots)
+        self.chunkStart_ = 0    # index of the first frame in the current chunk
+        self.lengths_ = []      # length of every written frame
+        self.frameCnt_ = 0
+
+    def getFrameCount(self):
+        return self.frameCnt_
+
+    ## preallocates and maps the chunk starting at the given frame
+    def mapChunk(self, firstFrame):
+        self.chunk_ = None # unmap the previous chunk, its pages are written back by the OS
+        chunkOffset = self.dataOffset_ + firstFrame*self.slotSize_
+        self.file_.truncate(chunkOffset + self.framesPerChunk_*self.slotSize_)
+        self.chunk_ = numpy.memmap(self.file_, dtype = numpy.uint8, mode = 'r+', offset = chunkOffset,
+                                   shape = (self.framesPerChunk_, self.slotSize_))
+        self.chunkStart_ = firstFrame
+
+    ## copies a frame into the next slot
+    #  input: frame data (numpy array or bytes-like object)
+    def append(self, data):
+        if isinstance(data, numpy.ndarray):
+            frameData = data.reshape(-1).view(numpy.uint8)
+        else:
+            frameData = numpy.frombuffer(data, dtype = numpy.uint8)
+        length = frameData.size
+        if length > self.slotSize_:
+            raise ValueError('frame of %d bytes does not fit into a slot of %d bytes' % (length, self.slotSize_))
+        if (self.chunk_ is None) or (self.frameCnt_ - self.chunkStart_ >= self.framesPerChunk_):
+            self.mapChunk(self.frameCnt_)
+        self.chunk_[self.frameCnt_ - self.chunkStart_, :length] = frameData
+        self.lengths_.append(length)
+        self.frameCnt_ += 1
+
+    ## cuts off the preallocated space and writes the frame offset table
+    def close(self):
+        if self.file_ is None:
+            return
+        if self.chunk_ is not None:
+            self.chunk_.flush()
+            self.chunk_ = None
+        tableOffset = self.dataOffset_ + self.frameCnt_*self.slotSize_
+        table = numpy.zeros(self.frameCnt_, dtype = FRAME_OFFSET_DTYPE)
+        table['offset'] = self.dataOffset_ + numpy.arange(self.frameCnt_, dtype = numpy.uint64)*self.slotSize_
+        table['length'] = self.lengths_
+        self.file_.truncate(tableOffset)
+        self.file_.seek(tableOffset)
+        self.file_.write(table.tobytes())
+        self.file_.write(struct.pack(TRAILER_FORMAT, tableOffset, self.frameCnt_, RAW_TRAILER_MAGIC))
+        self.file_.close()
+        self.file_ = None
+
+
+## reads the header of a raw recording
+#  output: dictionary header, int offset of the frames
+def loadRawHeader(filename):
+    with open(filename, 'rb') as rawFile:
+        if rawFile.read(len(RAW_MAGIC)) != RAW_MAGIC:
+            raise ValueError('%s is not a raw recording' % filename)
+        dataOffset, headerSize = struct.unpack('<II', rawFile.read(8))
+        header = json.loads(rawFile.read(headerSize).decode('utf-8'))
+    return header, dataOffset
+
+
+## gives access to the frames of a raw recording without reading the whole file
+class RawReader:
+    def __init__(self, filename):
+        self.filename_ = filename
+        self.header_, self.dataOffset_ = loadRawHeader(filename)
+        self.slotSize_ = self.header_['slotSize']
+        fileSize = os.path.getsize(filename)
+        self.table_ = self.loadOffsetTable(fileSize)
+        if self.table_ is None:
+            # not closed properly: assume every slot up to the end of the file holds a full frame
+            frameCnt = max(0, (fileSize - self.dataOffset_) // self.slotSize_)
+            self.table_ = numpy.zeros(frameCnt, dtype = FRAME_OFFSET_DTYPE)
+            self.table_['offset'] = self.dataOffset_ + numpy.arange(frameCnt, dtype = numpy.uint64)*self.slotSize_
+            self.table_['length'] = self.header_['frameSize']
+            print('%s has no frame table, %d frames assumed' % (filename, frameCnt))
+        dataSize = len(self.table_)*self.slotSize_
+        self.frames_ = numpy.memmap(filename, dtype = numpy.uint8, mode = 'r', offset = self.dataOffset_,
+                                    shape = (len(self.table_), self.slotSize_)) if dataSize > 0 else None
+
+    ## output: numpy array of FRAME_OFFSET_DTYPE or None if the file has no trailer
+    def loadOffsetTable(self, fileSize):
+        trailerSize = struct.calcsize(TRAILER_FORMAT)
+        if fileSize < self.dataOffset_ + trailerSize:
+            return None
+        with open(self.filename_, 'rb') as rawFile:
+            rawFile.seek(fileSize - trailerSize)
+            tableOffset, frameCnt, magic = struct.unpack(TRAILER_FORMAT, rawFile.read(trailerSize))
+            if magic != RAW_TRAILER_MAGIC:
+                return None
+            rawFile.seek(tableOffset)
+            return numpy.fromfile(rawFile, dtype = FRAME_OFFSET_DTYPE, count = frameCnt)
+
+    def __len__(self):
+        return len(self.table_)
+
+    def getHeader(self):
+        return self.header_
+
+    ## output: numpy uint8 array (view of the mapped file) with the data of the frame
+    def getFrame(self, index):
+        return self.frames_[index, :self.table_['length'][index]]
+
+    def close(self):
+        self.frames_ = None
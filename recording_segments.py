@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 11:17:05 2026
+
+recording_segments defines the pieces of a segmented recording: RecordingSegment,
+one video file of a recording together with its frame metadata file, and
+SegmentManifest, the json file listing the segments of a recording in order
+(<recording>.segments.json). The manifest is rewritten (atomically) every time
+a segment is finalised, so after a crash it lists all complete segments.
+
+@author: taskcontroller
+"""
+
+import os
+import json
+
+MANIFEST_EXTENSION = '.segments.json'
+
+
+## one video file of a recording; frames are appended by the processing thread,
+#  the segment is opened and finalised by the helper thread of the camera
+class RecordingSegment:
+    def __init__(self, index, videoFilename, recorder, metadataWriter):
+        self.index_ = index
+        self.videoFilename_ = videoFilename
+        self.recorder_ = recorder             # PySpin.SpinVideo or raw_recorder.RawRecorder
+        self.metadataWriter_ = metadataWriter # frame_metadata.FrameMetadataWriter (None if not available)
+        self.firstFrame_ = 0     # index of the first frame in the recording
+        self.frameCnt_ = 0       # number of written frames
+        self.dataSize_ = 0       # bytes of frame data passed to the recorder (before encoding)
+        self.startTime_ = None   # host time of the first frame
+        self.endTime_ = None     # host time of the last frame
+
+    ## counts a written frame, input: int dataSize - in bytes, float hostTime - time the frame was received
+    def countFrame(self, dataSize, hostTime):
+        if self.frameCnt_ == 0:
+            self.startTime_ = hostTime
+        self.endTime_ = hostTime
+        self.frameCnt_ += 1
+        self.dataSize_ += dataSize
+
+    ## output: dictionary describing the segment in the manifest
+    def asDict(self):
+        return {'index': self.index_, 'video': self.videoFilename_,
+                'metadata': self.metadataWriter_.filename_ if self.metadataWriter_ != None else None,
+                'firstFrame': self.firstFrame_, 'frameCount': self.frameCnt_, 'dataSize': self.dataSize_,
+                'startTime': self.startTime_, 'endTime': self.endTime_}
+
+
+class SegmentManifest:
+    ## input: string filename, dictionary header - description of the recording (json serializable)
+    def __init__(self, filename, header):
+        self.filename_ = filename
+        self.header_ = dict(header)
+        self.segments_ = []
+        self.save()
+
+    ## adds a finalised segment and saves the manifest
+    def add(self, segment):
+        self.segments_.append(segment.asDict())
+        self.segments_.sort(key = lambda entry: entry['index'])
+        self.save()
+
+    ## writes the manifest into a temporary file and replaces the old one with it
+    def save(self):
+        manifest = dict(self.header_)
+        manifest['segments'] = self.segments_
+        temporaryFilename = self.filename_ + '.tmp'
+        try:
+            with open(temporaryFilename, 'w') as manifestFile:
+                json.dump(manifest, manifestFile, indent = 2)
+            os.replace(temporaryFilename, self.filename_)
+        except OSError as ex:
+            print('Unable to save the segment manifest %s: %s' % (self.filename_, ex))
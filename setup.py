@@ -9,7 +9,7 @@ base = None
 
 executables = [Executable("test.py", base=base)]
 
-packages = ["idna", "data_structures", "acquisition_ini", "numpy", "mkl", "wx", "PIL", "datetime", "threading", "time", "SpinnakerCamera", "VideoAcquisitionThread", "VideoProcessingThread", "wxWindow", "main_control_window", "SpinnakerControl", "VideoSingleton", "collections", "PySpin"]
+packages = ["idna", "data_structures", "acquisition_ini", "numpy", "mkl", "wx", "PIL", "datetime", "threading", "time", "SpinnakerCamera", "node_cache", "live_settings", "frame_conversion", "motion_gate", "frame_buffer", "frame_spool", "telemetry", "drop_detection", "frame_metadata", "raw_recorder", "transcode", "recording_segments", "frame_sync", "memory_planner", "VideoAcquisitionThread", "VideoProcessingThread", "wxWindow", "main_control_window", "SpinnakerControl", "VideoSingleton", "headless_control", "collections", "PySpin"]
 options = {
     'build_exe': {    
         'packages':packages,
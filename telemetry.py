@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:03:27 2026
+
+telemetry defines an in-memory channel for the statistics of the camera pipelines.
+The acquisition and processing threads only increment counters and push events
+(no console output in the per-frame path); TelemetryReporter prints a summary
+once per second from its own thread.
+
+@author: taskcontroller
+"""
+
+import threading
+import time
+import json
+from collections import deque
+
+# set of constants defining how much is reported to the console
+class Verbosity:
+    QUIET = 0    # nothing is printed
+    WARNINGS = 1 # only warnings (buffer overruns, acquisition errors)
+    SUMMARY = 2  # warnings and one line per camera per second
+    DEBUG = 3    # everything, including events for single frames
+
+# maximal number of events kept until the reporter prints them
+MAX_EVENTS = 1000
+# minimal time (in s) between two events of the same kind from the same source
+EVENT_MIN_INTERVAL = 1.0
+
+# stages of the camera pipeline whose duration is measured
+class Stage:
+    GRAB = 'grab'              # GetNextImage (including waiting for the frame)
+    CONVERT = 'convert'        # conversion of a batch to the capture pixel format (conversion workers)
+    ENQUEUE = 'enqueue'        # copy of a batch of frames into the frame buffer
+    DETECT = 'detect'          # activity measure of a frame for the motion gate
+    QUEUE_WAIT = 'queueWait'   # time the frame spent in the frame buffer
+    DEQUEUE = 'dequeue'        # taking the frame from the buffer and wrapping it for the recorder
+    APPEND = 'append'          # writing the frame to the file
+    DISPLAY = 'display'        # display conversion (on a conversion worker) and drawing
+    ALL = (GRAB, CONVERT, ENQUEUE, DETECT, QUEUE_WAIT, DEQUEUE, APPEND, DISPLAY)
+
+# every power of two is divided into 2**SUB_BUCKET_BITS buckets, i.e. relative error < 6.25%
+SUB_BUCKET_BITS = 4
+# longest duration distinguished by the histograms (about 18 minutes), longer ones are clamped
+MAX_LATENCY_NS = 2**40
+
+
+## HDR-style histogram with fixed log-linear buckets of durations in nanoseconds.
+#  Recording is a few integer operations, so it can stay enabled in production;
+#  every histogram must be filled by a single thread.
+class LatencyHistogram:
+    def __init__(self):
+        maxShift = max(0, MAX_LATENCY_NS.bit_length() - (SUB_BUCKET_BITS + 1))
+        self.counts_ = [0]*((maxShift + 2) << SUB_BUCKET_BITS)
+        self.count_ = 0
+        self.max_ = 0
+
+    ## input: float duration - in seconds (difference of time.perf_counter() values)
+    def record(self, duration):
+        value = min(max(int(duration*1e9 + 0.5), 0), MAX_LATENCY_NS)
+        shift = max(0, value.bit_length() - (SUB_BUCKET_BITS + 1))
+        self.counts_[(shift << SUB_BUCKET_BITS) + (value >> shift)] += 1
+        self.count_ += 1
+        if value > self.max_:
+            self.max_ = value
+
+    ## output: int - representative value (middle of the bucket) in nanoseconds
+    @staticmethod
+    def bucketValue(index):
+        shift = max(0, (index >> SUB_BUCKET_BITS) - 1)
+        lowerBound = (index - (shift << SUB_BUCKET_BITS)) << shift
+        return lowerBound + ((1 << shift) >> 1)
+
+    ## input: float percentile (0-100), output: duration in nanoseconds
+    def getPercentile(self, percentile):
+        if self.count_ == 0:
+            return 0
+        rank = max(1, int(round(self.count_*percentile/100.0)))
+        cumulative = 0
+        for index, count in enumerate(self.counts_):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self.bucketValue(index), self.max_)
+        return self.max_
+
+    ## output: dictionary with number of samples, p50, p99 and max (in ms)
+    def getStatistics(self):
+        return {'count': self.count_,
+                'p50': self.getPercentile(50)/1e6,
+                'p99': self.getPercentile(99)/1e6,
+                'max': self.max_/1e6}
+
+    def reset(self):
+        self.counts_ = [0]*len(self.counts_)
+        self.count_ = 0
+        self.max_ = 0
+
+
+## counters of a single camera pipeline; every counter is incremented by one thread only
+class CameraCounters:
+    def __init__(self, name):
+        self.name_ = name
+        self.received_ = 0   # frames received from the camera (acquisition thread)
+        self.incomplete_ = 0 # incomplete images discarded (acquisition thread)
+        self.overruns_ = 0   # frames dropped because the frame buffer was full (acquisition thread)
+        self.written_ = 0    # frames written to the file (processing thread)
+        self.queued_ = 0     # frames waiting in the buffer, updated by the processing thread
+        # duration of every pipeline stage
+        self.latency_ = dict((stage, LatencyHistogram()) for stage in Stage.ALL)
+
+    ## output: tuple of the current values
+    def snapshot(self):
+        return (self.received_, self.written_, self.queued_, self.incomplete_, self.overruns_)
+
+    ## output: dictionary of latency statistics by stage
+    def getLatencyStatistics(self):
+        return dict((stage, histogram.getStatistics()) for stage, histogram in self.latency_.items())
+
+
+class TelemetryChannel:
+    def __init__(self):
+        self.cameras_ = {} # CameraCounters by camera name
+        self.events_ = deque(maxlen = MAX_EVENTS) # appending is thread-safe without locks
+        self.lastEventTime_ = {}  # time of the last event by (source, key)
+        self.suppressedEvents_ = {} # number of events skipped by (source, key)
+
+    ## returns counters for the camera (creating them if necessary)
+    def registerCamera(self, name):
+        name = str(name)
+        if name not in self.cameras_:
+            self.cameras_[name] = CameraCounters(name)
+        return self.cameras_[name]
+
+    def getCameras(self):
+        return list(self.cameras_.values())
+
+    ## output: dictionary of latency statistics of every camera by camera name
+    def getLatencyStatistics(self):
+        return dict((camera.name_, camera.getLatencyStatistics()) for camera in self.getCameras())
+
+    ## writes latency statistics of all cameras to a json file
+    def saveLatencyStatistics(self, filename):
+        with open(filename, 'w') as jsonFile:
+            json.dump(self.getLatencyStatistics(), jsonFile, indent = 2)
+
+    ## stores an event for the reporter. Events of the same kind (key) from the same
+    #  source are rate-limited: at most one per EVENT_MIN_INTERVAL is kept
+    #  input: source (camera name), key (kind of event), message, level (Verbosity)
+    def pushEvent(self, source, key, message, level = Verbosity.WARNINGS):
+        eventId = (source, key)
+        now = time.perf_counter()
+        if now - self.lastEventTime_.get(eventId, -EVENT_MIN_INTERVAL) < EVENT_MIN_INTERVAL:
+            self.suppressedEvents_[eventId] = self.suppressedEvents_.get(eventId, 0) + 1
+            return
+        self.lastEventTime_[eventId] = now
+        suppressed = self.suppressedEvents_.pop(eventId, 0)
+        if suppressed > 0:
+            message = '%s (%d similar events suppressed)' % (message, suppressed)
+        self.events_.append((now, level, source, message))
+
+    ## removes and returns all stored events
+    def drainEvents(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events_.popleft())
+            except IndexError:
+                return events
+
+
+# channel shared by all cameras of the application
+channel = TelemetryChannel()
+
+
+## thread printing the telemetry of all cameras once per period
+class TelemetryReporter(threading.Thread):
+    def __init__(self, telemetryChannel = channel, verbosity = Verbosity.SUMMARY, period = 1.0):
+        threading.Thread.__init__(self, daemon = True)
+        self.channel_ = telemetryChannel
+        self.verbosity_ = verbosity
+        self.period_ = period
+        self.stopEvent_ = threading.Event()
+        self.lastSnapshots_ = {}
+
+    def setVerbosity(self, verbosity):
+        self.verbosity_ = verbosity
+
+    def run(self):
+        lastTime = time.perf_counter()
+        while not self.stopEvent_.wait(self.period_):
+            now = time.perf_counter()
+            self.report(now - lastTime)
+            lastTime = now
+        self.report(time.perf_counter() - lastTime)
+
+    def stop(self):
+        self.stopEvent_.set()
+
+    ## prints events and the summary of the last interval
+    # input: float interval - time (in s) since the previous report
+    def report(self, interval):
+        for eventTime, level, source, message in self.channel_.drainEvents():
+            if level <= self.verbosity_:
+                print('[%s] %s' % (source, message))
+
+        for camera in self.channel_.getCameras():
+            snapshot = camera.snapshot()
+            previous = self.lastSnapshots_.get(camera.name_, (0, 0, 0, 0, 0))
+            self.lastSnapshots_[camera.name_] = snapshot
+            if (self.verbosity_ < Verbosity.SUMMARY) or (snapshot == previous):
+                continue # nothing happened since the last report
+            received, written, queued, incomplete, overruns = snapshot
+            print('[%s] received: %d (%.1f fps), written: %d (%.1f fps), queued: %d, incomplete: %d, overruns: %d'
+                  % (camera.name_, received, (received - previous[0])/interval,
+                     written, (written - previous[1])/interval, queued, incomplete, overruns))
+
+
+## durations of the startup phases (imports, camera initialisation, ...), printed
+#  when the application is ready; phases may be recorded from several threads
+class StartupTimer:
+    def __init__(self):
+        self.phases_ = [] # (phase, duration in s) in the order they were recorded
+        self.lock_ = threading.Lock()
+
+    ## input: string phase, float duration - in seconds
+    def record(self, phase, duration):
+        with self.lock_:
+            self.phases_.append((phase, duration))
+
+    ## output: list of (phase, duration in s)
+    def getPhases(self):
+        with self.lock_:
+            return list(self.phases_)
+
+    def reset(self):
+        with self.lock_:
+            self.phases_ = []
+
+    def printSummary(self):
+        print('Startup times:')
+        for phase, duration in self.getPhases():
+            print('  %-45s %8.3f s' % (phase, duration))
+
+
+# startup phases of the application
+startupTimer = StartupTimer()
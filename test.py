@@ -4,12 +4,46 @@ Created on Thu Jan  3 12:47:34 2019
 
 @author: taskcontroller
 """
-import wx
-from main_control_window import VideoAcquisitionControl 
+import argparse
+import time
+from acquisition_ini import getAcquisitionINI
+import telemetry
+from telemetry import Verbosity
 
 def main():
+    parser = argparse.ArgumentParser(description = 'Video acquisition from several FLIR cameras')
+    parser.add_argument('--verbosity', type = int, default = Verbosity.SUMMARY, choices = range(Verbosity.QUIET, Verbosity.DEBUG + 1),
+                        help = 'console output: 0 - quiet, 1 - warnings, 2 - summary per second (default), 3 - debug')
+    parser.add_argument('--latency-report', default = None, metavar = 'FILE',
+                        help = 'json file where per-stage latency statistics of every camera are saved when acquisition stops')
+    parser.add_argument('--memory-budget', type = float, default = None, metavar = 'GB',
+                        help = 'upper limit for the frame buffers of all cameras in GB (default: available memory minus reserves)')
+    parser.add_argument('--headless', action = 'store_true',
+                        help = 'record without video windows (also set by headless = True in the Default, General section of the ini file)')
+    parser.add_argument('--mosaic', action = 'store_true',
+                        help = 'show all cameras as tiles of one window (also set by mosaic = True in the Default, General section of the ini file)')
+    parser.add_argument('--duration', type = float, default = None, metavar = 'SECONDS',
+                        help = 'headless mode: quit after this time (default: on Ctrl+C, SIGTERM or the command q)')
+    parser.add_argument('--no-record', action = 'store_true',
+                        help = 'headless mode: do not start recording together with acquisition (toggle it with the command r)')
+    args = parser.parse_args()
+    memoryBudget = int(args.memory_budget*1024**3) if args.memory_budget != None else None
+
+    iniFile = getAcquisitionINI() # parsed once, shared with the cameras
+    generalProperties = iniFile.getGeneralProperties()
+    if args.headless or generalProperties.headless:
+        # wx and PIL are never imported in this mode
+        from headless_control import HeadlessControl
+        control = HeadlessControl(args.verbosity, args.latency_report, memoryBudget)
+        return control.run(args.duration, not args.no_record)
+
+    importStart = time.perf_counter()
+    import wx
+    from main_control_window import VideoAcquisitionControl 
+    telemetry.startupTimer.record('wx import', time.perf_counter() - importStart)
     app = wx.App()   
-    mainWindow = VideoAcquisitionControl("Video Acquistion Control Window")
+    mainWindow = VideoAcquisitionControl("Video Acquistion Control Window", args.verbosity, args.latency_report, memoryBudget, 
+                                         args.mosaic or generalProperties.mosaic)
     mainWindow.launch()
     mainWindow.Show()
     app.MainLoop() 
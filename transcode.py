@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 16:02:37 2026
+
+transcode encodes raw recordings (raw_recorder) into MJPG, H264 or uncompressed
+AVI files offline, in parallel on all cores: every recording is split into
+chunks of frames, the chunks are encoded by a pool of processes, and every
+chunk becomes an AVI segment. The segments are listed in order in a manifest
+(<recording>.transcode.json) and every segment gets its own frame metadata
+file (frame_metadata) with the timestamps of its frames.
+
+The output settings are taken from the Capture section (aviType, MJPGQuality,
+H264BitRate) of the ini file and can be overridden on the command line.
+
+Usage: python transcode.py <recording>.raw [<recording>.raw ...] [--workers 8] [--chunk-frames 3000]
+
+@author: taskcontroller
+"""
+
+import os
+import json
+import argparse
+import concurrent.futures
+from raw_recorder import RawReader, RAW_FILE_EXTENSION
+from frame_metadata import FrameMetadataWriter, loadFrameMetadata, METADATA_FILE_EXTENSION
+
+MANIFEST_EXTENSION = '.transcode.json'
+# number of frames encoded by one task
+DEFAULT_CHUNK_FRAMES = 3000
+AVI_TYPES = ('UNCOMPRESSED', 'MJPG', 'H264')
+
+
+## part of a recording encoded by one task
+#  input: string rawFilename, int firstFrame, int frameCnt, string outputName - without extension,
+#         string aviType, int quality (MJPG), int bitRate (H264), string pixelFormat - output pixel format
+#         (None - as recorded)
+#  output: dictionary describing the segment
+def encodeChunk(rawFilename, firstFrame, frameCnt, outputName, aviType, quality, bitRate, pixelFormat):
+    import PySpin # imported in the worker process only
+    reader = RawReader(rawFilename)
+    header = reader.getHeader()
+    width = header['width']
+    height = header['height']
+    recordedFormat = getattr(PySpin, 'PixelFormat_' + header['pixelFormat'])
+    outputFormat = getattr(PySpin, 'PixelFormat_' + pixelFormat) if pixelFormat != None else None
+
+    if aviType == 'MJPG':
+        option = PySpin.MJPGOption()
+        option.quality = quality
+    elif aviType == 'H264':
+        option = PySpin.H264Option()
+        option.bitrate = bitRate
+        option.height = height
+        option.width = width
+    else:
+        option = PySpin.AVIOption()
+    option.frameRate = header['fps']
+
+    recorder = PySpin.SpinVideo()
+    recorder.Open(outputName, option)
+    for index in range(firstFrame, firstFrame + frameCnt):
+        image = PySpin.Image.Create(width, height, 0, 0, recordedFormat, reader.getFrame(index))
+        if (outputFormat != None) and (outputFormat != recordedFormat):
+            image = image.Convert(outputFormat, PySpin.HQ_LINEAR)
+        recorder.Append(image)
+    recorder.Close()
+    reader.close()
+    # the file extension (and the postfix) are added by SpinVideo
+    return {'video': outputName, 'firstFrame': firstFrame, 'frameCount': frameCnt}
+
+
+## output: file name of the recording without the extension
+def getBaseName(rawFilename):
+    return rawFilename[:-len(RAW_FILE_EXTENSION)] if rawFilename.endswith(RAW_FILE_EXTENSION) else rawFilename
+
+
+## writes the metadata of the frames of a segment into its own metadata file
+def writeSegmentMetadata(header, records, segment):
+    segmentHeader = dict(header)
+    segmentHeader['video'] = segment['video']
+    segmentHeader['firstFrame'] = segment['firstFrame']
+    metadataFilename = segment['video'] + METADATA_FILE_EXTENSION
+    writer = FrameMetadataWriter(metadataFilename, segmentHeader)
+    writer.write(records[segment['firstFrame']:segment['firstFrame'] + segment['frameCount']])
+    writer.close()
+    segment['metadata'] = metadataFilename
+
+
+## encodes raw recordings on a pool of processes
+#  input: list of raw file names, string aviType, int quality, int bitRate, string pixelFormat,
+#         int chunkFrames - frames per segment, int workers - number of processes
+#  output: list of manifest file names
+def transcode(rawFilenames, aviType, quality, bitRate, pixelFormat = None, chunkFrames = DEFAULT_CHUNK_FRAMES, workers = None):
+    tasks = [] # (recording index, chunk index, arguments)
+    for fileIndex, rawFilename in enumerate(rawFilenames):
+        reader = RawReader(rawFilename)
+        frameCnt = len(reader)
+        reader.close()
+        base = getBaseName(rawFilename)
+        for chunkIndex, firstFrame in enumerate(range(0, frameCnt, chunkFrames)):
+            outputName = '%s.%s.c%04d' % (base, aviType.lower(), chunkIndex)
+            tasks.append((fileIndex, chunkIndex, (rawFilename, firstFrame, min(chunkFrames, frameCnt - firstFrame),
+                                                  outputName, aviType, quality, bitRate, pixelFormat)))
+    print('%d recordings, %d chunks of up to %d frames' % (len(rawFilenames), len(tasks), chunkFrames))
+
+    segments = [[] for rawFilename in rawFilenames]
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+        futures = dict((executor.submit(encodeChunk, *arguments), (fileIndex, chunkIndex))
+                       for fileIndex, chunkIndex, arguments in tasks)
+        for future in concurrent.futures.as_completed(futures):
+            fileIndex, chunkIndex = futures[future]
+            try:
+                segment = future.result()
+            except Exception as ex:
+                print('Error: chunk %d of %s failed: %s' % (chunkIndex, rawFilenames[fileIndex], ex))
+                segment = {'video': None, 'error': str(ex)}
+            segments[fileIndex].append((chunkIndex, segment))
+            print('%s: chunk %d done' % (rawFilenames[fileIndex], chunkIndex))
+
+    # segments are completed in any order; the manifest lists them in the order of the frames
+    manifests = []
+    for rawFilename, fileSegments in zip(rawFilenames, segments):
+        fileSegments = [segment for chunkIndex, segment in sorted(fileSegments, key = lambda item: item[0])]
+        metadataFilename = getBaseName(rawFilename) + METADATA_FILE_EXTENSION # written next to the recording
+        if os.path.exists(metadataFilename):
+            header, records = loadFrameMetadata(metadataFilename)
+            for segment in fileSegments:
+                if segment['video'] != None:
+                    writeSegmentMetadata(header, records, segment)
+        manifest = {'source': rawFilename, 'aviType': aviType, 'segments': fileSegments}
+        manifestFilename = rawFilename + MANIFEST_EXTENSION
+        with open(manifestFilename, 'w') as manifestFile:
+            json.dump(manifest, manifestFile, indent = 2)
+        manifests.append(manifestFilename)
+        print('Manifest saved to %s' % manifestFilename)
+    return manifests
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Encodes raw recordings into AVI files on all cores')
+    parser.add_argument('rawFiles', nargs = '+', help = 'raw recordings (%s)' % RAW_FILE_EXTENSION)
+    parser.add_argument('--ini', default = 'acquisition.ini', help = 'ini file with the Capture settings')
+    parser.add_argument('--section', default = 'Default', help = 'device section of the ini file (default: Default)')
+    parser.add_argument('--avi-type', choices = AVI_TYPES, default = None, help = 'overrides aviType of the ini file')
+    parser.add_argument('--quality', type = int, default = None, help = 'overrides MJPGQuality of the ini file')
+    parser.add_argument('--bitrate', type = int, default = None, help = 'overrides H264BitRate of the ini file')
+    parser.add_argument('--pixel-format', default = None, help = 'output pixel format, e.g. RGB8 (default: as recorded)')
+    parser.add_argument('--chunk-frames', type = int, default = DEFAULT_CHUNK_FRAMES, help = 'frames per segment')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of processes (default: all cores)')
+    args = parser.parse_args()
+
+    from acquisition_ini import AcquisitionINI
+    iniFile = AcquisitionINI(args.ini)
+    iniFile.load()
+    captureProperties = iniFile.getCaptureProperties(args.section)
+    aviType = args.avi_type if args.avi_type != None else captureProperties.aviType
+    if aviType not in AVI_TYPES:
+        aviType = 'MJPG' # e.g. RAW in the ini file, which is what is transcoded
+    quality = args.quality if args.quality != None else captureProperties.MJPGQuality
+    bitRate = args.bitrate if args.bitrate != None else captureProperties.H264BitRate
+
+    transcode(args.rawFiles, aviType, quality, bitRate, args.pixel_format, max(1, args.chunk_frames), args.workers)
+
+if __name__ == '__main__':
+    main()
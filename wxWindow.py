@@ -7,10 +7,16 @@ This file defines window and graphical elements for the output of the acquired
 video using wxPython toolkit and PIL image class (for the color format transformation)
 class VideoDisplay defines a window for displaying the acquired frames:
 class VideoPanel defines a graphical panel for displaying the acquired frames
+class MosaicDisplay defines a single window showing the frames of all cameras as tiles
+(optional, instead of a VideoDisplay per camera): the tiles are composited into one
+reused bitmap by one timer, and only the tiles which received a new frame are repainted
 """
 
+import math
+import threading
+import numpy
 import wx
-from PIL import Image
+# PIL is imported when the first frame is converted (see VideoPanel)
 
 # set of constants defining possible rotations of the displayed video
 class ImageRotation:
@@ -21,6 +27,10 @@ class ImageRotation:
 
 # default size of video panel
 DEFAULT_SIZE = (640, 480)
+# size of the mosaic window; the tiles share it, so the cost of the preview does not grow with the cameras
+MOSAIC_SIZE = (1280, 960)
+# period (in ms) of compositing and repainting the mosaic
+MOSAIC_PERIOD = 40
 
 # panel (graphical element) for displaying the acquired frames, is used as a 
 # of VideoDisplay class to DELEGATE part of its functionality.
@@ -54,6 +64,7 @@ class VideoPanel(wx.Panel):
         return scaledBitmap
 
     def showNew(self, width, height, buffer, isRGB = True):
+        from PIL import Image
         if isRGB:
             newBitmap = wx.Bitmap.FromBuffer(width, height, buffer)                                    
             if self.rotationAngle_ != ImageRotation.ANGLE0:
@@ -74,6 +85,7 @@ class VideoPanel(wx.Panel):
         self.Update()
     
     def showNewByPixelFormat(self, pixelformat_string, width, height, buffer):
+        from PIL import Image
         if pixelformat_string == 'RGB8':
             newBitmap = wx.Bitmap.FromBuffer(width, height, buffer)                                    
         elif pixelformat_string == 'YCbCr8_CbYCr':
@@ -163,7 +175,172 @@ class VideoDisplay(wx.Frame):
     def resize(self, width, height):
         if self.panel_ != None:
             self.panel_.SetSize((width, height))  
-            self.SetClientSize((width, height)) 
-        
-   
-        
\ No newline at end of file
+            self.SetClientSize((width, height))
+
+
+# one camera in the mosaic; provides the interface of VideoDisplay used by VideoSingleton
+# and VideoAcquisitionThread. Frames are scaled to the tile on the calling thread (acquisition
+# thread or conversion worker), the GUI thread only copies the newest one into the mosaic
+class MosaicTile:
+    def __init__(self, mosaic, index, title):
+        self.mosaic_ = mosaic
+        self.index_ = index
+        self.title_ = title
+        self.position_ = (0, 0) # (x, y) of the tile in the mosaic
+        self.size_ = (0, 0)     # (width, height) of the tile
+        self.needScale_ = False # stretch the frames to the tile (otherwise the aspect ratio is kept)
+        self.rotationAngle_ = ImageRotation.ANGLE0
+        self.frame_ = None      # newest scaled RGB frame not composited yet (guarded by the lock of the mosaic)
+        self.scaling_ = None    # (key, row indices, column indices) of the last frame size
+        self.closed_ = False
+
+    ## scales (nearest neighbour) and rotates a frame to the tile
+    #  input: numpy array of shape (height, width) or (height, width, 3)
+    #  output: numpy array (height, width, 3) of uint8, at most the size of the tile
+    def fitToTile(self, image):
+        if self.rotationAngle_ != ImageRotation.ANGLE0:
+            image = numpy.rot90(image, -(self.rotationAngle_//90)) # clockwise, as VideoPanel.rotate
+        height, width = image.shape[:2]
+        tileWidth, tileHeight = self.size_
+        key = (height, width, tileWidth, tileHeight, self.needScale_)
+        if (self.scaling_ == None) or (self.scaling_[0] != key):
+            if self.needScale_:
+                scaledWidth, scaledHeight = tileWidth, tileHeight
+            else:
+                scale = min(tileWidth/width, tileHeight/height)
+                scaledWidth, scaledHeight = max(1, int(width*scale)), max(1, int(height*scale))
+            rows = (numpy.arange(scaledHeight)*height//scaledHeight)[:, None]
+            columns = numpy.arange(scaledWidth)*width//scaledWidth
+            self.scaling_ = (key, rows, columns)
+        image = image[self.scaling_[1], self.scaling_[2]]
+        if image.ndim == 2:
+            image = numpy.repeat(image[:, :, None], 3, axis = 2)
+        return image
+
+    def showByPixelFormat(self, pixelformat_string, width, height, buffer):
+        if self.closed_ or (self.size_[0] == 0):
+            return
+        data = buffer if isinstance(buffer, numpy.ndarray) else numpy.frombuffer(buffer, dtype = numpy.uint8)
+        data = data.reshape(-1)
+        if pixelformat_string == 'Mono8':
+            image = data[:width*height].reshape(height, width)
+        else:
+            # RGB8 and the other 3 byte formats are shown as they are (as VideoPanel does)
+            image = data[:width*height*3].reshape(height, width, 3)
+        frame = self.fitToTile(image)
+        with self.mosaic_.lock_:
+            self.frame_ = frame
+
+    def showRGB(self, width, height, buffer):
+        self.showByPixelFormat('RGB8', width, height, buffer)
+
+    def showCbYCr(self, width, height, buffer):
+        self.showByPixelFormat('YCbCr8_CbYCr', width, height, buffer)
+
+    def showMono(self, width, height, buffer):
+        self.showByPixelFormat('Mono8', width, height, buffer)
+
+    def setScaling(self, needScale):
+        self.needScale_ = needScale
+
+    def setImageRotation(self, rotationAngle):
+        self.rotationAngle_ = rotationAngle
+
+    # the size of a tile is given by the mosaic
+    def resize(self, width, height):
+        pass
+
+    def Center(self):
+        self.mosaic_.Center()
+
+    def Show(self):
+        self.mosaic_.Show()
+
+    def Close(self):
+        if not self.closed_:
+            self.closed_ = True
+            self.mosaic_.onTileClosed()
+
+
+# panel compositing the tiles into a single bitmap
+class MosaicPanel(wx.Panel):
+    def __init__(self, parent, size):
+        super().__init__(parent, -1, size = size)
+        self.SetBackgroundStyle(wx.BG_STYLE_CUSTOM)
+        self.Bind(wx.EVT_PAINT, self.onPaint)
+        width, height = size
+        # the composited frames and the bitmap are allocated once and reused
+        self.composite_ = numpy.zeros((height, width, 3), dtype = numpy.uint8)
+        self.bitmap_ = wx.Bitmap.FromBuffer(width, height, self.composite_)
+        self.tiles_ = []
+
+    ## copies the new frames into the composite and repaints their tiles
+    #  input: list of (MosaicTile, frame)
+    def composite(self, frames):
+        for tile, frame in frames:
+            x, y = tile.position_
+            tileWidth, tileHeight = tile.size_
+            region = self.composite_[y:y + tileHeight, x:x + tileWidth]
+            frameHeight, frameWidth = frame.shape[:2]
+            if (frameHeight, frameWidth) != (tileHeight, tileWidth):
+                region[:] = 0 # the frame is centred in the tile
+            top = (tileHeight - frameHeight)//2
+            left = (tileWidth - frameWidth)//2
+            region[top:top + frameHeight, left:left + frameWidth] = frame
+        self.bitmap_.CopyFromBuffer(self.composite_)
+        for tile, frame in frames:
+            self.RefreshRect(wx.Rect(tile.position_[0], tile.position_[1], tile.size_[0], tile.size_[1]), False)
+
+    def onPaint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        dc.DrawBitmap(self.bitmap_, 0, 0)
+        dc.SetTextForeground(wx.YELLOW)
+        for tile in self.tiles_:
+            dc.DrawText(tile.title_, tile.position_[0] + 4, tile.position_[1] + 2)
+
+
+# window showing the frames of all cameras; one timer composites the tiles with new frames
+class MosaicDisplay(wx.Frame):
+    ## input: int numberOfTiles, (width, height) size of the window
+    def __init__(self, numberOfTiles, size = MOSAIC_SIZE):
+        style = wx.DEFAULT_FRAME_STYLE & (~wx.RESIZE_BORDER) & (~wx.CLOSE_BOX) & (~wx.MAXIMIZE_BOX)
+        super().__init__(None, -1, 'Camera Viewer', style=style)
+        self.lock_ = threading.Lock() # guards the frames passed by the tiles
+        self.columns_ = max(1, int(math.ceil(math.sqrt(numberOfTiles))))
+        self.rows_ = max(1, int(math.ceil(numberOfTiles/self.columns_)))
+        self.tileSize_ = (size[0]//self.columns_, size[1]//self.rows_)
+        self.panel_ = MosaicPanel(self, (self.tileSize_[0]*self.columns_, self.tileSize_[1]*self.rows_))
+        self.Fit()
+        self.timer_ = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onTimer, self.timer_)
+        self.Bind(wx.EVT_CLOSE, self.onClose)
+        self.timer_.Start(MOSAIC_PERIOD)
+
+    ## adds the tile of a camera; must be called from the GUI thread
+    #  output: MosaicTile (used like VideoDisplay)
+    def addTile(self, title):
+        index = len(self.panel_.tiles_)
+        tile = MosaicTile(self, index, title)
+        tile.position_ = ((index % self.columns_)*self.tileSize_[0], (index//self.columns_)*self.tileSize_[1])
+        tile.size_ = self.tileSize_
+        self.panel_.tiles_.append(tile)
+        return tile
+
+    def onTimer(self, event):
+        frames = []
+        with self.lock_:
+            for tile in self.panel_.tiles_:
+                if tile.frame_ is not None:
+                    frames.append((tile, tile.frame_))
+                    tile.frame_ = None
+        if len(frames) > 0: # nothing is repainted if no camera sent a frame
+            self.panel_.composite(frames)
+
+    ## the window is closed with the last tile
+    def onTileClosed(self):
+        if all(tile.closed_ for tile in self.panel_.tiles_):
+            self.Close()
+
+    def onClose(self, event):
+        self.timer_.Stop()
+        self.Destroy()